@@ -0,0 +1,96 @@
+"""Runs the micro-benchmarks and compares them with local JSON baselines.
+
+    python -m benchmarks                 # run and compare with the baseline
+    python -m benchmarks --save          # run and store the result as the baseline
+    python -m benchmarks -k cache        # run benchmarks whose name contains 'cache'
+
+No Discord token or MongoDB is required.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Optional
+
+from .harness import registry, run_benchmark
+
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import sys
+
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+SUITES = ("hot_path", "model", "cache")
+
+
+def _load_suites() -> None:
+    for suite in SUITES:
+        __import__(f"{__package__}.{suite}")
+
+
+def _load_baseline(path : Path) -> dict[str, Any]:
+    try:
+        with path.open(encoding="utf-8") as fp:
+            return json.load(fp)["results"]
+    except FileNotFoundError:
+        return {}
+
+
+def _save_baseline(path : Path, results : dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with path.open("w", encoding="utf-8") as fp:
+        json.dump(payload, fp, indent=2, sort_keys=True)
+
+
+def _format_change(current : float, baseline : Optional[dict[str, Any]], threshold : float) -> str:
+    if baseline is None:
+        return "new"
+
+    change = (current - baseline["ns_per_op"]) / baseline["ns_per_op"]
+    flag = "  REGRESSION" if change > threshold else ""
+    return f"{change:+.1%}{flag}"
+
+
+async def main(argv : Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", dest="keyword", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_DIR / "baseline.json")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    _load_suites()
+    baseline = _load_baseline(args.baseline)
+    results : dict[str, Any] = {}
+    regressions = 0
+
+    print(f"{'benchmark':<45} {'ns/op':>12} {'median':>12}  change")
+    for name, bench in registry.items():
+        if args.keyword not in name:
+            continue
+
+        result = await run_benchmark(bench, rounds=args.rounds)
+        results[name] = result.to_dict()
+
+        change = _format_change(result.ns_per_op, baseline.get(name), args.threshold)
+        regressions += change.endswith("REGRESSION")
+        print(f"{name:<45} {result.ns_per_op:>12.1f} {result.median_ns_per_op:>12.1f}  {change}")
+
+    if args.save:
+        _save_baseline(args.baseline, {**baseline, **results})
+        print(f"Baseline saved to {args.baseline}")
+
+    return 1 if regressions and not args.save else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
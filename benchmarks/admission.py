@@ -0,0 +1,111 @@
+"""Concurrency benchmark of the per-channel admission in ``Voice.on_voice_state_update``.
+
+Fires every Go Live event of every channel at once and checks that no channel
+ever holds more streamers than its stream limit, and that the cost per channel
+stays flat as the number of channels grows.
+
+Run with ``python -m benchmarks.admission``.
+"""
+
+from __future__ import annotations
+from typing import Any
+
+from .fakes import FakeGuild, FakeMember, FakeVoiceChannel, FakeVoiceState, make_voice_cog
+
+import asyncio
+import time
+
+
+STREAM_LIMIT = 2
+EVENTS_PER_CHANNEL = 20
+CHANNEL_COUNTS = (1, 10, 100, 1000)
+ROUNDS = 3
+# The cost per channel is compared with the one at this many channels.
+# A single channel is too short to time reliably.
+BASELINE_CHANNELS = 10
+# Admission is linear if the cost per channel grows less than this many times.
+MAX_GROWTH = 3.0
+
+
+async def run(channel_count : int) -> dict[str, Any]:
+    from utils.model import ChannelInfo
+
+    cog = make_voice_cog()
+    kicked = 0
+    overshoots = 0
+
+    def _kick_from_channel(member, channel, max_streamer, received_at=None) -> bool:
+        nonlocal kicked, overshoots
+        kicked += 1
+        if len(cog.channel_info[channel.id].streamers) > max_streamer:
+            overshoots += 1
+        return True
+
+    cog._kick_from_channel = _kick_from_channel
+
+    events = []
+    for c in range(channel_count):
+        guild = FakeGuild(id=c % 64 + 1)
+        channel = FakeVoiceChannel(id=10_000 + c, guild=guild)
+        cog.channel_info.add(ChannelInfo(id=channel.id, guild_id=guild.id, stream_limit=STREAM_LIMIT))
+
+        for m in range(EVENTS_PER_CHANNEL):
+            member = FakeMember(id=(c + 1) * 1_000 + m, guild=guild)
+            before = FakeVoiceState(channel, self_stream=False)
+            after = FakeVoiceState(channel, self_stream=True)
+            events.append((member, before, after))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(cog.on_voice_state_update(*event) for event in events))
+    elapsed = time.perf_counter() - start
+
+    for info in cog.channel_info.values():
+        if len(info.streamers) > info.stream_limit:
+            overshoots += 1
+
+    expected_kicks = channel_count * max(0, EVENTS_PER_CHANNEL - STREAM_LIMIT)
+    return {
+        "channels": channel_count,
+        "events": len(events),
+        "seconds": elapsed,
+        "events_per_second": len(events) / elapsed,
+        "kicked": kicked,
+        "expected_kicks": expected_kicks,
+        "overshoots": overshoots,
+    }
+
+
+async def _best_of(channel_count : int) -> dict[str, Any]:
+    results = [await run(channel_count) for _ in range(ROUNDS)]
+    for result in results:
+        assert result["overshoots"] == 0, "stream limit overshoot detected"
+        assert result["kicked"] == result["expected_kicks"], "unexpected number of kicks"
+    return min(results, key=lambda result: result["seconds"])
+
+
+async def main() -> None:
+    results = [await _best_of(count) for count in CHANNEL_COUNTS]
+    baseline = next(r for r in results if r["channels"] == BASELINE_CHANNELS)
+    baseline_cost = baseline["seconds"] / baseline["channels"]
+
+    print(f"{'channels':>9} {'events':>8} {'events/s':>12} {'us/event':>9} {'growth':>7} {'kicked':>8} {'overshoots':>10}")
+    superlinear = []
+    for result in results:
+        us_per_event = result["seconds"] / result["events"] * 1e6
+        growth = result["seconds"] / result["channels"] / baseline_cost
+        if result["channels"] > BASELINE_CHANNELS and growth > MAX_GROWTH:
+            superlinear.append(result["channels"])
+
+        print(
+            f"{result['channels']:>9} {result['events']:>8} {result['events_per_second']:>12.0f} "
+            f"{us_per_event:>9.2f} {growth:>6.2f}x {result['kicked']:>8} {result['overshoots']:>10}"
+        )
+
+    assert not superlinear, (
+        f"cost per channel grew more than {MAX_GROWTH}x from {BASELINE_CHANNELS} channels at {superlinear} channels"
+    )
+    print(f"Linear : cost per channel stays within {MAX_GROWTH}x of {BASELINE_CHANNELS} channels")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
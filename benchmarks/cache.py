@@ -0,0 +1,67 @@
+"""Benchmarks of the ``utils.cache.cache`` decorator."""
+
+from __future__ import annotations
+
+from .harness import benchmark
+
+
+def _make_cached(maxsize : int = 128):
+    from utils.cache import cache
+
+    @cache(maxsize=maxsize)
+    async def get_guild_info(guild_id : int) -> int:
+        return guild_id
+
+    return get_guild_info
+
+
+@benchmark("cache.lru.hit")
+def bench_cache_hit():
+    func = _make_cached()
+
+    async def run():
+        await func(1)
+
+    return run
+
+
+@benchmark("cache.lru.miss")
+def bench_cache_miss():
+    func = _make_cached()
+    counter = iter(range(1 << 62))
+
+    async def run():
+        await func(next(counter))
+
+    return run
+
+
+@benchmark("cache.lru.invalidate_containing")
+def bench_invalidate_containing():
+    import asyncio
+
+    func = _make_cached(maxsize=128)
+    guild_ids = [(1 << 40) + i for i in range(128)]
+    target = str(guild_ids[64])
+
+    async def run():
+        for guild_id in guild_ids:
+            func(guild_id)
+        func.invalidate_containing(target)
+        await asyncio.sleep(0)
+
+    return run
+
+
+@benchmark("cache.expiring.get")
+def bench_expiring_get():
+    from utils.cache import ExpiringCache
+
+    cache = ExpiringCache(3600.0)
+    for i in range(10_000):
+        cache[i] = i
+
+    def run():
+        cache[5_000]
+
+    return run
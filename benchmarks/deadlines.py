@@ -0,0 +1,150 @@
+"""Benchmark of 50k concurrent conflict deadlines, with ``DeadlineScheduler`` and with a timeout task each.
+
+A timeout task per deadline is how a ``discord.ui.View`` with a timeout waits. For both,
+the benchmark schedules every deadline, extends and cancels a tenth of them, and waits
+until the rest fire. It reports the time of each step, the memory held while deadlines
+are pending, and how late deadlines fired.
+
+Run with ``python -m benchmarks.deadlines``.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import asyncio
+import gc
+import importlib
+import random
+import time
+import tracemalloc
+
+
+DEADLINES = 50_000
+# Deadlines are spread over this many seconds from now.
+SPREAD = 2.0
+EXTEND_BY = 0.5
+RESOLUTION = 0.05
+
+
+class _TaskTimers:
+    """A timeout task per key, the way a view waits for its own timeout."""
+
+    def __init__(self, handler : Callable[[int], Any]) -> None:
+        self.handler = handler
+        self.deadlines : dict[int, float] = {}
+        self.tasks : dict[int, asyncio.Task[None]] = {}
+
+    async def _wait(self, key : int, deadline : float) -> None:
+        await asyncio.sleep(deadline - time.time())
+        del self.tasks[key]
+        del self.deadlines[key]
+        await self.handler(key)
+
+    def schedule(self, key : int, deadline : float) -> None:
+        self.cancel(key)
+        self.deadlines[key] = deadline
+        self.tasks[key] = asyncio.create_task(self._wait(key, deadline))
+
+    def extend(self, key : int, seconds : float) -> None:
+        self.schedule(key, self.deadlines[key] + seconds)
+
+    def cancel(self, key : int) -> None:
+        task = self.tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+            del self.deadlines[key]
+
+    async def close(self) -> None:
+        pass
+
+
+def _make_scheduler(handler : Callable[[int], Any]) -> Any:
+    from utils.deadline import DeadlineScheduler
+
+    scheduler = DeadlineScheduler(handler, resolution=RESOLUTION, name="benchmark")
+    scheduler.start()
+    return scheduler
+
+
+async def _run(factory : Callable[[Callable[[int], Any]], Any]) -> dict[str, float]:
+    rng = random.Random(0)
+    offsets = [rng.uniform(SPREAD / 4, SPREAD) for _ in range(DEADLINES)]
+    keys = list(range(DEADLINES))
+    changed = rng.sample(keys, DEADLINES // 5)
+    extended, cancelled = changed[:DEADLINES // 10], changed[DEADLINES // 10:]
+
+    expected : dict[int, float] = {}
+    lateness : list[float] = []
+    done = asyncio.Event()
+
+    async def handler(key : int) -> None:
+        lateness.append(time.time() - expected[key])
+        if len(lateness) == len(expected):
+            done.set()
+
+    gc.collect()
+    tracemalloc.start()
+    timers = factory(handler)
+
+    start = time.perf_counter()
+    now = time.time()
+    for key, offset in zip(keys, offsets):
+        expected[key] = now + offset
+        timers.schedule(key, now + offset)
+    schedule_seconds = time.perf_counter() - start
+
+    # Every timer is created before the memory is read.
+    await asyncio.sleep(0)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for key in extended:
+        timers.extend(key, EXTEND_BY)
+        expected[key] += EXTEND_BY
+    for key in cancelled:
+        timers.cancel(key)
+        del expected[key]
+    change_seconds = time.perf_counter() - start
+
+    cpu = time.process_time()
+    await asyncio.wait_for(done.wait(), timeout=SPREAD + EXTEND_BY + 30)
+    cpu = time.process_time() - cpu
+    await timers.close()
+
+    lateness.sort()
+    return {
+        "schedule_ms": schedule_seconds * 1000,
+        "change_ms": change_seconds * 1000,
+        "memory_mib": memory / 2 ** 20,
+        "cpu_ms": cpu * 1000,
+        "early": sum(1 for late in lateness if late < 0),
+        "p50_ms": lateness[len(lateness) // 2] * 1000,
+        "p99_ms": lateness[int(len(lateness) * 0.99)] * 1000,
+        "max_ms": lateness[-1] * 1000,
+    }
+
+
+async def main() -> None:
+    # Imported before memory is traced.
+    importlib.import_module("utils.deadline")
+
+    results = {
+        "task per view": await _run(_TaskTimers),
+        "scheduler": await _run(_make_scheduler),
+    }
+
+    print(f"{DEADLINES} deadlines over {SPREAD}s, {DEADLINES // 10} extended and {DEADLINES // 10} cancelled, resolution {RESOLUTION}s")
+    print(
+        f"{'timers':<14} {'schedule ms':>12} {'change ms':>10} {'MiB':>7} {'fire cpu ms':>12} "
+        f"{'early':>6} {'late p50':>9} {'late p99':>9} {'late max':>9}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<14} {r['schedule_ms']:>12.1f} {r['change_ms']:>10.1f} {r['memory_mib']:>7.2f} {r['cpu_ms']:>12.1f} "
+            f"{r['early']:>6} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
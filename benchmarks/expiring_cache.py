@@ -0,0 +1,102 @@
+"""Benchmark of ``utils.cache.ExpiringCache`` at 10k, 100k and 1M entries.
+
+Times filling the cache, looking up live entries and expiring every entry at once.
+The former implementation, which scanned every entry on each lookup, is measured
+with fewer lookups for comparison, and skipped at 1M since a lookup takes too long.
+
+Run with ``python -m benchmarks.expiring_cache``.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import time
+
+
+SIZES = (10_000, 100_000, 1_000_000)
+LOOKUPS = 100_000
+LEGACY_LOOKUPS = 100
+LEGACY_MAX_SIZE = 100_000
+
+
+class _LegacyExpiringCache(dict):
+    """The former implementation, kept as the baseline."""
+
+    def __init__(self, seconds : float):
+        self.__ttl : float = seconds
+        super().__init__()
+
+    def __verify_cache_integrity(self):
+        current_time = time.monotonic()
+        to_remove = [k for (k, (v, t)) in super().items() if current_time > (t + self.__ttl)]
+        for k in to_remove:
+            del self[k]
+
+    def __contains__(self, key):
+        self.__verify_cache_integrity()
+        return super().__contains__(key)
+
+    def __getitem__(self, key):
+        self.__verify_cache_integrity()
+        v, _ = super().__getitem__(key)
+        return v
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, (value, time.monotonic()))
+
+
+def _timed(func : Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _run(make : Callable[[float], Any], size : int, lookups : int) -> dict[str, float]:
+    cache = make(3600.0)
+
+    def fill():
+        for i in range(size):
+            cache[i] = i
+
+    def lookup():
+        step = max(1, size // lookups)
+        for i in range(0, step * lookups, step):
+            cache[i % size]
+
+    fill_seconds = _timed(fill)
+    lookup_seconds = _timed(lookup)
+
+    # Every entry expires at once. The time to live outlasts filling, so nothing expires before.
+    ttl = fill_seconds * 2 + 0.1
+    expiring = make(ttl)
+    for i in range(size):
+        expiring[i] = i
+    time.sleep(ttl)
+    expire_seconds = _timed(lambda: 0 in expiring)
+    assert len(expiring) == 0
+
+    return {
+        "fill_ns": fill_seconds / size * 1e9,
+        "lookup_ns": lookup_seconds / lookups * 1e9,
+        "expire_ns": expire_seconds / size * 1e9,
+    }
+
+
+def main() -> None:
+    from utils.cache import ExpiringCache
+
+    print(f"{'impl':>7} {'entries':>9} {'set ns/op':>11} {'get ns/op':>13} {'expire ns/entry':>16}")
+    for size in SIZES:
+        rows = [("heap", _run(ExpiringCache, size, LOOKUPS))]
+        if size <= LEGACY_MAX_SIZE:
+            rows.append(("legacy", _run(_LegacyExpiringCache, size, LEGACY_LOOKUPS)))
+
+        for name, result in rows:
+            print(
+                f"{name:>7} {size:>9} {result['fill_ns']:>11.0f} "
+                f"{result['lookup_ns']:>13.0f} {result['expire_ns']:>16.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
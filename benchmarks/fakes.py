@@ -0,0 +1,114 @@
+"""Lightweight stand-ins for discord.py objects.
+
+These only carry the attributes that the code under benchmark reads,
+so no token, gateway connection or database is needed.
+"""
+
+from __future__ import annotations
+from typing import Any, Iterable, Optional
+
+import asyncio
+
+
+__all__ = (
+    "FakeGuild",
+    "FakeVoiceChannel",
+    "FakeVoiceState",
+    "FakeMember",
+    "FakeApp",
+    "make_voice_cog",
+)
+
+
+class FakeState:
+    __slots__ = ("self_id",)
+
+    def __init__(self, self_id : int = 0) -> None:
+        self.self_id = self_id
+
+
+class FakeGuild:
+    __slots__ = ("id", "voice_channels", "roles", "_state", "_members", "_voice_states")
+
+    def __init__(self, id : int) -> None:
+        self.id = id
+        self.voice_channels : list[FakeVoiceChannel] = []
+        self.roles : list[Any] = []
+        self._state = FakeState()
+        self._members : dict[int, FakeMember] = {}
+        self._voice_states : dict[int, FakeVoiceState] = {}
+
+    def get_role(self, role_id : int) -> None:
+        return None
+
+    def get_member(self, user_id : int) -> Optional[FakeMember]:
+        return self._members.get(user_id)
+
+    def _remove_member(self, member : FakeMember) -> None:
+        self._members.pop(member.id, None)
+
+
+class FakeVoiceChannel:
+    __slots__ = ("id", "guild", "members")
+
+    def __init__(self, id : int, guild : FakeGuild) -> None:
+        self.id = id
+        self.guild = guild
+        self.members : list[FakeMember] = []
+        guild.voice_channels.append(self)
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+
+class FakeVoiceState:
+    __slots__ = ("channel", "self_stream")
+
+    def __init__(self, channel : Optional[FakeVoiceChannel] = None, self_stream : bool = False) -> None:
+        self.channel = channel
+        self.self_stream = self_stream
+
+
+class FakeMember:
+    __slots__ = ("id", "guild", "bot", "voice")
+
+    def __init__(self, id : int, guild : FakeGuild, *, bot : bool = False) -> None:
+        self.id = id
+        self.guild = guild
+        self.bot = bot
+        self.voice : Optional[FakeVoiceState] = None
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    async def edit(self, **kwargs : Any) -> None:
+        await asyncio.sleep(0)
+
+
+class FakeApp:
+    """Only what ``Voice.__init__`` and its loops touch."""
+
+    def __init__(self, guilds : Iterable[FakeGuild] = ()) -> None:
+        self.guilds = list(guilds)
+        self.pool = None
+        self._never = asyncio.Event()
+
+    def get_guild(self, guild_id : int) -> Optional[FakeGuild]:
+        return next((guild for guild in self.guilds if guild.id == guild_id), None)
+
+    async def wait_until_ready(self) -> None:
+        await self._never.wait()
+
+
+def make_voice_cog(app : Optional[FakeApp] = None):
+    """Builds a ``Voice`` cog that is already initialized and has no background loops."""
+    from cogs.voice import Voice
+
+    cog = Voice(app or FakeApp())
+    cog.cleanup_left_guilds.cancel()
+    cog._get_unhandled_channels.cancel()
+    cog._write_snapshot.cancel()
+    cog._loaded = True
+    return cog
@@ -0,0 +1,118 @@
+"""A tiny timing harness shared by the micro-benchmarks.
+
+Each benchmark is a setup function that returns the callable to be timed.
+The callable may be a coroutine function, then it's timed inside a running loop.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Union
+
+import asyncio
+import gc
+import inspect
+import statistics
+import time
+
+
+__all__ = (
+    "Benchmark",
+    "BenchmarkResult",
+    "benchmark",
+    "registry",
+    "run_benchmark",
+)
+
+Timed = Callable[[], Union[Any, Awaitable[Any]]]
+Setup = Callable[[], Timed]
+
+
+@dataclass
+class Benchmark:
+    name : str
+    setup : Setup
+    ops_per_call : int = 1
+
+
+@dataclass
+class BenchmarkResult:
+    name : str
+    ns_per_op : float
+    median_ns_per_op : float
+    loops : int
+    rounds : int
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+registry : dict[str, Benchmark] = {}
+
+
+def benchmark(name : str, *, ops_per_call : int = 1) -> Callable[[Setup], Setup]:
+    """Registers a setup function as a benchmark.
+
+    :param name: The unique name of the benchmark. It's used as the key of baselines.
+    :param ops_per_call: How many operations a single call of the timed callable does.
+    """
+    def decorator(func : Setup) -> Setup:
+        if name in registry:
+            raise ValueError(f"Benchmark {name!r} is already registered")
+
+        registry[name] = Benchmark(name=name, setup=func, ops_per_call=ops_per_call)
+        return func
+
+    return decorator
+
+
+async def _time_loops(func : Timed, loops : int) -> float:
+    is_async = inspect.iscoroutinefunction(func)
+    start = time.perf_counter_ns()
+
+    if is_async:
+        for _ in range(loops):
+            await func()
+    else:
+        for _ in range(loops):
+            func()
+
+    return time.perf_counter_ns() - start
+
+
+async def _autorange(func : Timed, target_ns : int) -> int:
+    loops = 1
+    while True:
+        elapsed = await _time_loops(func, loops)
+        if elapsed >= target_ns or loops >= 1 << 24:
+            return loops
+        loops *= 2
+
+
+async def run_benchmark(bench : Benchmark, *, rounds : int = 5, target_ms : float = 100.0) -> BenchmarkResult:
+    func = bench.setup()
+    loops = await _autorange(func, int(target_ms * 1e6))
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            elapsed = await _time_loops(func, loops)
+            samples.append(elapsed / (loops * bench.ops_per_call))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    # Pending tasks of the benchmark (e.g. cached tasks) must not leak into the next one.
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            task.cancel()
+    await asyncio.sleep(0)
+
+    return BenchmarkResult(
+        name=bench.name,
+        ns_per_op=min(samples),
+        median_ns_per_op=statistics.median(samples),
+        loops=loops,
+        rounds=rounds,
+    )
@@ -0,0 +1,79 @@
+"""Benchmarks of the voice state hot path."""
+
+from __future__ import annotations
+
+from .fakes import FakeGuild, FakeMember, FakeVoiceChannel, FakeVoiceState, make_voice_cog
+from .harness import benchmark
+
+
+@benchmark("util.get_stream_status", ops_per_call=5)
+def bench_get_stream_status():
+    from utils.util import get_stream_status
+
+    guild = FakeGuild(id=1)
+    a = FakeVoiceChannel(id=10, guild=guild)
+    b = FakeVoiceChannel(id=11, guild=guild)
+
+    # join, leave, go live, stop live, move while live
+    cases = (
+        (FakeVoiceState(None), FakeVoiceState(a)),
+        (FakeVoiceState(a), FakeVoiceState(None)),
+        (FakeVoiceState(a), FakeVoiceState(a, self_stream=True)),
+        (FakeVoiceState(a, self_stream=True), FakeVoiceState(a)),
+        (FakeVoiceState(a, self_stream=True), FakeVoiceState(b, self_stream=True)),
+    )
+
+    def run():
+        for before, after in cases:
+            get_stream_status(before, after)
+
+    return run
+
+
+def _make_listener_case(stream_limit : int):
+    from utils.model import ChannelInfo
+
+    cog = make_voice_cog()
+    # REST calls are stubbed. Only the decision is measured.
+    cog._kick_from_channel = lambda *args: True
+
+    guild = FakeGuild(id=1)
+    channel = FakeVoiceChannel(id=10, guild=guild)
+    cog.channel_info.add(ChannelInfo(id=channel.id, guild_id=guild.id, stream_limit=stream_limit))
+
+    member = FakeMember(id=1_000, guild=guild)
+    idle = FakeVoiceState(channel)
+    live = FakeVoiceState(channel, self_stream=True)
+    return cog, member, idle, live
+
+
+@benchmark("voice.on_voice_state_update.toggle", ops_per_call=2)
+def bench_on_voice_state_update_toggle():
+    cog, member, idle, live = _make_listener_case(stream_limit=1)
+
+    async def run():
+        await cog.on_voice_state_update(member, idle, live)
+        await cog.on_voice_state_update(member, live, idle)
+
+    return run
+
+
+@benchmark("voice.on_voice_state_update.rejected")
+def bench_on_voice_state_update_rejected():
+    cog, member, idle, live = _make_listener_case(stream_limit=0)
+
+    async def run():
+        await cog.on_voice_state_update(member, idle, live)
+
+    return run
+
+
+@benchmark("voice.on_voice_state_update.unwatched")
+def bench_on_voice_state_update_unwatched():
+    cog, member, idle, live = _make_listener_case(stream_limit=1)
+    cog.channel_info.remove_guild(1)
+
+    async def run():
+        await cog.on_voice_state_update(member, idle, live)
+
+    return run
@@ -0,0 +1,145 @@
+"""Memory benchmark of the member and voice state cache of a bot in 10k guilds, 1% of them watched.
+
+Builds guilds from gateway payloads with discord.py, as a GUILD_CREATE would, and reports
+the traced allocation of the default voice cache and of ``WatchedMemberCache``.
+
+Run with ``python -m benchmarks.member_cache``.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import gc
+import tracemalloc
+
+
+GUILDS = 10_000
+WATCHED_EVERY = 100
+VOICE_CHANNELS = 5
+# Members in voice per guild, most guilds are small.
+VOICE_MEMBERS = (2, 4, 8, 16, 40)
+JOINED_AT = "2024-01-01T00:00:00.000000+00:00"
+SELF_ID = 1
+
+
+def make_state(dispatch : Callable[..., Any] = lambda *args: None) -> Any:
+    import discord
+    from discord.state import ConnectionState
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.voice_states = True
+
+    state = ConnectionState(dispatch=dispatch, handlers={}, hooks={}, http=None, intents=intents)
+    # The parser of voice events compares user ids with the bot's own.
+    state.user = discord.ClientUser(state=state, data={
+        "id": str(SELF_ID), "username": "guardian", "discriminator": "0", "avatar": None, "global_name": None, "bot": True,
+    })
+    return state
+
+
+def member_payload(user_id : int) -> dict[str, Any]:
+    return {
+        "user": {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None},
+        "roles": [],
+        "joined_at": JOINED_AT,
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def guild_payload(guild_id : int) -> dict[str, Any]:
+    channel_ids = [guild_id * 100 + i for i in range(VOICE_CHANNELS)]
+    channels = [
+        {"id": str(channel_id), "type": 2, "name": f"voice-{i}", "position": i, "permission_overwrites": [],
+         "bitrate": 64000, "user_limit": 0, "parent_id": None}
+        for i, channel_id in enumerate(channel_ids)
+    ]
+
+    voice_states = []
+    members = []
+    for i in range(VOICE_MEMBERS[guild_id % len(VOICE_MEMBERS)]):
+        user_id = guild_id * 10_000 + i
+        member = member_payload(user_id)
+        members.append(member)
+        voice_states.append({
+            "user_id": str(user_id),
+            "channel_id": str(channel_ids[i % VOICE_CHANNELS]),
+            "session_id": f"{user_id:032x}",
+            "deaf": False, "mute": False, "self_deaf": False, "self_mute": False,
+            "self_video": False, "self_stream": i % 3 == 0, "suppress": False,
+            "request_to_speak_timestamp": None,
+        })
+
+    return {
+        "id": str(guild_id),
+        "name": f"guild{guild_id}",
+        "owner_id": "1",
+        "roles": [],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "member_count": len(members),
+        "channels": channels,
+        "voice_states": voice_states,
+        "members": members,
+    }
+
+
+def _build(state : Any) -> list[Any]:
+    import discord
+    return [discord.Guild(data=guild_payload(guild_id), state=state) for guild_id in range(1, GUILDS + 1)]
+
+
+def _watch(guilds : list[Any]) -> Any:
+    from utils.model import ChannelInfo
+    from utils.registry import ChannelRegistry
+
+    registry = ChannelRegistry()
+    for guild in guilds[::WATCHED_EVERY]:
+        channel = guild.voice_channels[0]
+        registry.add(ChannelInfo(id=channel.id, guild_id=guild.id, stream_limit=1))
+    return registry
+
+
+def _count(guilds : list[Any]) -> tuple[int, int]:
+    members = sum(len(guild._members) for guild in guilds)
+    voice_states = sum(len(guild._voice_states) for guild in guilds)
+    return members, voice_states
+
+
+def main() -> None:
+    from utils.membercache import WatchedMemberCache
+
+    state = make_state()
+    rows = []
+
+    for name in ("default", "watched-only"):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            guilds = _build(state)
+            registry = _watch(guilds)
+            if name == "watched-only":
+                policy = WatchedMemberCache(registry)
+                for guild in guilds:
+                    policy.trim(guild)
+
+            gc.collect()
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        rows.append((name, size, *_count(guilds)))
+        del guilds, registry
+        state.clear()
+
+    print(f"{GUILDS} guilds, 1 in {WATCHED_EVERY} watched")
+    print(f"{'cache':<14} {'total MiB':>10} {'members':>9} {'voice states':>13} {'bytes/guild':>12}")
+    for name, size, members, voice_states in rows:
+        print(f"{name:<14} {size / 2 ** 20:>10.2f} {members:>9} {voice_states:>13} {size / GUILDS:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmarks of the model layer and the setup reconciliation."""
+
+from __future__ import annotations
+
+from .harness import benchmark
+
+import copy
+
+
+def _mongo_payload(channel_count : int) -> dict:
+    return {
+        "id": 1 << 40,
+        "watch": True,
+        "channels": {str((1 << 41) + i): 1 for i in range(channel_count)},
+        "stream_limit": 1,
+        "channel_limit": 5,
+    }
+
+
+@benchmark("model.GoLiveGuildSetup.from_mongo")
+def bench_from_mongo():
+    from utils.model import GoLiveGuildSetup
+
+    payload = _mongo_payload(5)
+
+    def run():
+        # from_mongo mutates its payload
+        GoLiveGuildSetup.from_mongo(copy.copy(payload))
+
+    return run
+
+
+@benchmark("model.GoLiveGuildSetup.transform_to_mongo")
+def bench_transform_to_mongo():
+    from utils.model import GoLiveGuildSetup
+
+    setup = GoLiveGuildSetup.from_mongo(_mongo_payload(5))
+
+    def run():
+        setup.transform_to_mongo()
+
+    return run
+
+
+@benchmark("db.determine_valid_channels")
+def bench_determine_valid_channels():
+    from utils.db import determine_valid_channels
+
+    actual = tuple(range(0, 50))
+    stored = tuple(range(40, 60))
+
+    def run():
+        determine_valid_channels(actual_vc_ids=actual, db_vc_ids=stored)
+
+    return run
@@ -0,0 +1,85 @@
+"""Memory benchmark of the per-channel streamer registry.
+
+Tracks streamers of 100k channels with ``StreamerRegistry`` and with the former
+``set[StreamerInfo]``, and reports the traced allocation of each.
+
+Run with ``python -m benchmarks.streamer_memory``.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import gc
+import importlib
+import time
+import tracemalloc
+
+
+CHANNELS = 100_000
+# Most watched channels are idle, some have a streamer or two.
+STREAMERS_PER_CHANNEL = (0, 0, 0, 1, 1, 2)
+
+
+def _measure(build : Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        kept = build()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del kept
+    return after - before
+
+
+def _streamers(channel : int) -> range:
+    count = STREAMERS_PER_CHANNEL[channel % len(STREAMERS_PER_CHANNEL)]
+    base = (channel + 1) << 24
+    return range(base, base + count)
+
+
+def build_registries() -> list[Any]:
+    from utils.model import StreamerRegistry
+
+    now = time.time()
+    registries = []
+    for channel in range(CHANNELS):
+        registry = StreamerRegistry()
+        for streamer_id in _streamers(channel):
+            registry.add(streamer_id, now)
+        registries.append(registry)
+    return registries
+
+
+def build_sets() -> list[Any]:
+    from discord.utils import utcnow
+    from utils.model import StreamerInfo
+
+    now = utcnow()
+    sets = []
+    for channel in range(CHANNELS):
+        streamers = set()
+        for streamer_id in _streamers(channel):
+            streamers.add(StreamerInfo(id=streamer_id, started_at=now))
+        sets.append(streamers)
+    return sets
+
+
+def main() -> None:
+    # Imported before memory is traced.
+    importlib.import_module("utils.model")
+
+    results = {
+        "StreamerRegistry": _measure(build_registries),
+        "set[StreamerInfo]": _measure(build_sets),
+    }
+
+    print(f"{'container':<20} {'total MiB':>10} {'bytes/channel':>14}")
+    for name, size in results.items():
+        print(f"{name:<20} {size / 2 ** 20:>10.2f} {size / CHANNELS:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""CPU benchmark of VOICE_STATE_UPDATE handling, with and without ``VoiceStateFilter``.
+
+Feeds 10k raw payloads of 1k guilds, 1% of them watched, to discord.py's parser,
+and runs the voice cog's listener for every dispatched event. Reports CPU time per
+10k events.
+
+Run with ``python -m benchmarks.voice_filter``.
+"""
+
+from __future__ import annotations
+from typing import Any
+
+from .fakes import FakeApp, make_voice_cog
+from .member_cache import guild_payload, make_state, VOICE_CHANNELS
+
+import asyncio
+import random
+import time
+
+
+GUILDS = 1_000
+WATCHED_EVERY = 100
+EVENTS = 10_000
+ROUNDS = 5
+
+
+def _make_events() -> list[dict[str, Any]]:
+    rng = random.Random(0)
+    events = []
+    for _ in range(EVENTS):
+        guild_id = rng.randint(1, GUILDS)
+        user_id = guild_id * 10_000 + rng.randrange(50)
+        channel_id = guild_id * 100 + rng.randrange(VOICE_CHANNELS)
+        events.append({
+            "guild_id": str(guild_id),
+            "user_id": str(user_id),
+            "channel_id": None if rng.random() < 0.2 else str(channel_id),
+            "session_id": f"{user_id:032x}",
+            "deaf": False, "mute": False, "self_deaf": False, "self_mute": rng.random() < 0.5,
+            "self_video": False, "self_stream": rng.random() < 0.3, "suppress": False,
+            "request_to_speak_timestamp": None,
+            "member": {
+                "user": {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None},
+                "roles": [],
+                "joined_at": "2024-01-01T00:00:00.000000+00:00",
+                "deaf": False,
+                "mute": False,
+                "flags": 0,
+            },
+        })
+    return events
+
+
+def _run_listener(coro : Any) -> None:
+    # The listener never suspends in this benchmark, so it's driven without the event loop.
+    try:
+        coro.send(None)
+    except StopIteration:
+        pass
+    else:
+        coro.close()
+
+
+def _setup(filtered : bool) -> tuple[Any, Any]:
+    import discord
+    from utils.model import ChannelInfo
+
+    cog = None
+
+    def dispatch(event : str, *args : Any) -> None:
+        if event == "voice_state_update":
+            _run_listener(cog.on_voice_state_update(*args))
+
+    state = make_state(dispatch)
+    guilds = []
+    for guild_id in range(1, GUILDS + 1):
+        guild = discord.Guild(data=guild_payload(guild_id), state=state)
+        state._add_guild(guild)
+        guilds.append(guild)
+
+    cog = make_voice_cog(FakeApp(guilds))
+    # REST calls are stubbed. Only the decision is measured.
+    cog._kick_from_channel = lambda *args: True
+
+    for guild in guilds[::WATCHED_EVERY]:
+        channel = guild.voice_channels[0]
+        cog.channel_info.add(ChannelInfo(id=channel.id, guild_id=guild.id, stream_limit=1))
+
+    cog._trim_member_cache(guilds)
+    if filtered:
+        cog.voice_filter.install(state)
+        cog.voice_filter.active = True
+
+    return cog, state.parsers["VOICE_STATE_UPDATE"]
+
+
+async def main() -> None:
+    events = _make_events()
+    results = {}
+
+    for name, filtered in (("unfiltered", False), ("filtered", True)):
+        cog, parse = _setup(filtered)
+
+        best = float("inf")
+        for _ in range(ROUNDS):
+            start = time.process_time()
+            for payload in events:
+                parse(payload)
+            best = min(best, time.process_time() - start)
+
+        results[name] = best
+        if filtered:
+            print(f"dropped {cog.voice_filter.dropped} of {cog.voice_filter.dropped + cog.voice_filter.passed} payloads")
+
+    print(f"{GUILDS} guilds, 1 in {WATCHED_EVERY} watched, {EVENTS} events")
+    print(f"{'parser':<12} {'ms/10k events':>14} {'us/event':>10}")
+    for name, seconds in results.items():
+        print(f"{name:<12} {seconds * 1000 * 10_000 / EVENTS:>14.1f} {seconds * 1e6 / EVENTS:>10.2f}")
+
+    saved = results["unfiltered"] - results["filtered"]
+    print(f"CPU saved per 10k events : {saved * 1000 * 10_000 / EVENTS:.1f}ms ({saved / results['unfiltered']:.0%})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
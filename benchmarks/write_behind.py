@@ -0,0 +1,127 @@
+"""Benchmark of guild setup writes, one round trip per write vs write-behind batches.
+
+Every save is awaited by its caller, as ``StreamConfig.save`` does. Runs against a
+local mongod with ``--uri``, or against mongomock (``pip install mongomock-motor``)
+otherwise. ``--rtt`` adds a delay to every round trip, since mongomock has none.
+
+Run with ``python -m benchmarks.write_behind [--uri mongodb://localhost:27017] [--rtt 0.002]``.
+"""
+
+from __future__ import annotations
+from typing import Any
+
+import argparse
+import asyncio
+import random
+import time
+
+
+GUILDS = 500
+WRITES = 5_000
+
+
+class _LatencyCollection:
+    """Adds a delay to every round trip of a collection."""
+
+    def __init__(self, collection : Any, rtt : float) -> None:
+        self.collection = collection
+        self.rtt = rtt
+        self.round_trips = 0
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+
+    async def update_one(self, *args : Any, **kwargs : Any) -> Any:
+        await self._round_trip()
+        return await self.collection.update_one(*args, **kwargs)
+
+    async def bulk_write(self, *args : Any, **kwargs : Any) -> Any:
+        await self._round_trip()
+        return await self.collection.bulk_write(*args, **kwargs)
+
+
+def _get_collection(uri : str | None) -> Any:
+    if uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(uri)["golive_benchmark"]["guild"]
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("Either pass --uri of a local mongod or install mongomock-motor.")
+
+    return AsyncMongoMockClient()["golive_benchmark"]["guild"]
+
+
+def _make_workload() -> list[tuple[int, dict[str, Any]]]:
+    rng = random.Random(0)
+    workload = []
+    for i in range(WRITES):
+        guild_id = rng.randrange(GUILDS)
+        channels = {str(rng.randrange(1 << 40)) : 1 for _ in range(rng.randint(1, 5))}
+        workload.append((guild_id, {"watch" : True, "channels" : channels, "stream_limit" : 1, "channel_limit" : 5, "revision" : i}))
+    return workload
+
+
+async def _per_write(collection : _LatencyCollection, workload : list[tuple[int, dict[str, Any]]]) -> None:
+    async def save(guild_id : int, payload : dict[str, Any]) -> bool:
+        result = await collection.update_one({"id" : guild_id}, {"$set" : payload}, upsert=True)
+        return result.acknowledged
+
+    results = await asyncio.gather(*(save(*write) for write in workload))
+    assert all(results)
+
+
+async def _write_behind(collection : _LatencyCollection, workload : list[tuple[int, dict[str, Any]]]) -> None:
+    from utils.storage.mongo import to_mongo_operation
+    from utils.writebehind import GuildWrite, WriteBehindBuffer
+
+    async def writer(writes : dict[int, GuildWrite]) -> dict[int, BaseException]:
+        await collection.bulk_write([to_mongo_operation(w) for w in writes.values()], ordered=False)
+        return {}
+
+    buffer = WriteBehindBuffer(writer, window=0.01)
+    futures = [buffer.submit(GuildWrite(guild_id, set_fields=payload, upsert=True)) for guild_id, payload in workload]
+    results = await asyncio.gather(*futures)
+    await buffer.close()
+    assert all(results)
+
+
+async def _check_latest(collection : Any, workload : list[tuple[int, dict[str, Any]]]) -> None:
+    latest = {guild_id : payload["revision"] for guild_id, payload in workload}
+    async for doc in collection.find({}, {"_id" : 0, "id" : 1, "revision" : 1}):
+        assert latest[doc["id"]] == doc["revision"], f"guild {doc['id']} lost its latest write"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=None, help="A local mongod to write to. Its benchmark collection is emptied.")
+    parser.add_argument("--rtt", type=float, default=0.0, help="Seconds added to every round trip.")
+    args = parser.parse_args()
+
+    workload = _make_workload()
+    raw = _get_collection(args.uri)
+
+    print(f"{GUILDS} guilds, {WRITES} writes, rtt={args.rtt * 1000:.1f}ms")
+    print(f"{'mode':>12} {'round trips':>12} {'seconds':>9} {'writes/s':>10}")
+
+    for name, func in (("per-write", _per_write), ("write-behind", _write_behind)):
+        await raw.delete_many({})
+        collection = _LatencyCollection(raw, args.rtt)
+
+        start = time.perf_counter()
+        await func(collection, workload)
+        elapsed = time.perf_counter() - start
+
+        if func is _write_behind:
+            # Concurrent per-write saves of a guild may land in any order, so only batches are checked.
+            await _check_latest(raw, workload)
+        print(f"{name:>12} {collection.round_trips:>12} {elapsed:>9.3f} {WRITES / elapsed:>10.0f}")
+
+    await raw.delete_many({})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
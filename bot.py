@@ -1,14 +1,19 @@
 from __future__ import annotations
 from cogs.voice import Voice
 from discord.ext import commands
-from typing import Optional, Tuple
-from utils.streamer import ViewCloseDynamicButton, StreamerView
-from utils.db import MongoClient
+from typing import Any, Iterable, Optional, Tuple
+from utils.streamer import ViewCloseDynamicButton, StreamDetailsDynamicButton
+from utils.db import GuildStorage
+from utils.metrics import MetricsServer
+from utils.tracing import tracer
 
 import asyncio
 import config
 import discord
 import logging
+import os
+import queue
+import time
 
 
 _extensions = (
@@ -17,17 +22,19 @@ _extensions = (
     "cogs.error"
 )
 
-_views : Tuple[type[discord.ui.View]] = (
-    StreamerView,
-)
+# Warnings are built on dynamic items, so no persistent view is registered for them.
+_views : Tuple[type[discord.ui.View], ...] = ()
 
 _log = logging.getLogger(__name__)
 
+# Seconds between two health reports of a cluster worker.
+HEALTH_REPORT_INTERVAL = 15.0
+
 
-class GoLiveGuardian(commands.Bot):
-    pool : MongoClient
+class _GoLiveGuardianBase:
+    pool : GuildStorage
 
-    def __init__(self):
+    def __init__(self, **options : Any):
         intents = discord.Intents.none()
         intents.guilds = True
         intents.voice_states = True
@@ -37,11 +44,26 @@ class GoLiveGuardian(commands.Bot):
             intents=intents,
             heartbeat_timeout=240.0,
             chunk_guild_at_startup=False,
-            status=discord.Status.online
+            status=discord.Status.online,
+            **options
         )
         
-        self.pool : Optional[MongoClient] = None
+        self.pool : Optional[GuildStorage] = None
         self.is_closing : bool = False
+
+        # Where the voice cog persists streamers and conflicts across restarts.
+        self.snapshot_path : str = "session.snapshot"
+
+        self.metrics_server : Optional[MetricsServer] = None
+        if config.metrics_port:
+            self.metrics_server = MetricsServer(host=config.metrics_host, port=config.metrics_port)
+
+        tracer.configure(
+            sample_rate=config.trace_sample_rate,
+            slow_threshold=config.trace_slow_threshold,
+            path=config.trace_path,
+        )
+
         
     async def on_ready(self) -> None:
         _log.info('Logged in as {0.user}'.format(self))
@@ -62,9 +84,15 @@ class GoLiveGuardian(commands.Bot):
                 _log.warning(f'Failed to load extension {extension}', exc_info=e)
 
         self.add_views()
-        self.add_dynamic_items(ViewCloseDynamicButton, )
+        self.add_dynamic_items(ViewCloseDynamicButton, StreamDetailsDynamicButton)
         # await self.tree.sync()
 
+        if self.metrics_server is not None:
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                _log.warning("Failed to start the metrics server", exc_info=e)
+
     async def start(self):
         await super().start(config.bot_token, reconnect=True)
 
@@ -76,6 +104,7 @@ class GoLiveGuardian(commands.Bot):
         self.is_closing = True
         _log.info("Shutting Down...")
         
+        # The voice cog writes the final snapshot when it's unloaded.
         await super().close()
 
         if bot_tasks := [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]:
@@ -87,14 +116,18 @@ class GoLiveGuardian(commands.Bot):
             await asyncio.gather(*bot_tasks, return_exceptions=True)
             _log.debug('All Existing tasks cancelled.')
         
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+
         try:
-            _log.info("Shutting down Mongo Client.")
+            _log.info("Shutting down the storage.")
             await self.pool.close()
-            _log.info("Mongo Client Shut down complete.")
+            _log.info("Storage shut down complete.")
 
         except Exception as e:
-            _log.critical("Failed to gracefully shutdown Mongo Client", exc_info=e)
+            _log.critical("Failed to gracefully shutdown the storage", exc_info=e)
 
+        tracer.flush()
         _log.info('All Shutdown Complete.')
     
     @property
@@ -103,4 +136,66 @@ class GoLiveGuardian(commands.Bot):
 
     @property
     def config(self):
-        return __import__('config')
\ No newline at end of file
+        return __import__('config')
+
+
+class GoLiveGuardian(_GoLiveGuardianBase, commands.Bot):
+    pass
+
+
+class ShardedGoLiveGuardian(_GoLiveGuardianBase, commands.AutoShardedBot):
+    """A cluster worker's bot, which runs only the shards assigned to the cluster.
+
+    :param cluster_id: The id of the cluster this bot belongs to.
+    :param shard_ids: The shards this bot runs.
+    :param shard_count: The total number of shards across every cluster.
+    :param health_queue: A queue where health reports are put for the supervisor.
+    """
+
+    def __init__(
+        self,
+        *,
+        cluster_id : int,
+        shard_ids : Iterable[int],
+        shard_count : int,
+        health_queue : Optional[queue.Queue] = None,
+    ):
+        super().__init__(shard_ids=list(shard_ids), shard_count=shard_count)
+        self.cluster_id = cluster_id
+        self.snapshot_path = f"session.{cluster_id}.snapshot"
+        if self.metrics_server is not None:
+            self.metrics_server.port += cluster_id
+
+        root, ext = os.path.splitext(tracer.path)
+        tracer.configure(path=f"{root}.{cluster_id}{ext}")
+        self.health_queue = health_queue
+        self._health_task : Optional[asyncio.Task[None]] = None
+
+    async def setup_hook(self) -> None:
+        await super().setup_hook()
+
+        if self.health_queue is not None:
+            self._health_task = asyncio.create_task(self._report_health(), name="golive-health-report")
+
+    def get_health(self) -> dict[str, Any]:
+        return {
+            "cluster_id": self.cluster_id,
+            "pid": os.getpid(),
+            "time": time.time(),
+            "ready": self.is_ready(),
+            "guilds": len(self.guilds),
+            "latency": self.latency,
+            "shards": {
+                shard_id: {"latency": shard.latency, "closed": shard.is_closed()}
+                for shard_id, shard in self.shards.items()
+            },
+        }
+
+    async def _report_health(self) -> None:
+        while not self.is_closed():
+            try:
+                self.health_queue.put_nowait(self.get_health())
+            except queue.Full:
+                pass
+
+            await asyncio.sleep(HEALTH_REPORT_INTERVAL)
\ No newline at end of file
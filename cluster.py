@@ -0,0 +1,270 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+
+__all__ = (
+    "Supervisor",
+    "split_shards",
+    "run_worker",
+)
+
+_log = logging.getLogger(__name__)
+
+
+def split_shards(shard_count : int, clusters : int) -> list[list[int]]:
+    """Splits shards into contiguous ranges, one for each cluster."""
+    if not 0 < clusters <= shard_count:
+        raise ValueError(f"clusters must be between 1 and {shard_count}")
+
+    size, remainder = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+
+    for cluster_id in range(clusters):
+        end = start + size + (1 if cluster_id < remainder else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+
+    return ranges
+
+
+class _ClusterFilter(logging.Filter):
+    """Tags every record of a worker with its cluster before it's sent to the supervisor."""
+
+    def __init__(self, cluster_id : int):
+        super().__init__()
+        self.prefix = f"[Cluster {cluster_id}] "
+
+    def filter(self, record : logging.LogRecord) -> bool:
+        record.msg = self.prefix + record.getMessage()
+        record.args = None
+        return True
+
+
+def run_worker(
+    cluster_id : int,
+    shard_ids : list[int],
+    shard_count : int,
+    log_queue : multiprocessing.Queue,
+    health_queue : multiprocessing.Queue,
+) -> None:
+    """The entry point of a worker process."""
+    # Imported here since the launcher imports this module.
+    from bot import ShardedGoLiveGuardian
+    from functools import partial
+    from launcher import RemoveNoise, loop_factory, start
+
+    import asyncio
+
+    log = logging.getLogger()
+    for handler in log.handlers[:]:
+        log.removeHandler(handler)
+
+    handler = QueueHandler(log_queue)
+    handler.addFilter(_ClusterFilter(cluster_id))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+    logging.getLogger('discord').setLevel(logging.INFO)
+    logging.getLogger('discord.http').setLevel(logging.WARNING)
+    logging.getLogger('discord.state').addFilter(RemoveNoise())
+
+    bot_factory = partial(
+        ShardedGoLiveGuardian,
+        cluster_id=cluster_id,
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+        health_queue=health_queue,
+    )
+
+    try:
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(start(bot_factory, shard_ids=shard_ids, shard_count=shard_count))
+    except KeyboardInterrupt:
+        pass
+
+
+@dataclass
+class _Worker:
+    cluster_id : int
+    shard_ids : list[int]
+    process : Optional[multiprocessing.process.BaseProcess] = None
+    started_at : float = 0.0
+    restarts : int = 0
+    restart_at : Optional[float] = None
+    health : dict[str, Any] = field(default_factory=dict)
+    last_report : float = 0.0
+
+
+class Supervisor:
+    """Runs clusters of shards in worker processes.
+
+    Logs of the workers are written by the handlers of this process, and their health
+    reports are collected and logged periodically. A worker that exits or stops
+    reporting is restarted with exponential backoff.
+
+    :param clusters: The number of worker processes.
+    :param shard_count: The total number of shards, split across the clusters.
+    :param restart_delay: The delay before restarting a worker for the first time.
+    :param max_restart_delay: The upper bound of a restart delay.
+    :param heartbeat_timeout: A worker that doesn't report for this long is restarted.
+    :param stable_after: A worker that ran this long is restarted without any delay accumulated.
+    """
+
+    def __init__(
+        self,
+        *,
+        clusters : int,
+        shard_count : int,
+        restart_delay : float = 5.0,
+        max_restart_delay : float = 300.0,
+        heartbeat_timeout : float = 300.0,
+        stable_after : float = 600.0,
+        summary_interval : float = 60.0,
+    ):
+        self.shard_count = shard_count
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.heartbeat_timeout = heartbeat_timeout
+        self.stable_after = stable_after
+        self.summary_interval = summary_interval
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._log_queue = self._ctx.Queue()
+        self._health_queue = self._ctx.Queue(maxsize=1024)
+        self._closing = False
+
+        self.workers : dict[int, _Worker] = {
+            cluster_id : _Worker(cluster_id=cluster_id, shard_ids=shard_ids)
+            for cluster_id, shard_ids in enumerate(split_shards(shard_count, clusters))
+        }
+
+    def _spawn(self, worker : _Worker) -> None:
+        process = self._ctx.Process(
+            target=run_worker,
+            args=(worker.cluster_id, worker.shard_ids, self.shard_count, self._log_queue, self._health_queue),
+            name=f"golive-cluster-{worker.cluster_id}",
+        )
+        process.start()
+
+        worker.process = process
+        worker.started_at = worker.last_report = time.monotonic()
+        worker.restart_at = None
+        _log.info("[CLUSTER] Started cluster %d (pid %d) with shards %s", worker.cluster_id, process.pid, worker.shard_ids)
+
+    def _schedule_restart(self, worker : _Worker, now : float) -> None:
+        if now - worker.started_at >= self.stable_after:
+            worker.restarts = 0
+
+        delay = min(self.max_restart_delay, self.restart_delay * 2 ** worker.restarts)
+        worker.restarts += 1
+        worker.restart_at = now + delay
+        _log.warning(
+            "[CLUSTER] Cluster %d exited with code %s. Restarting in %.0fs.",
+            worker.cluster_id, worker.process.exitcode, delay
+        )
+
+    def _collect_health(self) -> None:
+        now = time.monotonic()
+        while True:
+            try:
+                report = self._health_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            worker = self.workers.get(report.get("cluster_id"))
+            if worker is not None:
+                worker.health = report
+                worker.last_report = now
+
+    def _check_workers(self) -> None:
+        now = time.monotonic()
+
+        for worker in self.workers.values():
+            process = worker.process
+
+            if process is not None and process.is_alive():
+                if now - worker.last_report > self.heartbeat_timeout:
+                    _log.warning("[CLUSTER] Cluster %d stopped reporting. Terminating it.", worker.cluster_id)
+                    process.terminate()
+                continue
+
+            if worker.restart_at is None:
+                self._schedule_restart(worker, now)
+
+            if worker.restart_at <= now:
+                self._spawn(worker)
+
+    def get_health(self) -> dict[int, dict[str, Any]]:
+        """The latest health report of every cluster."""
+        return {cluster_id : worker.health for cluster_id, worker in self.workers.items()}
+
+    def _log_summary(self) -> None:
+        for worker in self.workers.values():
+            health = worker.health
+            alive = worker.process is not None and worker.process.is_alive()
+            _log.info(
+                "[CLUSTER] Cluster %d : alive=%s ready=%s guilds=%s latency=%s restarts=%d",
+                worker.cluster_id,
+                alive,
+                health.get("ready", False),
+                health.get("guilds", "-"),
+                f"{health['latency'] * 1000:.0f}ms" if "latency" in health else "-",
+                worker.restarts,
+            )
+
+    def run(self) -> None:
+        listener = QueueListener(self._log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+        listener.start()
+
+        try:
+            for worker in self.workers.values():
+                self._spawn(worker)
+
+            next_summary = time.monotonic() + self.summary_interval
+            while True:
+                time.sleep(0.5)
+                self._collect_health()
+                self._check_workers()
+
+                if time.monotonic() >= next_summary:
+                    self._log_summary()
+                    next_summary = time.monotonic() + self.summary_interval
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            self.shutdown()
+            listener.stop()
+
+    def shutdown(self, timeout : float = 30.0) -> None:
+        if self._closing:
+            return
+
+        self._closing = True
+        _log.info("[CLUSTER] Shutting down %d cluster(s).", len(self.workers))
+
+        processes = [w.process for w in self.workers.values() if w.process is not None and w.process.is_alive()]
+        for process in processes:
+            # Lets the worker close the bot and the database gracefully.
+            try:
+                os.kill(process.pid, signal.SIGINT)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
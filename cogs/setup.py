@@ -3,12 +3,13 @@ from discord import app_commands
 from discord.ext import commands
 from typing import TYPE_CHECKING
 from utils import  StreamConfig, ConfirmationView, GoLiveGuildSetup, is_channel_public
-from utils.paginator import ChannelInfoPages
+from utils.paginator import ChannelInfoPages, LiveChannelInfoPages
 
 if TYPE_CHECKING:
     from bot import GoLiveGuardian
     from utils import ChannelInfo
 
+import config
 import discord
 import itertools
 import logging
@@ -31,7 +32,7 @@ class Setup(commands.Cog):
         return self.app.pool
 
     async def interaction_check(self, interaction : discord.Interaction) -> bool:
-        if not self.voice_cog._check_init:
+        if not self.voice_cog.is_guild_ready(interaction.guild_id):
             await interaction.response.send_message("I am not ready yet. You can run commands if I am.", ephemeral=True)
             return False
 
@@ -67,14 +68,7 @@ class Setup(commands.Cog):
         if result:
             msg = "Reset Done. You can close this message."
 
-            channel_info = self.voice_cog.channel_info
-            to_delete = []
-
-            for channel_id in guild_previous_setup.channels.keys():
-                info = channel_info.get(channel_id, None)
-                if info:
-                    to_delete.append(info)
-
+            to_delete = self.voice_cog.channel_info.get_guild_channels(interaction.guild_id, unhandled=True)
             self.voice_cog._remove_unnecessary_things(to_delete)
         else:
             msg = "Reset Failed. Try again later."
@@ -101,30 +95,36 @@ class Setup(commands.Cog):
     @app_commands.command(name="status")
     @app_commands.guild_only()
     @app_commands.default_permissions(manage_channels=True)
-    async def get_status(self, interaction : discord.Interaction):
+    @app_commands.describe(live="Keep the message updated while streams change")
+    async def get_status(self, interaction : discord.Interaction, live : bool = False):
         """Get the stream status of your server"""
         ephemeral = is_channel_public(interaction.channel)
-        await interaction.response.defer(thinking=True, ephemeral=ephemeral)
+        registry = self.voice_cog.channel_info
 
-        data : GoLiveGuildSetup = await self.mongo.get_guild_info(interaction.guild.id)
-        if not data.watch:
-            await interaction.followup.send("I am not watching any voice channel in your server. Run `/setup` to enable watching channels.", ephemeral=ephemeral)
+        # Only watched guilds have channels in the registry.
+        if not registry.has_guild(interaction.guild_id):
+            await interaction.response.send_message("I am not watching any voice channel in your server. Run `/setup` to enable watching channels.", ephemeral=ephemeral)
             return
 
-        current_guild_status : list[ChannelInfo] = []
-        for channel_id in data.channels:
-            try:
-                info = self.voice_cog.channel_info[channel_id]
-                current_guild_status.append(info)
-
-            except KeyError:
-                pass
+        await interaction.response.defer(thinking=True, ephemeral=ephemeral)
 
+        current_guild_status : list[ChannelInfo] = registry.get_guild_channels(interaction.guild_id)
         if not current_guild_status:
             await interaction.followup.send("Your server doesn't have any data.", ephemeral=ephemeral)
             return
 
-        view = ChannelInfoPages(current_guild_status, cog=self, per_page=2)
+        if live:
+            view = LiveChannelInfoPages(
+                registry,
+                interaction.guild_id,
+                cog=self,
+                per_page=2,
+                interval=config.status_refresh_interval,
+                idle_timeout=config.status_idle_timeout,
+            )
+        else:
+            view = ChannelInfoPages(current_guild_status, cog=self, per_page=2)
+
         await view.start(interaction, ephemeral=ephemeral)
 
 
@@ -1,61 +1,266 @@
 from __future__ import annotations
-from collections import defaultdict
+from collections import defaultdict, deque
 from discord.ext import commands, tasks
 from discord.utils import utcnow, format_dt
-from typing import TYPE_CHECKING, Optional, Iterable
-from pymongo import DeleteOne
+from functools import partial
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Optional, Iterable
 from utils import (
     get_stream_status,
-    StreamerInfo,
-    StreamerView,
+    StreamerWarning,
     StreamConflictResolveView,
     BasicChannelInfo,
     ChannelInfo,
-    SpawnViewFailed,
+    ModerationAction,
+    ModerationExecutor,
+    EditCoalescer,
+    DeadlineScheduler,
+    ChannelRegistry,
+    ReconcileQueue,
+    WatchedMemberCache,
+    VoiceStateFilter,
+    GuildWrite,
+    NotificationPipeline,
+    ChannelSnapshot,
+    SessionSnapshot,
+    metrics,
+    tracer,
 )
 
 import asyncio
 import discord
 import logging
+import time
 
 if TYPE_CHECKING:
     from bot import GoLiveGuardian
-    from utils import MongoClient, GoLiveGuildSetup
+    from utils import GuildStorage
 
 
 _log = logging.getLogger(__name__)
 
+# Seconds between two edits of the same conflict message.
+CONFLICT_EDIT_WINDOW = 2.0
+
+# The number of channels whose conflicts are checked at the same time.
+RECONCILE_CONCURRENCY = 8
+
+# The number of voice events kept per guild until the guild becomes ready.
+EVENT_BUFFER_SIZE = 256
+
+# Seconds given to streamers to resolve a conflict.
+CONFLICT_TIMEOUT = 180.0
+
+# A conflict restored after its deadline passed is given at least this many seconds.
+MIN_CONFLICT_TIMEOUT = 30.0
+
+# Seconds between two snapshot writes. A snapshot is written only if something changed.
+SNAPSHOT_INTERVAL = 30.0
+
+# A member who exceeds the stream limit of a channel again within this many seconds
+# gets the same warning edited, not a new one.
+NOTIFICATION_TTL = 600.0
+
+# The number of warnings and mod alerts sent per channel per minute.
+NOTIFICATIONS_PER_MINUTE = 5
+
+# Pinged when a member can not be disconnected.
+MOD_ROLE_ID = 469459051105878016
+
+# A snapshot older than this is not restored, since streamers may have restarted their streams meanwhile.
+SNAPSHOT_MAX_AGE = 600.0
+
+_voice_event_seconds = metrics.histogram(
+    "golive_voice_state_update_seconds",
+    "Seconds taken to process a voice state update.",
+)
+_mod_alerts = metrics.counter(
+    "golive_mod_alerts_total",
+    "Members who could not be disconnected, so mods were pinged instead.",
+)
+
+# Sizes are read when scraped, so nothing is recorded on the hot path.
+_channels = metrics.gauge("golive_channels", "Watched channels by state.", ("state",))
+_conflict_views = metrics.gauge("golive_conflict_views_active", "Conflict views waiting for streamers.")
+_pending_actions = metrics.gauge("golive_moderation_pending", "Disconnects and warnings waiting to run.")
+_buffered_events = metrics.gauge("golive_buffered_voice_events", "Voice events buffered until their guild is ready.")
+
 
 # noinspection SpellCheckingInspection
 class Voice(commands.Cog):
     def __init__(self, app : GoLiveGuardian) -> None:
         self.app = app
-        self.lock : asyncio.Lock = asyncio.Lock()
 
-        # Pair of channel's id and channel info.
-        # int would be channel_id
-        self.channel_info : dict[int, ChannelInfo] = {}
+        # Disconnects and warnings are run by the executor, not by the gateway listeners.
+        self.executor : ModerationExecutor = ModerationExecutor()
+
+        # Conflict view edits of the same message are collapsed into one per window.
+        self.edit_coalescer : EditCoalescer = EditCoalescer(window=CONFLICT_EDIT_WINDOW)
+
+        # Repeated warnings of a member are collapsed, and messages are capped per channel.
+        self.notifier : NotificationPipeline = NotificationPipeline(
+            self.executor,
+            self.edit_coalescer,
+            ttl=NOTIFICATION_TTL,
+            channel_limit=NOTIFICATIONS_PER_MINUTE,
+        )
+
+        # Every conflict deadline is fired by one dispatcher, instead of a timeout task per view.
+        self.conflict_deadlines : DeadlineScheduler[StreamConflictResolveView] = DeadlineScheduler(
+            self._expire_conflict,
+            name="conflict deadline",
+        )
+
+        # Pair of channel's id and channel info, also indexed by guild id.
+        # Unhandled channels are kept here until their conflicts are checked.
+        self.channel_info : ChannelRegistry = ChannelRegistry()
 
-        # this is used to ensure unhandled channels handled well.
-        self.unhandled_channels : set[ChannelInfo] = set()
+        # Members and voice states are cached only where the registry needs them.
+        self.member_cache : WatchedMemberCache = WatchedMemberCache(self.channel_info)
 
-        # To prevent data inconsistency, all setup commands are unavailable until bot's channel task being done.
-        self._check_init : bool = False
+        # Voice events of unwatched guilds and channels are dropped before discord.py parses them.
+        self.voice_filter : VoiceStateFilter = VoiceStateFilter(self.channel_info, self.member_cache)
+
+        # To prevent data inconsistency, a guild is not ready until its own channels are reconciled.
+        # Voice events of a guild that is not ready are buffered and replayed once it is.
+        self._loaded : bool = False
+        self._ready_guilds : set[int] = set()
+        self._pending_channels : dict[int, set[int]] = {}
+        self._replaying : set[int] = set()
+        self._event_buffers : dict[int, deque[tuple[discord.Member, bool, discord.VoiceChannel, float]]] = {}
 
         self._guild_dumps : dict[int, list[ChannelInfo]] = defaultdict(list)
         self.cleanup_left_guilds.start()
 
-        self.event : asyncio.Event = asyncio.Event()
-        self._channel_manager : asyncio.Task[None] = None
+        # Only the channels changed by a setup are reconciled, not every unhandled channel.
+        self.reconciler : ReconcileQueue[ChannelInfo] = ReconcileQueue(
+            self._reconcile_channel,
+            key=attrgetter("id"),
+            concurrency=RECONCILE_CONCURRENCY,
+            name="handle conflict",
+            on_give_up=self._give_up_channel,
+        )
         self._get_unhandled_channels.start()
 
+        # Streamers and conflict deadlines are restored from the snapshot of the previous run.
+        # Nothing is written until the restoration is done, so the previous snapshot is never lost.
+        self._snapshot : Optional[SessionSnapshot] = None
+        self._snapshot_dirty : bool = False
+        self._restored : asyncio.Event = asyncio.Event()
+        self._write_snapshot.start()
 
     @property
-    def mongo(self) -> MongoClient:
+    def mongo(self) -> GuildStorage:
         return self.app.pool
 
+    @property
+    def unhandled_channels(self) -> tuple[ChannelInfo, ...]:
+        return self.channel_info.unhandled
+
+    async def cog_load(self) -> None:
+        self.executor.start()
+        self.reconciler.start()
+        self.conflict_deadlines.start()
+        self.voice_filter.install(self.app._connection)
+        self._register_gauges()
+
+    async def cog_unload(self) -> None:
+        self._register_gauges(unload=True)
+        self.voice_filter.uninstall()
+
+        # Listeners are removed by now, so the snapshot is final.
+        # It's written before the deadlines are dropped, so conflicts resume after a restart.
+        self._write_snapshot.cancel()
+        try:
+            await self.save_snapshot()
+        except Exception as e:
+            _log.warning("[SNAPSHOT] Failed to write the final snapshot", exc_info=e)
+
+        await self.conflict_deadlines.close()
+        await self.reconciler.close()
+        await self.executor.close()
+
+    def _register_gauges(self, *, unload : bool = False) -> None:
+        gauges = (
+            (_channels.labels("handled"), lambda: len(self.channel_info)),
+            (_channels.labels("unhandled"), lambda: self.channel_info.unhandled_count),
+            (_conflict_views, self.count_conflict_views),
+            (_pending_actions, lambda: self.executor.pending),
+            (_buffered_events, lambda: sum(len(buffer) for buffer in self._event_buffers.values())),
+        )
+        for gauge, function in gauges:
+            gauge.set_function((lambda: 0) if unload else function)
+
+    def count_conflict_views(self) -> int:
+        return len(self.conflict_deadlines)
+
+    def is_guild_ready(self, guild_id : int) -> bool:
+        if guild_id in self._ready_guilds:
+            return True
+
+        return self._loaded and guild_id not in self._pending_channels and guild_id not in self._event_buffers
+
+    def _set_guild_ready(self, guild_id : int) -> None:
+        if guild_id in self._ready_guilds or guild_id in self._replaying:
+            return
+
+        if self._event_buffers.get(guild_id):
+            self._replaying.add(guild_id)
+            asyncio.create_task(self._replay_events(guild_id), name=f"golive-replay-events: {guild_id}")
+            return
+
+        self._event_buffers.pop(guild_id, None)
+        self._ready_guilds.add(guild_id)
+
+    async def _replay_events(self, guild_id : int) -> None:
+        # Events that arrive while replaying are appended to the same buffer, so the order is kept.
+        buffer = self._event_buffers[guild_id]
+        _log.info("Replaying [%d] buffered voice event(s) of guild [%d]", len(buffer), guild_id)
+
+        while buffer:
+            member, is_live, vc_channel, received_at = buffer.popleft()
+            try:
+                await self._handle_voice_state(member, is_live, vc_channel, received_at)
+            except Exception as e:
+                _log.warning("Failed to replay voice event of member [%d]", member.id, exc_info=e)
+
+        del self._event_buffers[guild_id]
+        self._replaying.discard(guild_id)
+        self._ready_guilds.add(guild_id)
+
+    def _has_setup(self, guild_id : int) -> bool:
+        return guild_id in self._pending_channels or self.channel_info.has_guild(guild_id)
+
+    def _buffer_event(self, member : discord.Member, is_live : bool, vc_channel : discord.VoiceChannel, received_at : float) -> None:
+        guild_id = member.guild.id
+        buffer = self._event_buffers.get(guild_id)
+        if buffer is None:
+            buffer = self._event_buffers[guild_id] = deque(maxlen=EVENT_BUFFER_SIZE)
+
+        if len(buffer) == buffer.maxlen:
+            _log.warning("Voice event buffer of guild [%d] is full. Dropping the oldest event.", guild_id)
+
+        buffer.append((member, is_live, vc_channel, received_at))
+
+    def _mark_reconciled(self, info : ChannelInfo) -> None:
+        pending = self._pending_channels.get(info.guild_id)
+        if pending is None:
+            return
+
+        pending.discard(info.id)
+        if not pending:
+            del self._pending_channels[info.guild_id]
+            self._set_guild_ready(info.guild_id)
+
+    def enqueue_channels(self, guild_id : int, infos : Iterable[ChannelInfo]) -> None:
+        """Adds channels of a guild as unhandled and queues them to check their conflicts."""
+        infos = list(infos)
+        self.channel_info.bulk_add(guild_id, infos)
+        self.reconciler.put_many(infos)
+
     @tasks.loop(count=1)
     async def _get_unhandled_channels(self):
+        await self._load_snapshot()
         _log.info("Getting Data From DB")
 
         guilds = self.mongo.get_all_guilds_info(self.app.guilds)
@@ -64,23 +269,111 @@ class Voice(commands.Cog):
                 continue
 
             info = guild.get_as_channel_info()
-            self.unhandled_channels.update(info)
+            if not info:
+                continue
+
+            # The guild becomes ready as soon as its own channels are reconciled.
+            self._pending_channels[guild.id] = {channel.id for channel in info}
+            self.enqueue_channels(guild.id, info)
 
             _log.info(f"Found guild [%d] from DB and added [%d] unhandled channel(s)", guild.id, len(info))
 
+        # Guilds without any watched channel are ready from now.
+        self._loaded = True
+        for guild_id in tuple(self._event_buffers):
+            if guild_id not in self._pending_channels:
+                self._set_guild_ready(guild_id)
+
         await self.mongo._cleanup_db()
-        self._channel_manager = self.mongo._loop.create_task(self._handle_conflict())
+        await self.reconciler.join()
+        self._trim_member_cache(self.app.guilds)
+        self.voice_filter.active = True
+        self._restored.set()
+        self._snapshot_dirty = True
+        _log.info("All Preparing Task Done!")
+
+    def _trim_member_cache(self, guilds : Iterable[discord.Guild]) -> None:
+        evicted = sum(self.member_cache.trim(guild) for guild in guilds)
+        if evicted:
+            _log.info("[MEMBER CACHE] Evicted [%d] member(s) outside watched channels", evicted)
 
     @_get_unhandled_channels.before_loop
     async def before_get_unhandled_channels(self):
         await self.app.wait_until_ready()
 
+    async def _load_snapshot(self) -> None:
+        snapshot = await asyncio.to_thread(SessionSnapshot.load, self.app.snapshot_path)
+        if snapshot is None:
+            return
+
+        if snapshot.age > SNAPSHOT_MAX_AGE:
+            _log.info("[SNAPSHOT] Snapshot is %.0f seconds old. Not restoring it.", snapshot.age)
+            return
+
+        self._snapshot = snapshot
+        _log.info("[SNAPSHOT] Restoring [%d] channel(s) from snapshot", len(snapshot))
+
+    def build_snapshot(self) -> SessionSnapshot:
+        """Captures streamers and conflict deadlines of handled channels.
+        Channels without any streamer or conflict are left out.
+        """
+        snapshot = SessionSnapshot()
+
+        for info in self.channel_info.values():
+            view = info.conflict_view
+            in_conflict = view is not None and not view.is_finished()
+            if not info.streamers and not in_conflict:
+                continue
+
+            snapshot.add(ChannelSnapshot(
+                id=info.id,
+                guild_id=info.guild_id,
+                streamers=list(info.streamers.items()),
+                conflict_deadline=self.conflict_deadlines.get(view) if in_conflict else None,
+                conflict_message_id=view.message.id if in_conflict and view.message else None,
+            ))
+
+        # Channels still waiting for a retry keep what they had in the previous snapshot.
+        previous = self._snapshot
+        if previous is not None and previous.age <= SNAPSHOT_MAX_AGE:
+            for channel in previous.channels.values():
+                if channel.id not in self.channel_info and self.channel_info.get_any(channel.id) is not None:
+                    snapshot.add(channel)
+
+        return snapshot
+
+    async def save_snapshot(self) -> None:
+        """Writes the snapshot, so the next start can restore streamers and conflicts."""
+        if not self._restored.is_set():
+            return
+
+        self._snapshot_dirty = False
+        snapshot = self.build_snapshot()
+
+        try:
+            await asyncio.to_thread(snapshot.dump, self.app.snapshot_path)
+        except OSError as e:
+            self._snapshot_dirty = True
+            _log.warning("[SNAPSHOT] Failed to write snapshot", exc_info=e)
+            return
+
+        _log.debug("[SNAPSHOT] Wrote [%d] channel(s) to snapshot", len(snapshot))
+
+    @tasks.loop(seconds=SNAPSHOT_INTERVAL)
+    async def _write_snapshot(self):
+        if self._snapshot_dirty:
+            await self.save_snapshot()
+
+    @_write_snapshot.before_loop
+    async def before_write_snapshot(self):
+        await self._restored.wait()
+
     @tasks.loop(minutes=10)
     async def cleanup_left_guilds(self):
         if not self._guild_dumps:
             return
         
-        ops = {guild_id : DeleteOne({"id" : guild_id}) for guild_id in self._guild_dumps}        
+        ops = {guild_id : GuildWrite.deletion(guild_id) for guild_id in self._guild_dumps}
         success : frozenset[int] = await self.mongo._process_bulk(ops, True)
         if not success:
             return
@@ -93,79 +386,89 @@ class Voice(commands.Cog):
         
         self._remove_unnecessary_things(to_remove)
 
-    async def _handle_conflict(self) -> None:
-        """It's used only once to handle Stream Conflicts after starting up.
+    async def _reconcile_channel(self, info : ChannelInfo) -> None:
+        # A channel that fails is retried, and its guild stays not ready until then,
+        # so buffered events are never replayed against a partial registry.
+        await self._check_conflict(info)
+        self._mark_reconciled(info)
+
+    def _give_up_channel(self, info : ChannelInfo) -> None:
+        # The channel stays unhandled, so its events are ignored, and its guild becomes ready without it.
+        _log.warning("[HANDLE CONFLICT] Gave up checking channel [%d]. It's not handled until set up again.", info.id)
+        self._mark_reconciled(info)
+
+    async def _check_conflict(self, info : ChannelInfo) -> None:
+        """Handles Stream Conflicts of a channel after starting up or being set up.
         When a channel exceeds its Go Live stream limit, a message that requests to solve
         streamers' conflict is sent to the channel.
 
         The message updates when an event occurs related to the channel.
         if the channel is removed or changed bot can not see them,
         the conflict will be automatically resolved and its streamers won't be kicked from there.
+
+        Raising an exception lets the reconciler retry the channel later.
         """
+        channel_id = info.id
 
-        while True:
-            handled_info : list[ChannelInfo] = []
-            removing_channel : list[ChannelInfo] = []
-            count = 0
+        # The channel may have been removed or replaced by a setup while waiting.
+        if self.channel_info.get_any(channel_id) is not info:
+            return
 
-            for info in tuple(self.unhandled_channels.copy()):
-                channel_id = info.id
-                view: Optional[StreamConflictResolveView] = info.conflict_view
+        channel : Optional[discord.VoiceChannel] = self.app.get_channel(channel_id)
+        if channel is None:
+            raise RuntimeError(f"Channel [{channel_id}] is not in cache yet")
 
-                try:
-                    channel : discord.VoiceChannel = self.app.get_channel(channel_id)
-                    existing_streamer: tuple[discord.Member] = tuple(m for m in channel.members if m.voice.self_stream)
+        # Members of a channel that was not watched have been evicted from the cache.
+        await self.member_cache.fill(channel)
+        existing_streamer: tuple[discord.Member] = tuple(m for m in channel.members if m.voice.self_stream)
+        restored = None if self._snapshot is None else self._snapshot.get(channel_id)
 
-                    if not existing_streamer:
-                        _log.debug("[HANDLE CONFLICT] No conflict detected in channel [%d] before starting up.", channel_id)
+        if restored is not None:
+            # Only streamers who are still live are restored, in the order they started.
+            existing_streamer = tuple(sorted(
+                existing_streamer,
+                key=lambda m: (restored.started_at(m.id) is None, restored.started_at(m.id) or 0.0),
+            ))
 
-                    else:
-                        _log.debug("[HANDLE CONFLICT] %d Streamer(s) Detected in channel [%d]", len(existing_streamer), channel_id)
+        if not existing_streamer:
+            _log.debug("[HANDLE CONFLICT] No conflict detected in channel [%d] before starting up.", channel_id)
 
-                        if len(existing_streamer) > info.stream_limit:
-                            _log.warning("[HANDLE CONFLICT] Stream limit exceeded. Sent ConflicView to channel [%d]", channel_id)
-                            await self._send_conflict_view(existing_streamer, channel, info, view)
+        else:
+            _log.debug("[HANDLE CONFLICT] %d Streamer(s) Detected in channel [%d]", len(existing_streamer), channel_id)
+
+            if len(existing_streamer) > info.stream_limit:
+                _log.warning("[HANDLE CONFLICT] Stream limit exceeded. Sent ConflicView to channel [%d]", channel_id)
 
-                        if not info.streamers:
-                            streamers = tuple(StreamerInfo(id=streamer.id) for streamer in existing_streamer)
-                            info.streamers.update(streamers)
+                timeout, message_id = CONFLICT_TIMEOUT, None
+                if restored is not None and restored.conflict_deadline is not None:
+                    timeout = max(MIN_CONFLICT_TIMEOUT, restored.conflict_deadline - time.time())
+                    message_id = restored.conflict_message_id
 
-                except SpawnViewFailed as e:
-                    _log.warning("[HANDLE CONFLICT] %s", e)
-                    continue
+                try:
+                    await self._send_conflict_view(
+                        existing_streamer, channel, info, info.conflict_view,
+                        timeout=timeout, message_id=message_id,
+                    )
 
                 except (discord.NotFound, discord.Forbidden, discord.InvalidData) as e:
                     _log.warning(f"[HANDLE CONFLICT] Channel [%d] not found or forbidden or has invalid data. Removing from DB.", channel_id, exc_info=e)
-                    removing_channel.append(info)
-                    continue
-
-                except Exception as e:
-                    _log.warning(f"[HANDLE CONFLICT] Fetch failed channel [%d]. Should be handled later.", channel_id, exc_info=e)
-                    continue
+                    self.channel_info.remove(channel_id)
+                    await self.mongo.remove_invalid_channels([info])
+                    return
 
-                finally:
-                    # Sleeps to prevent blocking from context switching
-                    # if guild unhandled channels are collected too much.
-                    if count >= 10:
-                        await asyncio.sleep(0)
-                        count = 0
-                    else:
-                        count += 1
+            if not info.streamers:
+                for streamer in existing_streamer:
+                    started_at = None if restored is None else restored.started_at(streamer.id)
+                    info.streamers.add(streamer.id, started_at)
 
-                self.channel_info[channel_id] = info
-                handled_info.append(info)
-                _log.info("[HANDLE CONFLICT] Successfully handling channel [%d]", channel_id)
-
-            self.unhandled_channels.difference_update(handled_info)
-            await self.mongo.remove_invalid_channels(removing_channel)
-
-            if not self._check_init:
-                self._check_init = True
-                _log.info("All Preparing Task Done!")
+        if self.channel_info.get_any(channel_id) is not info:
+            return
 
-            # Waits until any guild's setup is done.
-            await self.event.wait()
-            self.event.clear()
+        self.channel_info.add(info)
+        self._snapshot_dirty = True
+        if self._snapshot is not None:
+            self._snapshot.pop(channel_id)
+        _log.info("[HANDLE CONFLICT] Successfully handling channel [%d]", channel_id)
 
     async def _process_conflict_view(
         self,
@@ -178,27 +481,44 @@ class Voice(commands.Cog):
 
         if view.is_finished():
             self.channel_info[channel.id].conflict_view = None
+            self._snapshot_dirty = True
             return
 
         view.channel = channel
         view.max_streamer = max_streamer
         await view.update()
 
-    @staticmethod
+    async def _expire_conflict(self, view : StreamConflictResolveView) -> None:
+        await view.expire()
+        self._snapshot_dirty = True
+        self.channel_info.touch(view.channel.id)
+
     async def _send_conflict_view(
+        self,
         streamers : Iterable[discord.Member],
         channel : discord.VoiceChannel,
         info : ChannelInfo,
         view : Optional[StreamConflictResolveView] = None,
+        *,
+        timeout : float = CONFLICT_TIMEOUT,
+        message_id : Optional[int] = None,
     ) -> None:
         if view and not view.is_finished():
             return
 
         # if view is None then create new instace of conflict view
-        view = StreamConflictResolveView(streamers, channel=channel, max_streamer=info.stream_limit)
+        view = StreamConflictResolveView(
+            streamers,
+            channel=channel,
+            max_streamer=info.stream_limit,
+            executor=self.executor,
+            coalescer=self.edit_coalescer,
+            deadlines=self.conflict_deadlines,
+            timeout=timeout,
+        )
 
         try:
-            await view.start()
+            await view.start(message_id=message_id)
             info.conflict_view = view
 
         except Exception as e:
@@ -207,132 +527,208 @@ class Voice(commands.Cog):
             raise e
 
     @staticmethod
-    async def _send_warn_message(
-        member : discord.Member,
-        channel : discord.VoiceChannel,
-        stream_info: Iterable[ChannelInfo],
-        max_streamer : int
-    ) -> None:
-
+    def _render_warn_message(member : discord.Member, max_streamer : int, count : int) -> dict[str, Any]:
         if max_streamer > 1:
             stream_limit = f"{max_streamer} streams"
         else:
             stream_limit = f"{max_streamer} stream"
 
         content = f"{member.mention}, The channel's stream limitation has reached."
+        if count > 1:
+            content += f" (x{count})"
+
         description = (
             f"Only {stream_limit} is allowed per voice channel due to rule.\n"
             "Please consider to move to other channel or try again later."
         )
         embed = discord.Embed(description=description, color=discord.Color.blurple())
 
-        view = StreamerView(member, stream_info, channel)
-        kwargs = {"content": content, "embed": embed, "view": view}
+        return {"content": content, "embed": embed}
 
-        await view.send(**kwargs)
+    @staticmethod
+    def _render_mod_alert(member : discord.Member, channel : discord.VoiceChannel, since : str, count : int) -> dict[str, Any]:
+        mod = member.guild.get_role(MOD_ROLE_ID)
+        mention = "" if mod is None else f" {mod.mention}"
+        repeated = f" Disconnected {count} times, without success." if count > 1 else ""
+        content = f"{member.mention} is streaming while exceeding {channel.mention} stream limit since {since}.{repeated} Please take a look.{mention}"
+        return {"content": content}
+
+    def _send_warn_message(self, member : discord.Member, channel : discord.VoiceChannel, max_streamer : int) -> None:
+        warning = StreamerWarning(member, channel)
+        self.notifier.notify(
+            "warning", member, channel,
+            partial(self._render_warn_message, member, max_streamer),
+            lambda kwargs: warning.send(**kwargs),
+        )
 
-    async def _kick_from_channel(
+    def _send_mod_alert(self, member : discord.Member, channel : discord.VoiceChannel) -> None:
+        async def send(kwargs : dict[str, Any]) -> Optional[discord.Message]:
+            try:
+                return await channel.send(**kwargs)
+            except discord.HTTPException:
+                _log.warning("[SEND WARN MESSAGE] Failed to send warning message to member [%d]", member.id)
+                return None
+
+        since = format_dt(utcnow(), "T")
+        self.notifier.notify("mod_alert", member, channel, partial(self._render_mod_alert, member, channel, since), send)
+
+    async def _disconnect(
         self,
         member : discord.Member,
         channel : discord.VoiceChannel,
-        stream_info : Iterable[StreamerInfo],
         max_streamer : int,
     ) -> None:
-        """Sends warning message to member. If it's impossible,
-        then the message will be sent to ``channel``.
-
-        :param member: The Member who will be kicked from channel and a warn message will be sent to.
-        :param channel: An alternative way if a message was failed to Member.
-        :param stream_info: An iterable object of Streamer Info.
-        :param max_streamer: The stream limit.
-        """
-
         try:
             await member.edit(voice_channel=None)
-            await self._send_warn_message(member, channel, stream_info, max_streamer)
 
         except discord.Forbidden:
-            try:
-                mod = discord.utils.get(member.guild.roles, id=469459051105878016)
-                mention = "" if mod is None else f" {mod.mention}"
-                since = format_dt(utcnow(), "T")
-                msg = f"{member.mention} is streaming while exceeding {channel.mention} stream limit since {since}. Please take a look.{mention}"
-                await channel.send(msg)
+            _mod_alerts.inc()
+            self._send_mod_alert(member, channel)
+            # Counted as forbidden by the executor.
+            raise
 
-            except discord.HTTPException:
-                _log.warning("[SEND WARN MESSAGE] Failed to send warning message to member [%d]", member.id)
+        self._send_warn_message(member, channel, max_streamer)
+
+    def _kick_from_channel(
+        self,
+        member : discord.Member,
+        channel : discord.VoiceChannel,
+        max_streamer : int,
+        received_at : Optional[float] = None,
+    ) -> bool:
+        """Enqueues disconnection of member. After being disconnected, a warning message is sent to member.
+        If the member can not be disconnected, then a message that pings mods will be sent to ``channel``.
+
+        This never awaits, so the listener doesn't wait for any REST round trip.
+
+        :param member: The Member who will be kicked from channel and a warn message will be sent to.
+        :param channel: An alternative way if a message was failed to Member.
+        :param max_streamer: The stream limit.
+        :param received_at: When the voice event was received, by :func:`time.perf_counter`.
+        :return: ``False`` if the disconnection of member is already pending.
+        """
+        with tracer.span("voice.kick_from_channel", member_id=member.id, channel_id=channel.id):
+            factory = partial(self._disconnect, member, channel, max_streamer)
+            return self.executor.submit(ModerationAction.disconnect(member, factory, received_at=received_at))
 
     def _remove_unnecessary_things(self, channels : Iterable[BasicChannelInfo]) -> None:
         if not channels:
             return
 
-        to_delete : list[ChannelInfo] = []
-
-        for channel in channels:
-            info = self.channel_info.get(channel.id, None)
-            if info:
-                to_delete.append(info)
+        removed = self.channel_info.bulk_remove(channel.id for channel in channels)
+        self._snapshot_dirty = True
+        for info in removed:
+            self.reconciler.discard(info)
+            self._mark_reconciled(info)
 
-        for info in to_delete:
-            del self.channel_info[info.id]
+        if self._loaded:
+            guilds = (self.app.get_guild(guild_id) for guild_id in {info.guild_id for info in removed})
+            self._trim_member_cache(guild for guild in guilds if guild is not None)
 
-        count = len(channels)
+        count = len(removed)
         form = "Channels are" if count > 1 else "Channel is"
         _log.info("%d Voice %s not being unhandled from now.", count, form)
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member : discord.Member, before : discord.VoiceState, after : discord.VoiceState) -> None:
-        if member.guild is None or member.bot or not self._check_init:
+        received_at = time.perf_counter()
+        try:
+            with tracer.span("voice.on_voice_state_update", member_id=member.id):
+                await self._on_voice_state_update(member, before, after, received_at)
+        finally:
+            _voice_event_seconds.observe(time.perf_counter() - received_at)
+
+    async def _on_voice_state_update(
+        self,
+        member : discord.Member,
+        before : discord.VoiceState,
+        after : discord.VoiceState,
+        received_at : float,
+    ) -> None:
+        if member.guild is None:
+            return
+
+        # The registry of a guild is complete once the guild is ready.
+        guild_ready = self.is_guild_ready(member.guild.id)
+        if guild_ready:
+            self.member_cache.apply(member, after.channel)
+
+        if member.bot:
             return
 
-        # This event is handled after auto_conflict_task is being done
         # Filter to get valid voice channel
         is_live, vc_channel = get_stream_status(before, after)
         if vc_channel is None:
             return
 
-        # Handle after starting up
+        # This event is handled after the guild's channels are reconciled.
+        # Guilds without any setup yet don't buffer. If their setup is read later,
+        # their channels are checked from the live voice states anyway.
+        if not guild_ready:
+            if self._has_setup(member.guild.id):
+                self._buffer_event(member, is_live, vc_channel, received_at)
+            return
+
+        await self._handle_voice_state(member, is_live, vc_channel, received_at)
+
+    async def _handle_voice_state(
+        self,
+        member : discord.Member,
+        is_live : bool,
+        vc_channel : discord.VoiceChannel,
+        received_at : Optional[float] = None,
+    ) -> None:
         vc_id = vc_channel.id
         info = self.channel_info.get(vc_id, None)
         if info is None:
             return
 
         max_streamer = info.stream_limit
-        view = info.conflict_view
-        stream_info = info.streamers
 
-        await self._process_conflict_view(vc_channel, max_streamer, view)
+        # Reserve or release the slot before any network I/O.
+        # A burst of events in the same channel can not overshoot the stream limit this way.
+        if is_live:
+            admitted = info.reserve(member.id, time.time())
+        else:
+            info.release(member.id)
+            admitted = True
 
-        if not is_live:
-            stream_info.discard(StreamerInfo(id=member.id))
+        self._snapshot_dirty = True
 
-        else:
-            stream_info.add(StreamerInfo(id=member.id, started_at=utcnow()))
+        # The span includes the wait for the lock.
+        with tracer.span("voice.process_conflict_view", channel_id=vc_id):
+            async with info.lock:
+                await self._process_conflict_view(vc_channel, max_streamer, info.conflict_view)
 
-            if len(stream_info) > max_streamer:
-                _log.info("Stream limit reached. Forced Disconnection applies to [%d]", member.id)
-                stream_info.discard(StreamerInfo(id=member.id))
-                await self._kick_from_channel(member, vc_channel, stream_info.copy(), max_streamer)
+        # Live status messages of the guild are re-rendered.
+        self.channel_info.touch(vc_id)
 
-        async with self.lock:
-            info.streamers = stream_info
-            self.channel_info[vc_id] = info
+        if not admitted:
+            _log.info("Stream limit reached. Forced Disconnection applies to [%d]", member.id)
+            self._kick_from_channel(member, vc_channel, max_streamer, received_at)
 
-        _log.info("Successfully updated stream info of Channel [%d] : %s", vc_id, stream_info)
+        _log.info("Successfully updated stream info of Channel [%d] : %s", vc_id, info.streamers)
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild : discord.Guild):
         _log.info("Joined guild [%d]", guild.id)
+        if self._loaded:
+            self._trim_member_cache((guild,))
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild : discord.Guild):
+        # The cache of a guild is filled again when it becomes available after an outage.
+        if self._loaded:
+            self._trim_member_cache((guild,))
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild : discord.Guild):
-        if not self._check_init:
+        if not self._loaded:
             return
 
         _log.info("Left guild [%d]", guild.id)
 
-        data : GoLiveGuildSetup = await self.mongo.get_guild_info(guild)
-        info = data.get_as_channel_info()
+        info = self.channel_info.get_guild_channels(guild.id, unhandled=True)
         result = await self.mongo.leave_guild(guild)
 
         if result:
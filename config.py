@@ -5,4 +5,26 @@ load_dotenv()
 
 
 bot_token = os.getenv("BOT_TOKEN")
-mongo_uri = os.getenv("MONGO_URI")
\ No newline at end of file
+mongo_uri = os.getenv("MONGO_URI")
+
+# Where guild setups are stored. One of "mongo", "sqlite" and "memory".
+storage_backend = os.getenv("STORAGE_BACKEND", "mongo")
+sqlite_path = os.getenv("SQLITE_PATH", "guardian.db")
+# Duplicated setups prevent the unique index on guild ids. They're only removed if this is set.
+mongo_remove_duplicates = os.getenv("MONGO_REMOVE_DUPLICATES", "0") == "1"
+
+# Metrics are served at http://<metrics_host>:<metrics_port>/metrics if a port is set.
+# A cluster worker listens on metrics_port + its cluster id.
+metrics_host = os.getenv("METRICS_HOST", "127.0.0.1")
+metrics_port = int(os.getenv("METRICS_PORT", "0")) or None
+
+# A fraction of voice events, commands and storage calls is traced to trace_path.
+# Any event slower than trace_slow_threshold seconds is logged with its whole span tree.
+trace_sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+trace_slow_threshold = float(os.getenv("TRACE_SLOW_THRESHOLD", "0")) or None
+trace_path = os.getenv("TRACE_PATH", "traces.jsonl")
+
+# A live /status message is edited at most once per status_refresh_interval seconds,
+# and stops after status_idle_timeout seconds without any change or interaction.
+status_refresh_interval = float(os.getenv("STATUS_REFRESH_INTERVAL", "10"))
+status_idle_timeout = float(os.getenv("STATUS_IDLE_TIMEOUT", "600"))
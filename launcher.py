@@ -1,8 +1,10 @@
 from __future__ import annotations
 from bot import GoLiveGuardian
+from typing import Any, Callable
 from logging.handlers import RotatingFileHandler
-from utils.db import MongoClient
+from utils.db import GuildStorage
 
+import argparse
 import asyncio
 import contextlib
 import discord
@@ -56,27 +58,42 @@ def setup_logging():
             log.removeHandler(hdlr)
 
 
-async def start():
+async def start(bot_factory : Callable[[], GoLiveGuardian] = GoLiveGuardian, **pool_options : Any):
     log = logging.getLogger()
 
     try:
-        pool = MongoClient()
+        pool = GuildStorage(**pool_options)
         await pool.task
 
     except RuntimeError:
-        click.echo('Could not connect to MongoDB. Exiting...', file=sys.stderr)
-        log.exception('Could not connect to MongoDB. Exiting...')
+        print('Could not connect to the storage. Exiting...', file=sys.stderr)
+        log.exception('Could not connect to the storage. Exiting...')
         return
 
-    async with GoLiveGuardian() as bot:
+    async with bot_factory() as bot:
         bot.pool = pool
         await bot.start()
-    
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Runs GoLive Guardian.")
+    parser.add_argument("--clusters", type=int, default=0, help="Runs shards in this many worker processes.")
+    parser.add_argument("--shards", type=int, default=None, help="The total number of shards. Defaults to the number of clusters.")
+    return parser.parse_args(argv)
+
 
 def main():
+    args = parse_args()
+
     try:
         with setup_logging():
-            if sys.version_info >= (3, 11):
+            if args.clusters > 0:
+                # Imported here since a worker imports this module.
+                from cluster import Supervisor
+
+                Supervisor(clusters=args.clusters, shard_count=args.shards or args.clusters).run()
+
+            elif sys.version_info >= (3, 11):
                 with asyncio.Runner(debug=True, loop_factory=loop_factory) as runner:
                     runner.run(start())
             else:
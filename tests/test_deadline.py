@@ -0,0 +1,97 @@
+from utils.deadline import DeadlineScheduler
+
+import importlib
+import pytest
+
+
+NOW = 1_000_000.0
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = NOW
+
+    def time(self) -> float:
+        return self.now
+
+
+async def _handler(key):
+    pass
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(importlib.import_module("utils.deadline"), "time", _Clock())
+    # One turn of the wheel is 8 seconds.
+    return DeadlineScheduler(_handler, resolution=1.0, slots=8)
+
+
+def test_never_fires_early(scheduler):
+    scheduler.schedule("a", NOW + 2.5)
+
+    assert scheduler.advance(NOW + 2.9) == []
+    assert scheduler.advance(NOW + 3.0) == ["a"]
+    assert "a" not in scheduler
+
+
+def test_past_deadline_fires_on_next_tick(scheduler):
+    scheduler.schedule("a", NOW - 60)
+
+    assert scheduler.advance(NOW) == []
+    assert scheduler.advance(NOW + 1) == ["a"]
+
+
+def test_wraps_around(scheduler):
+    # Shares a bucket with deadlines of the two turns before it.
+    scheduler.schedule("far", NOW + 20)
+    scheduler.schedule("near", NOW + 4)
+
+    assert scheduler.advance(NOW + 4) == ["near"]
+    for second in range(5, 20):
+        assert scheduler.advance(NOW + second) == []
+
+    assert scheduler.advance(NOW + 20) == ["far"]
+    assert len(scheduler) == 0
+
+
+def test_stall_fires_every_reached_deadline_once(scheduler):
+    for second in range(1, 31):
+        scheduler.schedule(second, NOW + second)
+
+    # Stalled for several turns of the wheel.
+    due = scheduler.advance(NOW + 25)
+    assert sorted(due) == list(range(1, 26))
+
+    assert scheduler.advance(NOW + 25) == []
+    assert sorted(scheduler.advance(NOW + 30)) == list(range(26, 31))
+
+
+def test_stall_keeps_deadlines_not_reached(scheduler):
+    scheduler.schedule("a", NOW + 3)
+    scheduler.schedule("b", NOW + 103)
+
+    assert scheduler.advance(NOW + 100) == ["a"]
+    assert scheduler.get("b") == NOW + 103
+    assert scheduler.advance(NOW + 103) == ["b"]
+
+
+def test_extend_and_cancel(scheduler):
+    scheduler.schedule("a", NOW + 3)
+    scheduler.schedule("b", NOW + 3)
+
+    assert scheduler.extend("a", 10)
+    assert scheduler.cancel("b")
+    assert not scheduler.cancel("b")
+    assert not scheduler.extend("b", 10)
+
+    assert scheduler.advance(NOW + 12) == []
+    assert scheduler.advance(NOW + 13) == ["a"]
+
+
+def test_schedule_again_replaces(scheduler):
+    scheduler.schedule("a", NOW + 3)
+    scheduler.schedule("a", NOW + 5)
+
+    assert list(scheduler.items()) == [("a", NOW + 5)]
+    assert scheduler.advance(NOW + 4) == []
+    assert scheduler.advance(NOW + 5) == ["a"]
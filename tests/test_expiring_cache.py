@@ -0,0 +1,113 @@
+from utils.cache import ExpiringCache
+
+import importlib
+import pytest
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    # The module is shadowed by the ``cache`` decorator re-exported from ``utils``.
+    monkeypatch.setattr(importlib.import_module("utils.cache"), "time", clock)
+    return clock
+
+
+def test_entries_expire_in_order(clock):
+    cache = ExpiringCache(10)
+    cache["a"] = 1
+    clock.now += 5
+    cache["b"] = 2
+
+    clock.now += 5
+    assert "a" not in cache
+    assert cache["b"] == 2
+
+    clock.now += 5
+    assert len(cache) == 0
+
+
+def test_reading_doesnt_extend(clock):
+    cache = ExpiringCache(10)
+    cache["a"] = 1
+    clock.now += 9
+    assert cache["a"] == 1
+
+    clock.now += 1
+    assert cache.get("a") is None
+
+
+def test_setting_again_extends(clock):
+    cache = ExpiringCache(10)
+    cache["a"] = 1
+    clock.now += 9
+    cache["a"] = 2
+
+    clock.now += 9
+    # The heap item of the first set is stale, so it doesn't expire the entry.
+    assert cache.expire() == 0
+    assert cache["a"] == 2
+
+    clock.now += 1
+    assert cache.expire() == 1
+
+
+def test_deleted_entry_is_not_expired_again(clock):
+    expired = []
+    cache = ExpiringCache(10)
+    cache.set_callback(lambda key, value: expired.append(key))
+    cache["a"] = 1
+    del cache["a"]
+    cache["b"] = 2
+
+    clock.now += 10
+    assert cache.expire() == 1
+    assert expired == ["b"]
+
+
+def test_stale_heap_items_are_compacted(clock):
+    cache = ExpiringCache(10)
+    for _ in range(1000):
+        cache["a"] = 1
+
+    assert len(cache._ExpiringCache__heap) <= 2 * len(cache) + 64
+    clock.now += 10
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted(clock):
+    evicted = []
+    cache = ExpiringCache(10, maxsize=2)
+    cache.set_callback(lambda key, value: evicted.append((key, value)))
+    cache["a"] = 1
+    cache["b"] = 2
+    # Reading marks it as recently used.
+    assert cache["a"] == 1
+
+    cache["c"] = 3
+    assert evicted == [("b", 2)]
+    assert list(cache) == ["a", "c"]
+
+    cache["a"] = 4
+    cache["d"] = 5
+    assert evicted == [("b", 2), ("c", 3)]
+    assert cache.items() == [("a", 4), ("d", 5)]
+
+
+def test_evicted_entry_is_not_expired(clock):
+    expired = []
+    cache = ExpiringCache(10, maxsize=1)
+    cache.set_callback(lambda key, value: expired.append(key))
+    cache["a"] = 1
+    cache["b"] = 2
+
+    clock.now += 10
+    assert cache.expire() == 1
+    assert expired == ["a", "b"]
@@ -0,0 +1,68 @@
+from utils.snapshot import ChannelSnapshot, SessionSnapshot
+
+import pytest
+
+
+def _make_snapshot() -> SessionSnapshot:
+    snapshot = SessionSnapshot(written_at=1_700_000_000.5)
+    snapshot.add(ChannelSnapshot(
+        id=2 ** 63 + 1,
+        guild_id=2 ** 64 - 1,
+        streamers=[(1, 1_700_000_000.25), (2, None)],
+        conflict_deadline=1_700_000_060.0,
+        conflict_message_id=987654321,
+    ))
+    snapshot.add(ChannelSnapshot(id=3, guild_id=4))
+    return snapshot
+
+
+def test_round_trip():
+    snapshot = _make_snapshot()
+    restored = SessionSnapshot.from_bytes(snapshot.to_bytes())
+
+    assert restored == snapshot
+    assert list(restored.channels) == list(snapshot.channels)
+
+
+def test_missing_values_round_trip():
+    restored = SessionSnapshot.from_bytes(_make_snapshot().to_bytes())
+    channel = restored.get(3)
+
+    assert channel.streamers == []
+    assert channel.conflict_deadline is None
+    assert channel.conflict_message_id is None
+    assert restored.get(2 ** 63 + 1).started_at(2) is None
+
+
+def test_empty_round_trip():
+    snapshot = SessionSnapshot(written_at=0.0)
+    assert SessionSnapshot.from_bytes(snapshot.to_bytes()) == snapshot
+
+
+def test_truncated():
+    data = _make_snapshot().to_bytes()
+
+    for size in (0, 10, len(data) - 1):
+        with pytest.raises(ValueError):
+            SessionSnapshot.from_bytes(data[:size])
+
+
+def test_unsupported_version():
+    data = bytearray(_make_snapshot().to_bytes())
+    data[4] += 1
+
+    with pytest.raises(ValueError):
+        SessionSnapshot.from_bytes(bytes(data))
+
+
+def test_dump_and_load(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    snapshot = _make_snapshot()
+    snapshot.dump(path)
+
+    assert SessionSnapshot.load(path) == snapshot
+    assert SessionSnapshot.load(str(tmp_path / "missing.bin")) is None
+
+    with open(path, "r+b") as f:
+        f.truncate(20)
+    assert SessionSnapshot.load(path) is None
@@ -0,0 +1,156 @@
+from utils.storage import apply_write
+from utils.writebehind import GuildWrite, WriteBehindBuffer
+
+import asyncio
+import dataclasses
+import pytest
+
+
+GUILD_ID = 1
+DOCUMENT = {"id" : GUILD_ID, "channels" : {"10" : {"limit" : 1}, "20" : {"limit" : 2}}, "mod_role" : 5}
+
+
+def _write(**kwargs) -> GuildWrite:
+    return GuildWrite(GUILD_ID, **kwargs)
+
+
+def _apply(document, *writes):
+    for write in writes:
+        document = apply_write(document, write)
+    return document
+
+
+# Pairs of writes, applied in order.
+CASES = {
+    "child after parent set": (
+        _write(set_fields={"channels" : {"10" : {"limit" : 3}}}),
+        _write(set_fields={"channels.20" : {"limit" : 4}}),
+    ),
+    "parent set after child": (
+        _write(set_fields={"channels.20" : {"limit" : 4}}),
+        _write(set_fields={"channels" : {"10" : {"limit" : 3}}}),
+    ),
+    "child set after parent unset": (
+        _write(unset_fields={"channels"}),
+        _write(set_fields={"channels.30" : {"limit" : 1}}),
+    ),
+    "parent unset after child set": (
+        _write(set_fields={"channels.30" : {"limit" : 1}}),
+        _write(unset_fields={"channels"}),
+    ),
+    "child unset after parent set": (
+        _write(set_fields={"channels" : {"10" : {"limit" : 3}, "20" : {"limit" : 4}}}),
+        _write(unset_fields={"channels.10"}),
+    ),
+    "parent set after child unset": (
+        _write(unset_fields={"channels.10"}),
+        _write(set_fields={"channels" : {"40" : {"limit" : 1}}}),
+    ),
+    "child unset after parent unset": (
+        _write(unset_fields={"channels"}),
+        _write(unset_fields={"channels.10"}),
+    ),
+    "grandchild set after parent set": (
+        _write(set_fields={"channels.10" : {"limit" : 3}}),
+        _write(set_fields={"channels.10.limit" : 5}),
+    ),
+    "set after delete": (
+        GuildWrite.deletion(GUILD_ID),
+        _write(set_fields={"channels.10" : {"limit" : 3}}, upsert=True),
+    ),
+    "child set after recreation": (
+        _write(set_fields={"channels" : {"10" : {"limit" : 3}}}, replace=True, upsert=True),
+        _write(set_fields={"channels.10.limit" : 4}, unset_fields={"mod_role"}),
+    ),
+    "update after delete": (
+        GuildWrite.deletion(GUILD_ID),
+        _write(set_fields={"channels.10" : {"limit" : 3}}),
+    ),
+    "delete after set": (
+        _write(set_fields={"channels.10" : {"limit" : 3}}),
+        GuildWrite.deletion(GUILD_ID),
+    ),
+}
+
+
+@pytest.mark.parametrize("document", [DOCUMENT, None], ids=["existing", "missing"])
+@pytest.mark.parametrize("older, newer", CASES.values(), ids=CASES.keys())
+def test_merge_has_the_same_effect(document, older, newer):
+    if document is None and not older.delete:
+        # Otherwise nothing is written to a missing document.
+        older = dataclasses.replace(older, upsert=True)
+
+    assert _apply(document, older.merge(newer)) == _apply(document, older, newer)
+
+
+def test_merge_never_writes_a_field_and_its_sub_field():
+    merged = _write(set_fields={"channels.20" : {"limit" : 4}}).merge(_write(set_fields={"channels" : {}}))
+
+    assert merged.set_fields == {"channels" : {}}
+    assert not merged.unset_fields
+
+
+def test_merge_child_into_parent():
+    merged = _write(unset_fields={"channels"}).merge(_write(set_fields={"channels.30" : 1}))
+
+    assert merged.set_fields == {"channels" : {"30" : 1}}
+    assert not merged.unset_fields
+
+
+def test_merge_keeps_order_of_sets_and_unsets():
+    merged = _write(set_fields={"mod_role" : 1}).merge(_write(unset_fields={"mod_role"}))
+    assert _apply(DOCUMENT, merged) == {key : value for key, value in DOCUMENT.items() if key != "mod_role"}
+
+    merged = _write(unset_fields={"mod_role"}).merge(_write(set_fields={"mod_role" : 2}))
+    assert _apply(DOCUMENT, merged)["mod_role"] == 2
+
+
+def test_buffer_merges_writes_of_a_guild():
+    batches = []
+
+    async def writer(writes):
+        batches.append(writes)
+        return {}
+
+    async def main():
+        buffer = WriteBehindBuffer(writer, window=0.01)
+        first = buffer.submit(_write(set_fields={"channels.10" : 1}, upsert=True))
+        second = buffer.submit(_write(set_fields={"channels.20" : 2}))
+        assert await asyncio.gather(first, second) == [True, True]
+        await buffer.close()
+
+    asyncio.run(main())
+    assert len(batches) == 1
+    assert _apply(None, batches[0][GUILD_ID]) == {"id" : GUILD_ID, "channels" : {"10" : 1, "20" : 2}}
+
+
+def test_close_waits_for_every_flush():
+    started = []
+    release = None
+
+    async def writer(writes):
+        started.append(writes)
+        await release.wait()
+        return {}
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        buffer = WriteBehindBuffer(writer, window=0.0)
+
+        first = buffer.submit(_write(set_fields={"mod_role" : 1}, upsert=True))
+        await asyncio.sleep(0.01)
+        # Flushed while the first batch is still being written.
+        second = buffer.submit(GuildWrite(2, set_fields={"mod_role" : 2}, upsert=True))
+        await asyncio.sleep(0.01)
+
+        closing = asyncio.create_task(buffer.close())
+        await asyncio.sleep(0.01)
+        release.set()
+        await closing
+
+        assert first.done() and second.done()
+        assert not buffer._flush_tasks
+
+    asyncio.run(main())
+    assert len(started) == 2
@@ -1,8 +1,21 @@
 from .cache import *
+from .coalesce import *
 from .config import *
 from .db import *
+from .deadline import *
 from .exception import *
+from .gateway import *
+from .membercache import *
+from .metrics import *
 from .model import *
+from .moderation import *
+from .notify import *
+from .reconcile import *
+from .registry import *
+from .snapshot import *
+from .storage import *
+from .tracing import *
 from .util import *
+from .writebehind import *
 from .streamer import *
 from .paginator import *
\ No newline at end of file
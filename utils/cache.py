@@ -3,15 +3,22 @@
 
 from __future__ import annotations
 from enum import Enum
-from functools import wraps
-from typing import Any, Callable, Coroutine, MutableMapping, TypeVar, Protocol
+from functools import partial, wraps
+from collections import OrderedDict
+from typing import Any, Callable, Coroutine, Hashable, Iterable, Iterator, MutableMapping, Optional, TypeVar, Protocol
 from lru import LRU
 
 import asyncio
+import bisect
+import heapq
+import itertools
+import logging
 import time
 
 R = TypeVar('R')
 
+_log = logging.getLogger(__name__)
+
 
 # Can't use ParamSpec due to https://github.com/python/typing/discussions/946
 class CacheProtocol(Protocol[R]):
@@ -29,45 +36,248 @@ class CacheProtocol(Protocol[R]):
     def invalidate_containing(self, key: str) -> None:
         ...
 
+    def invalidate_tag(self, tag: Hashable) -> int:
+        ...
+
     def get_stats(self) -> tuple[int, int]:
         ...
 
+    stats: CacheStats
+
+
+class ExpiringCache(MutableMapping[Any, Any]):
+    """A mapping whose entries expire ``seconds`` after being set.
+
+    Expired entries are absent from every accessor. Expiry times are kept in a min-heap,
+    so expiring is amortized O(log n) instead of a scan of every entry.
 
-class ExpiringCache(dict):
-    def __init__(self, seconds: float):
+    :param seconds: The time to live of an entry. Reading an entry doesn't extend it.
+    :param maxsize: If given, the least recently used entry is evicted beyond this size.
+    :param sweep_interval: If given, expired entries are also removed by a background task
+        every ``sweep_interval`` seconds, so memory is released even if the cache is idle.
+    """
+
+    def __init__(self, seconds: float, maxsize: Optional[int] = None, *, sweep_interval: Optional[float] = None):
         self.__ttl: float = seconds
-        super().__init__()
-
-    def __verify_cache_integrity(self):
-        # Have to do this in two steps...
-        current_time = time.monotonic()
-        to_remove = [k for (k, (v, t)) in super().items() if current_time > (t + self.__ttl)]
-        for k in to_remove:
-            del self[k]
-
-    def __contains__(self, key: str):
-        self.__verify_cache_integrity()
-        return super().__contains__(key)
-
-    def __getitem__(self, key: str):
-        self.__verify_cache_integrity()
-        v, _ = super().__getitem__(key)
-        return v
-
-    def get(self, key: str, default: Any = None):
-        v = super().get(key, default)
-        if v is default:
+        self.maxsize: Optional[int] = maxsize
+        self.sweep_interval: Optional[float] = sweep_interval
+
+        # key -> (value, expires_at, sequence), in least recently used order.
+        self.__data: OrderedDict[Any, tuple[Any, float, int]] = OrderedDict()
+        # (expires_at, sequence, key). An item is stale if the key was set again or removed.
+        self.__heap: list[tuple[float, int, Any]] = []
+        self.__sequence = itertools.count()
+        self.__callback: Optional[Callable[[Any, Any], Any]] = None
+        self.__sweeper: Optional[asyncio.Task[None]] = None
+
+    def set_callback(self, callback: Optional[Callable[[Any, Any], Any]]) -> None:
+        """Sets a callback called with the key and value of an expired or evicted entry."""
+        self.__callback = callback
+
+    def expire(self) -> int:
+        """Removes every expired entry.
+
+        :return: The number of removed entries.
+        """
+        now = time.monotonic()
+        heap = self.__heap
+        data = self.__data
+        removed = 0
+
+        while heap and heap[0][0] <= now:
+            _, sequence, key = heapq.heappop(heap)
+            entry = data.get(key)
+            if entry is None or entry[2] != sequence:
+                continue
+
+            del data[key]
+            removed += 1
+            if self.__callback is not None:
+                self.__callback(key, entry[0])
+
+        # Stale heap items are dropped when they outnumber the entries.
+        if len(heap) > 2 * len(data) + 64:
+            self.__heap = [(expires_at, sequence, key) for key, (_, expires_at, sequence) in data.items()]
+            heapq.heapify(self.__heap)
+
+        return removed
+
+    def __contains__(self, key: Any) -> bool:
+        self.expire()
+        return key in self.__data
+
+    def __getitem__(self, key: Any) -> Any:
+        self.expire()
+        value, _, _ = self.__data[key]
+        self.__data.move_to_end(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
             return default
-        return v[0]
 
-    def __setitem__(self, key: str, value: Any):
-        super().__setitem__(key, (value, time.monotonic()))
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.expire()
+
+        expires_at = time.monotonic() + self.__ttl
+        sequence = next(self.__sequence)
+        self.__data[key] = (value, expires_at, sequence)
+        self.__data.move_to_end(key)
+        heapq.heappush(self.__heap, (expires_at, sequence, key))
+
+        if self.maxsize is not None:
+            while len(self.__data) > self.maxsize:
+                evicted, (evicted_value, _, _) = self.__data.popitem(last=False)
+                if self.__callback is not None:
+                    self.__callback(evicted, evicted_value)
+
+        if self.sweep_interval is not None and self.__sweeper is None:
+            self.__start_sweeper()
+
+    def __delitem__(self, key: Any) -> None:
+        # Its heap item becomes stale.
+        del self.__data[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        self.expire()
+        return iter(list(self.__data))
+
+    def __len__(self) -> int:
+        self.expire()
+        return len(self.__data)
+
+    def clear(self) -> None:
+        self.__data.clear()
+        self.__heap.clear()
 
     def values(self):
-        return map(lambda x: x[0], super().values())
+        self.expire()
+        return [value for value, _, _ in self.__data.values()]
 
     def items(self):
-        return map(lambda x: (x[0], x[1][0]), super().items())
+        self.expire()
+        return [(key, value) for key, (value, _, _) in self.__data.items()]
+
+    def __repr__(self) -> str:
+        return f"<ExpiringCache ttl={self.__ttl} size={len(self)} maxsize={self.maxsize}>"
+
+    def __start_sweeper(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self.__sweeper = loop.create_task(self.__sweep(), name="golive-expiring-cache-sweeper")
+
+    async def __sweep(self) -> None:
+        try:
+            while self.__data:
+                await asyncio.sleep(self.sweep_interval)
+                self.expire()
+        finally:
+            # Started again by the next set.
+            self.__sweeper = None
+
+    def stop_sweeper(self) -> None:
+        if self.__sweeper is not None:
+            self.__sweeper.cancel()
+            self.__sweeper = None
+
+
+class LatencyHistogram:
+    """A cumulative histogram of seconds, with fixed bucket upper bounds."""
+
+    BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, buckets: Iterable[float] = BUCKETS):
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # The last count is of values larger than every bucket.
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Pairs of bucket upper bound and the number of values not larger than it."""
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """An upper bound of the ``q`` quantile, from the bucket it falls in."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class CacheStats:
+    """Counters of a cache built by :func:`cache`. Every instance is kept in :data:`cache_registry`."""
+
+    def __init__(self, name: str, strategy: Strategy, maxsize: int, size: Callable[[], int]):
+        self.name: str = name
+        self.strategy: Strategy = strategy
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+        self.load_errors: int = 0
+        self.load_latency: LatencyHistogram = LatencyHistogram()
+        self.__size = size
+
+    @property
+    def size(self) -> int:
+        return self.__size()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        latency = self.load_latency
+        return {
+            "name": self.name,
+            "strategy": self.strategy.name,
+            "maxsize": self.maxsize,
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "load_errors": self.load_errors,
+            "load_count": latency.count,
+            "load_seconds_sum": latency.sum,
+            "load_seconds_p50": latency.quantile(0.5),
+            "load_seconds_p99": latency.quantile(0.99),
+        }
+
+    def __repr__(self) -> str:
+        return f"<CacheStats name={self.name!r} size={self.size} hits={self.hits} misses={self.misses}>"
+
+
+# The name of a cache -> its stats. A cache built again with the same name replaces the former.
+cache_registry: dict[str, CacheStats] = {}
+
+
+def get_cache_stats() -> list[dict[str, Any]]:
+    """Stats of every cache built by :func:`cache`."""
+    return [stats.to_dict() for stats in cache_registry.values()]
 
 
 class Strategy(Enum):
@@ -80,17 +290,65 @@ def cache(
     maxsize: int = 128,
     strategy: Strategy = Strategy.lru,
     ignore_kwargs: bool = False,
+    tags: Optional[Callable[..., Iterable[Hashable]]] = None,
+    refresh_after: Optional[float] = None,
+    name: Optional[str] = None,
 ) -> Callable[[Callable[..., Coroutine[Any, Any, R]]], CacheProtocol[R]]:
+    """Caches the task of a coroutine function by its arguments.
+
+    Concurrent calls with the same arguments share a single task. A task that fails
+    or is cancelled is evicted, so the next call tries again.
+
+    :param tags: Called with the same arguments as the function, returns the tags of the entry.
+        ``invalidate_tag`` removes every entry that has the tag in O(entries with the tag),
+        unlike ``invalidate_containing`` which scans every key.
+    :param refresh_after: If given, an entry older than this many seconds is still returned,
+        but reloaded in the background. If reloading fails, the last good value is kept.
+        Invalidated entries are never returned.
+    :param name: The name of its stats in :data:`cache_registry`. Defaults to the qualified name of the function.
+    """
     def decorator(func: Callable[..., Coroutine[Any, Any, R]]) -> CacheProtocol[R]:
+        # tag -> keys with the tag, and key -> its tags, to keep both sides clean.
+        _tag_index: dict[Hashable, set[str]] = {}
+        _key_tags: dict[str, tuple[Hashable, ...]] = {}
+
+        # When each entry was loaded, and the reloads in progress.
+        _loaded_at: dict[str, float] = {}
+        _refreshing: dict[str, asyncio.Task[R]] = {}
+
+        def _forget(key: str, *_: Any) -> None:
+            _loaded_at.pop(key, None)
+            _refreshing.pop(key, None)
+
+            for tag in _key_tags.pop(key, ()):
+                keys = _tag_index.get(tag)
+                if keys is None:
+                    continue
+                keys.discard(key)
+                if not keys:
+                    del _tag_index[tag]
+
+        def _on_evicted(key: str, *_: Any) -> None:
+            stats.evictions += 1
+            _forget(key)
+
         if strategy is Strategy.lru:
             _internal_cache = LRU(maxsize)
-            _stats = _internal_cache.get_stats
+            _internal_cache.set_callback(_on_evicted)
         elif strategy is Strategy.raw:
             _internal_cache = {}
-            _stats = lambda: (0, 0)
         elif strategy is Strategy.timed:
-            _internal_cache = ExpiringCache(maxsize)
-            _stats = lambda: (0, 0)
+            # ``maxsize`` is the time to live of this strategy.
+            _internal_cache = ExpiringCache(maxsize, sweep_interval=max(1.0, maxsize))
+            _internal_cache.set_callback(_on_evicted)
+
+        stats = CacheStats(
+            name or f'{func.__module__}.{func.__qualname__}',
+            strategy,
+            maxsize,
+            partial(len, _internal_cache),
+        )
+        cache_registry[stats.name] = stats
 
         def _make_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
             # this is a bit of a cluster fuck
@@ -122,35 +380,115 @@ def cache(
             try:
                 task = _internal_cache[key]
             except KeyError:
+                stats.misses += 1
                 _internal_cache[key] = task = asyncio.create_task(func(*args, **kwargs))
+                task.add_done_callback(partial(_on_loaded, key, time.perf_counter()))
+                if tags is not None:
+                    _index(key, tags(*args, **kwargs))
                 return task
             else:
+                stats.hits += 1
+                if refresh_after is not None and key in _loaded_at and key not in _refreshing:
+                    if time.monotonic() - _loaded_at[key] >= refresh_after:
+                        _refresh(key, task, args, kwargs)
                 return task
 
-        def _invalidate(*args: Any, **kwargs: Any) -> bool:
+        def _failed(task: asyncio.Task[Any]) -> bool:
+            return task.cancelled() or task.exception() is not None
+
+        def _observe(started_at: float, task: asyncio.Task[Any]) -> None:
+            stats.load_latency.observe(time.perf_counter() - started_at)
+            if not task.cancelled() and task.exception() is not None:
+                stats.load_errors += 1
+
+        def _on_loaded(key: str, started_at: float, task: asyncio.Task[R]) -> None:
+            _observe(started_at, task)
+
+            if _internal_cache.get(key) is not task:
+                # Invalidated while loading.
+                return
+
+            if _failed(task):
+                if _delete(key):
+                    stats.evictions += 1
+            else:
+                _loaded_at[key] = time.monotonic()
+
+        def _refresh(key: str, current: asyncio.Task[R], args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+            task = asyncio.create_task(func(*args, **kwargs))
+            _refreshing[key] = task
+            task.add_done_callback(partial(_on_refreshed, key, current, time.perf_counter()))
+
+        def _on_refreshed(key: str, current: asyncio.Task[R], started_at: float, task: asyncio.Task[R]) -> None:
+            _observe(started_at, task)
+
+            if _refreshing.get(key) is task:
+                del _refreshing[key]
+
+            if _internal_cache.get(key) is not current:
+                # Invalidated or evicted while reloading, so this may be outdated as well.
+                return
+
+            if _failed(task):
+                if not task.cancelled():
+                    _log.warning("Failed to refresh cache [%s]. Serving the last good value.", key, exc_info=task.exception())
+                # Tried again after another ``refresh_after``.
+                _loaded_at[key] = time.monotonic()
+                return
+
+            _internal_cache[key] = task
+            _loaded_at[key] = time.monotonic()
+
+        def _index(key: str, entry_tags: Iterable[Hashable]) -> None:
+            _forget(key)
+            entry_tags = tuple(entry_tags)
+            if not entry_tags:
+                return
+
+            _key_tags[key] = entry_tags
+            for tag in entry_tags:
+                _tag_index.setdefault(tag, set()).add(key)
+
+        def _delete(key: str) -> bool:
+            _forget(key)
             try:
-                del _internal_cache[_make_key(args, kwargs)]
+                del _internal_cache[key]
             except KeyError:
                 return False
             else:
                 return True
 
+        def _invalidate(*args: Any, **kwargs: Any) -> bool:
+            if _delete(_make_key(args, kwargs)):
+                stats.invalidations += 1
+                return True
+            return False
+
+        def _invalidate_tag(tag: Hashable) -> int:
+            keys = _tag_index.pop(tag, None)
+            if not keys:
+                return 0
+
+            removed = sum(_delete(key) for key in keys)
+            stats.invalidations += removed
+            return removed
+
         def _invalidate_containing(key: str) -> None:
             to_remove = []
             for k in _internal_cache.keys():
                 if key in k:
                     to_remove.append(k)
             for k in to_remove:
-                try:
-                    del _internal_cache[k]
-                except KeyError:
-                    continue
+                if _delete(k):
+                    stats.invalidations += 1
 
         wrapper.cache = _internal_cache
         wrapper.get_key = lambda *args, **kwargs: _make_key(args, kwargs)
         wrapper.invalidate = _invalidate
-        wrapper.get_stats = _stats
+        wrapper.get_stats = lambda: (stats.hits, stats.misses)
+        wrapper.stats = stats
         wrapper.invalidate_containing = _invalidate_containing
+        wrapper.invalidate_tag = _invalidate_tag
         return wrapper  # type: ignore
 
     return decorator
\ No newline at end of file
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Any, Callable, Coroutine, Hashable, Optional
+
+import asyncio
+import logging
+
+
+__all__ = (
+    "EditCoalescer",
+)
+
+_log = logging.getLogger(__name__)
+
+EditFactory = Callable[[], Coroutine[Any, Any, Any]]
+
+
+class EditCoalescer:
+    """Collapses message edits of the same key into at most one edit per ``window`` seconds.
+
+    Only the latest scheduled edit of a key is run, and it renders the state at the time
+    it runs, not at the time it was scheduled. ``flush`` bypasses the window for edits
+    that must be shown immediately.
+
+    :param window: The minimum interval between two edits of the same key.
+    """
+
+    def __init__(self, window : float = 1.0) -> None:
+        self.window = window
+        self._latest : dict[Hashable, EditFactory] = {}
+        self._last_edit : dict[Hashable, float] = {}
+        self._tasks : dict[Hashable, asyncio.Task[None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def schedule(self, key : Hashable, factory : EditFactory) -> None:
+        """Schedules an edit. If an edit of the key is already pending, it is replaced."""
+        self._latest[key] = factory
+        if key in self._tasks:
+            return
+
+        loop = asyncio.get_running_loop()
+        last = self._last_edit.get(key)
+        delay = 0.0 if last is None else max(0.0, last + self.window - loop.time())
+
+        self._tasks[key] = loop.create_task(self._run_later(key, delay), name=f"golive-coalesced-edit: {key}")
+
+    async def flush(self, key : Hashable, factory : Optional[EditFactory] = None) -> None:
+        """Runs an edit now and drops any pending edit of the key.
+
+        Unlike scheduled edits, exceptions are propagated to the caller.
+
+        :param key: The key of the edit.
+        :param factory: The edit to run. If it's omitted, the pending edit is run.
+        """
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+        pending = self._latest.pop(key, None)
+        factory = factory or pending
+        if factory is None:
+            return
+
+        self._mark_edited(key)
+        await factory()
+
+    def discard(self, key : Hashable) -> None:
+        """Drops any pending edit and the history of the key."""
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+        self._latest.pop(key, None)
+        self._last_edit.pop(key, None)
+
+    def _mark_edited(self, key : Hashable) -> None:
+        loop = asyncio.get_running_loop()
+        edited_at = loop.time()
+        self._last_edit[key] = edited_at
+        # Once the window has passed, the next edit runs immediately anyway, so the history is dropped.
+        loop.call_later(self.window, self._forget, key, edited_at)
+
+    def _forget(self, key : Hashable, edited_at : float) -> None:
+        if self._last_edit.get(key) == edited_at:
+            del self._last_edit[key]
+
+    async def _run_later(self, key : Hashable, delay : float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        self._tasks.pop(key, None)
+        factory = self._latest.pop(key, None)
+        if factory is None:
+            return
+
+        self._mark_edited(key)
+
+        try:
+            await factory()
+        except Exception as e:
+            _log.warning("[COALESCED EDIT] Failed to edit [%s]", key, exc_info=e)
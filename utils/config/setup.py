@@ -425,12 +425,7 @@ class StreamConfig(ui.View):
             if not final.watch:
                 if initial.watch:
                     # remove update (existing)
-                    func = voice_cog.channel_info.get
-                    addition = [
-                        BasicChannelInfo(id=channel_id, guild_id=final.id)
-                        for channel_id in existing if func(channel_id, None)
-                    ]
-                    to_remove.extend(addition)
+                    to_remove.extend(voice_cog.channel_info.get_guild_channels(final.id, unhandled=True))
                 return
 
             # Add Channels to be handled
@@ -440,7 +435,7 @@ class StreamConfig(ui.View):
             if not initial.watch:
                 # do update (existing)
                 for channel_id in existing:
-                    info = voice_cog.channel_info.get(channel_id, None)
+                    info = voice_cog.channel_info.get_any(channel_id)
                     if info is None:
                         info = ChannelInfo(id=channel_id, guild_id=final.id)
 
@@ -452,12 +447,10 @@ class StreamConfig(ui.View):
                 for channel_id in to_add
             ])
 
-            voice_cog.unhandled_channels.update(to_add_list)
+            voice_cog.enqueue_channels(final.id, to_add_list)
 
         finally:
             voice_cog._remove_unnecessary_things(to_remove)
-            if final.watch:
-                voice_cog.event.set()
 
     @ui.button(label="Watch Channels", style=discord.ButtonStyle.green, row=1)
     async def watch_channels(self, interaction : discord.Interaction, _) -> None:
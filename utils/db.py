@@ -1,35 +1,48 @@
 from __future__ import annotations
 from collections import defaultdict
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import contextmanager
 from typing import (
     Any,
     Coroutine,
+    Optional,
     Union,
     Iterable,
     TypeVar,
     AsyncGenerator,
+    Iterator,
 )
-from pymongo.operations import DeleteOne, UpdateOne
-from pymongo.errors import BulkWriteError
 from .cache import cache
+from .metrics import metrics
 from .model import GoLiveGuildSetup, BasicChannelInfo
+from .storage import StorageBackend, create_backend, get_shard_id
+from .tracing import tracer, traced
+from .writebehind import GuildWrite, WriteBehindBuffer
 
 import asyncio
 import config
 import discord
 import logging
+import time
 
 
 __all__ = (
+    "GuildStorage",
     "MongoClient",
 )
 
 _log = logging.getLogger(__name__)
 
-MongoOperations = Union[DeleteOne, UpdateOne, ]
 T = TypeVar("T")
 Coro = Coroutine[Any, Any, T]
 
+_storage_seconds = metrics.histogram(
+    "golive_storage_seconds",
+    "Seconds taken by a storage operation.",
+    ("backend", "method"),
+)
+_STORAGE_METHODS = ("find_all", "find_one", "delete_many", "bulk_write")
+_pending_writes = metrics.gauge("golive_storage_pending_writes", "Guild setups waiting to be written.")
+
 
 def determine_valid_channels(
     *,
@@ -45,55 +58,113 @@ def determine_valid_channels(
     return valid_channels, removal_channels
 
 
-class MongoClient:
-    def __init__(self):
+def backend_from_config() -> StorageBackend:
+    """Creates the backend chosen by ``config.storage_backend``."""
+    kind = config.storage_backend
+
+    if kind == "mongo":
+        return create_backend(kind, uri=config.mongo_uri, remove_duplicates=config.mongo_remove_duplicates)
+    if kind == "sqlite":
+        return create_backend(kind, path=config.sqlite_path)
+    return create_backend(kind)
+
+
+class GuildStorage:
+    """Guild setups, cached and written behind, on top of a storage backend.
+
+    :param backend: Where setups are stored. Defaults to the backend chosen by the config.
+    :param shard_ids: The shards owned by this process. If it's omitted, every guild is owned.
+    :param shard_count: The total number of shards. Required if ``shard_ids`` is given.
+    """
+
+    def __init__(
+        self,
+        backend : Optional[StorageBackend] = None,
+        *,
+        shard_ids : Optional[Iterable[int]] = None,
+        shard_count : Optional[int] = None,
+    ):
+        if shard_ids is not None and not shard_count:
+            raise ValueError("shard_count is required if shard_ids is given")
+
+        self.shard_ids : Optional[frozenset[int]] = None if shard_ids is None else frozenset(shard_ids)
+        self.shard_count : Optional[int] = shard_count
         self._is_running : bool = True
-        self.__client = AsyncIOMotorClient(config.mongo_uri)
-        self.task = asyncio.create_task(self._test())
-        self._loop = asyncio.get_event_loop()
+        self.backend : StorageBackend = backend or backend_from_config()
+        self.task = asyncio.create_task(self.backend.connect())
+        self._latency = {method : _storage_seconds.labels(self.backend.name, method) for method in _STORAGE_METHODS}
         self.removable_guilds : list[int] = []
         self.removable_channels : list[BasicChannelInfo] = []
 
+        # Setup writes of a guild are merged and written in batches.
+        self.writes : WriteBehindBuffer = WriteBehindBuffer(self._write_guilds)
+        _pending_writes.set_function(lambda: len(self.writes))
+
+    @contextmanager
+    def _measure(self, method : str) -> Iterator[None]:
+        # Backend calls are recorded as a metric and as a span.
+        started = time.perf_counter()
+        with tracer.span(f"storage.{method}", backend=self.backend.name):
+            try:
+                yield
+            finally:
+                self._latency[method].observe(time.perf_counter() - started)
+
+    def owns_guild(self, guild_id : int) -> bool:
+        """Whether the guild belongs to the shards of this process."""
+        if self.shard_ids is None:
+            return True
+        return get_shard_id(guild_id, self.shard_count) in self.shard_ids
+
     async def get_all_guilds_info(self, guilds : Iterable[discord.Guild]) -> AsyncGenerator[GoLiveGuildSetup]:
-        """Generally used for start up. So it should be used once."""
+        """Generally used for start up. So it should be used once.
+
+        Guilds owned by other shards are filtered out by the backend, so they are neither read
+        nor regarded as removable.
+        """
         guild_channels = {
             guild.id : tuple(channel.id for channel in guild.voice_channels)
             for guild in guilds
         }
-        cursor = self._guild_setup.find({}, {"_id" : 0})
-
-        async for data in cursor:
-            guild = GoLiveGuildSetup.from_mongo(data)
-            guild_id = guild.id
+        # The span and the latency cover reading every setup, and end even if the caller stops early.
+        with self._measure("find_all"):
+            async for data in self.backend.find_all(self.shard_ids, self.shard_count):
+                guild = GoLiveGuildSetup.from_mongo(data)
+                guild_id = guild.id
 
-            if guild_id not in guild_channels:
-                self.removable_guilds.append(guild_id)
-                continue
+                if guild_id not in guild_channels:
+                    self.removable_guilds.append(guild_id)
+                    continue
 
-            valid_channels, removal_channels = determine_valid_channels(
-                actual_vc_ids=guild_channels[guild_id],
-                db_vc_ids=guild.get_list_of_channel()
-            )
+                valid_channels, removal_channels = determine_valid_channels(
+                    actual_vc_ids=guild_channels[guild_id],
+                    db_vc_ids=guild.get_list_of_channel()
+                )
 
-            if removal_channels:
-                to_extend = [
-                    BasicChannelInfo(id=channel_id, guild_id=guild_id)
-                    for channel_id in removal_channels
-                ]
-                self.removable_channels.extend(to_extend)
+                if removal_channels:
+                    to_extend = [
+                        BasicChannelInfo(id=channel_id, guild_id=guild_id)
+                        for channel_id in removal_channels
+                    ]
+                    self.removable_channels.extend(to_extend)
 
-                guild = guild.refresh_channels(valid_channels)
+                    guild = guild.refresh_channels(valid_channels)
 
-            yield guild
+                yield guild
 
+    @traced("storage.cleanup_db")
     async def _cleanup_db(self):
+        # Never touch records of guilds owned by other shards.
+        self.removable_guilds = [guild_id for guild_id in self.removable_guilds if self.owns_guild(guild_id)]
+        self.removable_channels = [info for info in self.removable_channels if self.owns_guild(info.guild_id)]
+
         # Remove Guilds
         if self.removable_guilds:
-            result = await self._guild_setup.delete_many({"id": {"$in": self.removable_guilds}})
-            deleted = result.deleted_count
+            with self._measure("delete_many"):
+                deleted = await self.backend.delete_many(self.removable_guilds)
             remain = len(self.removable_guilds)
 
-            if result.acknowledged and deleted > 0:
+            if deleted > 0:
                 _log.info("[DB MATCH] [%d] guild(s) deleted. [%d] guild(s) remaining", deleted, remain)
 
             if remain == 0:
@@ -103,66 +174,76 @@ class MongoClient:
         if self.removable_channels:
             await self.remove_invalid_channels(self.removable_channels)
 
-    @cache(maxsize=128)
+    # Setups are invalidated on every write, so a refresh only catches changes made outside of the bot.
+    @cache(
+        maxsize=128,
+        tags=lambda self, guild: (guild.id if isinstance(guild, discord.Guild) else guild,),
+        refresh_after=300.0,
+    )
+    @traced("storage.get_guild_info")
     async def get_guild_info(self, guild : Union[discord.Guild, int]) -> GoLiveGuildSetup:
         if isinstance(guild, discord.Guild):
             guild = guild.id
 
-        data = await self._guild_setup.find_one({"id" : guild}, {"_id" : 0})
+        with self._measure("find_one"):
+            data = await self.backend.find_one(guild)
         if data is None:
             return GoLiveGuildSetup(id=guild)
         return GoLiveGuildSetup.from_mongo(data)
 
+    @traced("storage.leave_guild")
     async def leave_guild(self, guild : GoLiveGuildSetup) -> bool:
-        try:
-            result = await self._guild_setup.delete_one({"id" : guild.id})
-            deleted = result.deleted_count > 0
-        except:
-            deleted = False
-                    
+        """Deletes the guild's setup. Resolves once the deletion is durable."""
+        deleted = await self.writes.submit(GuildWrite.deletion(guild.id))
         await self.invalidate_cache(guild.id)
         return deleted
     
-    async def update_guild_info(self, setup : GoLiveGuildSetup):
+    @traced("storage.update_guild_info")
+    async def update_guild_info(self, setup : GoLiveGuildSetup) -> bool:
+        """Saves the guild's setup. Resolves once the setup is durable."""
         payload = setup.transform_to_mongo()
         payload.pop("id")
 
-        result = await self._guild_setup.update_one({"id" : setup.id}, {"$set" : payload}, upsert=True)
-        done = result.acknowledged
+        return await self.writes.submit(GuildWrite(setup.id, set_fields=payload, upsert=True))
+
+    async def _write_guilds(self, writes : dict[int, GuildWrite]) -> dict[int, BaseException]:
+        """Writes once. Caches of the written guilds are invalidated.
+
+        :return: Errors of the guilds whose write failed.
+        """
+        if not writes:
+            return {}
+
+        with self._measure("bulk_write"):
+            errors = await self.backend.bulk_write(writes)
+
+        for guild_id in writes:
+            if guild_id not in errors:
+                await self.invalidate_cache(guild_id)
 
-        if done:
-            await self.invalidate_cache(setup.id)
-        return done
+        return errors
 
+    @traced("storage.process_bulk")
     async def _process_bulk(
         self,
-        operations: dict[int, MongoOperations],
+        operations: dict[int, GuildWrite],
         get_results : bool = False
     ) -> frozenset[int] | None:
+        """Writes operations through the write-behind buffer, so they are merged with
+        and ordered after other writes of their guilds, and retried by it.
+
+        :return: The guilds whose operation is durable, if ``get_results`` is ``True``.
+        """
         if not operations:
             return
 
-        retry_tasks : dict[int, MongoOperations] = {}
-
-        try:
-            to_write = list(operations.values())
-            await self._guild_setup.bulk_write(to_write, ordered=False)
-
-        except BulkWriteError as e:
-            for error in e.details["writeErrors"]:
-                failed_guild_id = error["op"]["id"]
-                retry_tasks[failed_guild_id] = operations[failed_guild_id]
-
-        before_guild_ids = frozenset(operations.keys())
-        failed_guild_ids = frozenset(retry_tasks.keys())
-        success_guild_ids = before_guild_ids - failed_guild_ids
-
-        for guild_id in success_guild_ids:
-            await self.invalidate_cache(guild_id)
+        guild_ids = list(operations)
+        results = await asyncio.gather(*(self.writes.submit(operations[guild_id]) for guild_id in guild_ids))
 
         if get_results:
-            return success_guild_ids
+            return frozenset(guild_id for guild_id, written in zip(guild_ids, results) if written)
 
+    @traced("storage.remove_invalid_channels")
     async def remove_invalid_channels(self, infos : Iterable[BasicChannelInfo]) -> None:
         if not infos:
             return
@@ -171,21 +252,16 @@ class MongoClient:
             infos = list(infos)
 
         temp : dict[int, list[int]] = defaultdict(list)
-        op_dict = {}
 
         for info in infos:
             temp[info.guild_id].append(info.id)
 
-        for guild_id, channels in temp.items():
-            if not channels:
-                continue
-
-            unset_dict = {f"channels.{channel_id}": "" for channel_id in channels}
-            task = UpdateOne({"id": guild_id}, {"$unset": unset_dict})
-
-            op_dict[guild_id] = task
-
-        await self._process_bulk(op_dict)
+        futures = [
+            self.writes.submit(GuildWrite(guild_id, unset_fields={f"channels.{channel_id}" for channel_id in channels}))
+            for guild_id, channels in temp.items()
+            if channels
+        ]
+        await asyncio.gather(*futures)
 
     async def invalidate_cache(self, guild : Union[BasicChannelInfo, int, discord.Guild]):
         if isinstance(guild, GoLiveGuildSetup):
@@ -196,28 +272,18 @@ class MongoClient:
         if not isinstance(guild, int):
             raise TypeError(f"Invalid guild type: {type(guild)}")
 
-        await self._loop.run_in_executor(
-            None, self.get_guild_info.invalidate_containing, str(guild)
-        )
-
-    async def _test(self):
-        _log.info("Mongo Client Test Started")
+        self.get_guild_info.invalidate_tag(guild)
 
-        attempt = 1
-        while attempt <= 3:
-            response = await self.__client.admin.command("ping")
-
-            if response.get("ok") == 1:
-                _log.info("Mongo Client Test Passed.")
-                self._guild_setup = self.__client["setup"]["guild"]
-                return
+    async def close(self):
+        self._is_running = False
 
-            attempt += 1
+        try:
+            await self.writes.close()
+        except Exception as e:
+            _log.warning("Failed to write pending guild setups", exc_info=e)
 
-        raise RuntimeError("Failed to connect to MongoDB")
+        await self.backend.close()
 
-    async def close(self):
-        self._is_running = False
 
-        if self.__client is not None:
-            self.__client.close()
\ No newline at end of file
+# Kept for the code that still refers to the former name.
+MongoClient = GuildStorage
\ No newline at end of file
@@ -0,0 +1,187 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterator, Optional, TypeVar
+
+import asyncio
+import logging
+import math
+import time
+
+
+__all__ = (
+    "DeadlineScheduler",
+)
+
+_log = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+
+class DeadlineScheduler(Generic[K]):
+    """Owns many deadlines with a single timer, instead of one timer per deadline.
+
+    Deadlines are kept in a hashed timer wheel of ``slots`` buckets, each ``resolution``
+    seconds wide. Scheduling, extending and cancelling a deadline are O(1), and a tick only
+    looks at the bucket it reaches. A deadline further away than one turn of the wheel waits
+    in its bucket for the turns in between. A deadline fires at most ``resolution`` seconds
+    late, never early.
+
+    Deadlines are POSIX timestamps, so they can be persisted and scheduled again after a
+    restart. Once a deadline is reached, it's removed and ``handler`` is run with its key in
+    a task. The dispatcher sleeps while nothing is scheduled.
+
+    :param handler: The coroutine function run with the key of a reached deadline.
+    :param resolution: Seconds per bucket.
+    :param slots: The number of buckets. One turn of the wheel is ``resolution * slots`` seconds.
+    """
+
+    def __init__(
+        self,
+        handler : Callable[[K], Awaitable[Any]],
+        *,
+        resolution : float = 1.0,
+        slots : int = 512,
+        name : str = "deadline",
+    ) -> None:
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        if slots <= 0:
+            raise ValueError("slots must be positive")
+
+        self.handler = handler
+        self.resolution = resolution
+        self.name = name
+        self.fired : int = 0
+        self.failed : int = 0
+
+        # key -> (deadline, tick). The tick tells the bucket of the key.
+        self._entries : dict[K, tuple[float, int]] = {}
+        # Buckets keep insertion order and remove a key in O(1).
+        self._slots : list[dict[K, None]] = [{} for _ in range(slots)]
+        # The last tick processed.
+        self._tick : int = self._to_tick(time.time())
+
+        self._wakeup : asyncio.Event = asyncio.Event()
+        self._dispatcher : Optional[asyncio.Task[None]] = None
+        self._running : set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key : Any) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._entries)
+
+    def get(self, key : K) -> Optional[float]:
+        """The deadline of a key, or ``None`` if it's not scheduled."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def items(self) -> Iterator[tuple[K, float]]:
+        """Pending deadlines, to be persisted."""
+        return ((key, deadline) for key, (deadline, _) in self._entries.items())
+
+    def _to_tick(self, timestamp : float) -> int:
+        return math.floor(timestamp / self.resolution)
+
+    def schedule(self, key : K, deadline : float) -> None:
+        """Schedules a deadline, replacing the one of the key if any.
+        A deadline already passed fires on the next tick.
+        """
+        if not self._entries:
+            # The wheel may have stood still while nothing was scheduled.
+            self._tick = self._to_tick(time.time())
+
+        self.cancel(key)
+
+        tick = max(math.ceil(deadline / self.resolution), self._tick + 1)
+        self._entries[key] = (deadline, tick)
+        self._slots[tick % len(self._slots)][key] = None
+        self._wakeup.set()
+
+    def extend(self, key : K, seconds : float) -> bool:
+        """Moves the deadline of a key by ``seconds``, which may be negative.
+
+        :return: Whether the key was scheduled.
+        """
+        deadline = self.get(key)
+        if deadline is None:
+            return False
+
+        self.schedule(key, deadline + seconds)
+        return True
+
+    def cancel(self, key : K) -> bool:
+        """:return: Whether the key was scheduled."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        del self._slots[entry[1] % len(self._slots)][key]
+        return True
+
+    def advance(self, now : float) -> list[K]:
+        """Removes and returns the keys whose deadline is reached at ``now``, without running the handler."""
+        target = self._to_tick(now)
+        if target <= self._tick:
+            return []
+
+        due : list[K] = []
+        slots = self._slots
+        first = self._tick + 1
+        # After a long stall, every bucket is visited once.
+        last = min(target, first + len(slots) - 1)
+
+        for tick in range(first, last + 1):
+            slot = slots[tick % len(slots)]
+            if not slot:
+                continue
+
+            for key in [key for key in slot if self._entries[key][1] <= target]:
+                del slot[key]
+                del self._entries[key]
+                due.append(key)
+
+        self._tick = target
+        return due
+
+    def start(self) -> None:
+        if self._dispatcher is not None:
+            return
+
+        self._dispatcher = asyncio.create_task(self._dispatch(), name=f"golive-{self.name}-dispatcher")
+
+    async def close(self) -> None:
+        """Stops the dispatcher. Pending deadlines are kept, and handlers already running finish."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _dispatch(self) -> None:
+        while True:
+            if not self._entries:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            next_tick_at = (self._tick + 1) * self.resolution
+            await asyncio.sleep(max(0.0, next_tick_at - time.time()))
+
+            for key in self.advance(time.time()):
+                task = asyncio.create_task(self._fire(key))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _fire(self, key : K) -> None:
+        try:
+            await self.handler(key)
+        except Exception as e:
+            self.failed += 1
+            _log.error("[%s] Handler failed for %s", self.name.upper(), key, exc_info=e)
+        else:
+            self.fired += 1
@@ -0,0 +1,110 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional
+
+from .membercache import WatchedMemberCache
+from .registry import ChannelRegistry
+
+import discord
+import logging
+
+
+__all__ = (
+    "VoiceStateFilter",
+)
+
+_log = logging.getLogger(__name__)
+
+Parser = Callable[[dict[str, Any]], None]
+
+
+class VoiceStateFilter:
+    """Drops VOICE_STATE_UPDATE payloads nobody listens to, before discord.py parses them.
+
+    It replaces the parser of the event, so dropped payloads never build a ``Member``
+    nor dispatch ``on_voice_state_update``. A payload is dropped if its guild has no
+    watched channel, or if neither the channel the member was in nor the channel they
+    are in now is watched. The voice state cache is updated the way
+    :class:`WatchedMemberCache` keeps it, so dropping a payload never leaves it stale.
+
+    Payloads of the bot itself are never dropped, since voice clients rely on them.
+    Nothing is dropped until :attr:`active` is set, while the registry is still loading.
+
+    :param registry: The watched channels.
+    :param member_cache: The cache policy that dropped payloads follow.
+    """
+
+    EVENT = "VOICE_STATE_UPDATE"
+
+    def __init__(self, registry : ChannelRegistry, member_cache : WatchedMemberCache) -> None:
+        self.registry = registry
+        self.member_cache = member_cache
+        self.active : bool = False
+        self.passed : int = 0
+        self.dropped : int = 0
+
+        self._state : Any = None
+        self._original : Optional[Parser] = None
+
+    def install(self, state : Any) -> None:
+        """Replaces the parser of a ``ConnectionState``."""
+        if self._original is not None:
+            return
+
+        self._state = state
+        self._original = state.parsers[self.EVENT]
+        state.parsers[self.EVENT] = self.parse
+
+    def uninstall(self) -> None:
+        if self._original is None:
+            return
+
+        if self._state.parsers.get(self.EVENT) == self.parse:
+            self._state.parsers[self.EVENT] = self._original
+
+        self._original = None
+        self._state = None
+
+    def parse(self, data : dict[str, Any]) -> None:
+        if self.active and self._drop(data):
+            self.dropped += 1
+            return
+
+        self.passed += 1
+        self._original(data)
+
+    def _drop(self, data : dict[str, Any]) -> bool:
+        raw_guild_id = data.get("guild_id")
+        if raw_guild_id is None:
+            return False
+
+        user_id = int(data["user_id"])
+        if user_id == self._state.self_id:
+            return False
+
+        guild = self._state._get_guild(int(raw_guild_id))
+        if guild is None:
+            # Let discord.py log it.
+            return False
+
+        raw_channel_id = data.get("channel_id")
+        channel_id = None if raw_channel_id is None else int(raw_channel_id)
+
+        voice_state = guild._voice_states.get(user_id)
+        if self.registry.has_guild(guild.id):
+            if voice_state is not None and voice_state.channel is not None and self.registry.is_watched(voice_state.channel.id):
+                return False
+            if channel_id is not None and self.registry.is_watched(channel_id):
+                return False
+
+        # Voice states of every guild are kept, without building the member,
+        # so a guild set up later already knows who is in voice.
+        channel = None if channel_id is None else guild.get_channel(channel_id)
+        if channel is None:
+            guild._voice_states.pop(user_id, None)
+        elif voice_state is None:
+            guild._voice_states[user_id] = discord.VoiceState(data=data, channel=channel)
+        else:
+            voice_state._update(data, channel)
+
+        self.member_cache.evict(guild, user_id, voice_state=False)
+        return True
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import Optional
+
+from .registry import ChannelRegistry
+
+import asyncio
+import discord
+import logging
+
+
+__all__ = (
+    "WatchedMemberCache",
+)
+
+_log = logging.getLogger(__name__)
+
+# The maximum number of members requested at once by user ids.
+QUERY_BATCH_SIZE = 100
+
+
+class WatchedMemberCache:
+    """Limits the member and voice state cache of discord.py to where the voice cog looks.
+
+    With the voice state intent, discord.py caches every member in voice across every guild.
+    This policy keeps
+
+    * voice states of every guild, since any channel may be watched later and Discord has
+      no way to list who is in a voice channel. They're much smaller than members.
+    * members only in watched channels.
+
+    Other members are evicted after their voice event is dispatched. Members of a channel
+    that becomes watched are requested again with :meth:`fill`, so streams already running
+    when a guild is set up are found right away.
+
+    :param registry: The watched channels.
+    """
+
+    def __init__(self, registry : ChannelRegistry) -> None:
+        self.registry = registry
+        self.evicted_members : int = 0
+        self.evicted_voice_states : int = 0
+
+    def keeps_member(self, channel_id : Optional[int]) -> bool:
+        return channel_id is not None and self.registry.is_watched(channel_id)
+
+    def apply(self, member : discord.Member, channel : Optional[discord.abc.Connectable]) -> None:
+        """Evicts a member after a voice event, unless the channel they're in is watched.
+
+        :param member: The member of the event.
+        :param channel: The channel the member is in after the event.
+        """
+        guild = member.guild
+        if member.id == guild._state.self_id:
+            return
+
+        # discord.py stores a voice state without channel on leaving, if it had none before.
+        if channel is None:
+            self.evict(guild, member.id)
+        elif not self.keeps_member(channel.id):
+            self.evict(guild, member.id, voice_state=False)
+
+    def evict(self, guild : discord.Guild, user_id : int, *, voice_state : bool = True) -> None:
+        """Evicts a member of the guild, and their voice state unless ``voice_state`` is ``False``."""
+        if voice_state and guild._voice_states.pop(user_id, None) is not None:
+            self.evicted_voice_states += 1
+
+        member = guild.get_member(user_id)
+        if member is not None:
+            guild._remove_member(member)
+            self.evicted_members += 1
+
+    def trim(self, guild : discord.Guild) -> int:
+        """Evicts every member of the guild that isn't kept, and voice states without channel.
+
+        :return: The number of evicted members.
+        """
+        self_id = guild._state.self_id
+        voice_states = guild._voice_states
+        evicted = 0
+
+        for user_id, state in list(voice_states.items()):
+            if user_id == self_id:
+                continue
+
+            if state.channel is None:
+                del voice_states[user_id]
+                self.evicted_voice_states += 1
+            elif self.keeps_member(state.channel.id):
+                continue
+
+            member = guild.get_member(user_id)
+            if member is not None:
+                guild._remove_member(member)
+                evicted += 1
+
+        self.evicted_members += evicted
+        return evicted
+
+    async def fill(self, channel : discord.VoiceChannel) -> int:
+        """Requests members in voice of a watched channel that were evicted before.
+
+        :return: The number of members cached again.
+        """
+        guild = channel.guild
+        missing = [
+            user_id for user_id, state in guild._voice_states.items()
+            if state.channel is not None and state.channel.id == channel.id and guild.get_member(user_id) is None
+        ]
+
+        filled = 0
+        for i in range(0, len(missing), QUERY_BATCH_SIZE):
+            batch = missing[i:i + QUERY_BATCH_SIZE]
+            try:
+                members = await guild.query_members(user_ids=batch, limit=len(batch), cache=True)
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                _log.warning("[MEMBER CACHE] Failed to request [%d] member(s) of channel [%d]", len(batch), channel.id, exc_info=e)
+                continue
+
+            filled += len(members)
+
+        if filled:
+            _log.debug("[MEMBER CACHE] Cached [%d] member(s) of channel [%d] again", filled, channel.id)
+        return filled
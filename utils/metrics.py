@@ -0,0 +1,302 @@
+from __future__ import annotations
+from aiohttp import web
+from typing import Any, Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+from .cache import LatencyHistogram, cache_registry
+
+import logging
+
+
+__all__ = (
+    "MetricsRegistry",
+    "MetricsServer",
+    "metrics",
+)
+
+_log = logging.getLogger(__name__)
+
+C = TypeVar("C")
+
+
+def _escape(value : str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names : tuple[str, ...], values : tuple[str, ...], **extra : str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value : float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric(Generic[C]):
+    """A metric family. Each combination of label values has its own child.
+
+    Children are meant to be bound once with :meth:`labels` and kept,
+    so recording a value on the hot path is a single attribute update.
+    """
+
+    type : str = "untyped"
+
+    def __init__(self, name : str, documentation : str, labels : Iterable[str] = ()) -> None:
+        self.name : str = name
+        self.documentation : str = documentation
+        self.label_names : tuple[str, ...] = tuple(labels)
+        self._children : dict[tuple[str, ...], C] = {}
+
+        if not self.label_names:
+            self._children[()] = self._new_child()
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def labels(self, *values : Any) -> C:
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def remove(self, *values : Any) -> None:
+        self._children.pop(tuple(str(value) for value in values), None)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value : int = 0
+
+    def inc(self, amount : int = 1) -> None:
+        self.value += amount
+
+
+class Counter(_Metric[_CounterChild]):
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount : int = 1) -> None:
+        self._children[()].value += amount
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.label_names, values)} {child.value}"
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self) -> None:
+        self.value : float = 0.0
+        self.function : Optional[Callable[[], float]] = None
+
+    def set(self, value : float) -> None:
+        self.value = value
+
+    def set_function(self, function : Callable[[], float]) -> None:
+        """Reads the value from ``function`` on every scrape, so nothing is recorded meanwhile."""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is None:
+            return self.value
+        return self.function()
+
+
+class Gauge(_Metric[_GaugeChild]):
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value : float) -> None:
+        self._children[()].value = value
+
+    def set_function(self, function : Callable[[], float]) -> None:
+        self._children[()].function = function
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            try:
+                value = child.get()
+            except Exception as e:
+                _log.warning("[METRICS] Failed to read gauge [%s]", self.name, exc_info=e)
+                continue
+            yield f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}"
+
+
+class Histogram(_Metric[LatencyHistogram]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name : str,
+        documentation : str,
+        labels : Iterable[str] = (),
+        buckets : Iterable[float] = LatencyHistogram.BUCKETS,
+    ) -> None:
+        self.buckets : tuple[float, ...] = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels)
+
+    def _new_child(self) -> LatencyHistogram:
+        return LatencyHistogram(self.buckets)
+
+    def observe(self, seconds : float) -> None:
+        self._children[()].observe(seconds)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            for bound, total in child.cumulative():
+                labels = _format_labels(self.label_names, values, le=_format_value(bound))
+                yield f"{self.name}_bucket{labels} {total}"
+
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class MetricsRegistry:
+    """Metrics of the process, rendered in the Prometheus text format.
+
+    Stats of every cache in :data:`utils.cache.cache_registry` are rendered as well.
+    Asking for a metric that already exists returns it, so modules can declare what they record.
+    """
+
+    def __init__(self) -> None:
+        self._metrics : dict[str, _Metric[Any]] = {}
+
+    def _get_or_create(self, kind : type[_Metric[Any]], name : str, *args : Any, **kwargs : Any) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = kind(name, *args, **kwargs)
+        elif not isinstance(metric, kind):
+            raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+        return metric
+
+    def counter(self, name : str, documentation : str, labels : Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labels)
+
+    def gauge(self, name : str, documentation : str, labels : Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labels)
+
+    def histogram(
+        self,
+        name : str,
+        documentation : str,
+        labels : Iterable[str] = (),
+        buckets : Iterable[float] = LatencyHistogram.BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labels, buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        lines.extend(self._render_caches())
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_caches() -> Iterator[str]:
+        if not cache_registry:
+            return
+
+        stats = list(cache_registry.values())
+        counters = (
+            ("hits", "Cache hits."),
+            ("misses", "Cache misses."),
+            ("evictions", "Entries evicted by size or expiry."),
+            ("invalidations", "Entries invalidated explicitly."),
+            ("load_errors", "Loads that failed or were cancelled."),
+        )
+
+        for attr, documentation in counters:
+            name = f"golive_cache_{attr}_total"
+            yield f"# HELP {name} {documentation}"
+            yield f"# TYPE {name} counter"
+            for stat in stats:
+                yield f"{name}{_format_labels(('cache',), (stat.name,))} {getattr(stat, attr)}"
+
+        yield "# HELP golive_cache_size Entries in the cache."
+        yield "# TYPE golive_cache_size gauge"
+        for stat in stats:
+            yield f"golive_cache_size{_format_labels(('cache',), (stat.name,))} {stat.size}"
+
+        yield "# HELP golive_cache_load_seconds Seconds taken to load a missed entry."
+        yield "# TYPE golive_cache_load_seconds histogram"
+        for stat in stats:
+            latency = stat.load_latency
+            for bound, total in latency.cumulative():
+                labels = _format_labels(("cache",), (stat.name,), le=_format_value(bound))
+                yield f"golive_cache_load_seconds_bucket{labels} {total}"
+
+            labels = _format_labels(("cache",), (stat.name,))
+            yield f"golive_cache_load_seconds_sum{labels} {_format_value(latency.sum)}"
+            yield f"golive_cache_load_seconds_count{labels} {latency.count}"
+
+
+# Metrics of the process. Modules declare theirs on import.
+metrics : MetricsRegistry = MetricsRegistry()
+
+
+class MetricsServer:
+    """Serves a registry at ``/metrics`` over HTTP.
+
+    :param registry: The registry to serve.
+    :param host: The address to listen on. Only local scrapers can reach the default.
+    :param port: The port to listen on.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry : MetricsRegistry = metrics, *, host : str = "127.0.0.1", port : int = 9100) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner : Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError:
+            await runner.cleanup()
+            raise
+
+        self._runner = runner
+        _log.info("[METRICS] Serving metrics at http://%s:%d/metrics", self.host, self.port)
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request : web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": self.CONTENT_TYPE})
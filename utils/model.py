@@ -1,12 +1,13 @@
 from __future__ import annotations
 from dataclasses import dataclass, field, asdict, fields, replace
 from discord.utils import format_dt
-from typing import Any, Optional, List, Mapping, TYPE_CHECKING, Iterable
+from typing import Any, Optional, List, Mapping, TYPE_CHECKING, Iterable, Iterator
 
 if TYPE_CHECKING:
     from utils import StreamConflictResolveView
     from typing_extensions import Self
 
+import asyncio
 import datetime
 import inspect
 
@@ -15,6 +16,7 @@ __all__ = (
     "ChannelID",
     "StreamLimit",
     "StreamerInfo",
+    "StreamerRegistry",
     "BasicChannelInfo",
     "ChannelInfo",
     "GoLiveGuildSetup",
@@ -67,9 +69,7 @@ class _EqualityComparable:
 
 @dataclass
 class _BaseStruct(_EqualityComparable):
-
-    def __hash__(self) -> int:
-        return self.id >> 22
+    pass
 
 
 @dataclass(unsafe_hash=True)
@@ -94,6 +94,85 @@ class StreamerInfo(_BaseStruct):
         return f"<@{self.id}>"
 
 
+class StreamerRegistry:
+    """Streamers of a channel, as a map of member id to the POSIX timestamp their stream started at.
+
+    Adding, removing and counting are O(1), and streamers are iterated in the order they started.
+    The map is allocated only when the first streamer is added,
+    since most of the watched channels have no streamers.
+    """
+
+    __slots__ = ("_started",)
+
+    def __init__(self, streamers : Iterable[tuple[int, Optional[float]]] = ()) -> None:
+        self._started : Optional[dict[int, Optional[float]]] = None
+        for streamer_id, started_at in streamers:
+            self.add(streamer_id, started_at)
+
+    def __len__(self) -> int:
+        return 0 if self._started is None else len(self._started)
+
+    def __bool__(self) -> bool:
+        return bool(self._started)
+
+    def __contains__(self, streamer_id : int) -> bool:
+        return self._started is not None and streamer_id in self._started
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(()) if self._started is None else iter(self._started)
+
+    def __repr__(self) -> str:
+        return f"<StreamerRegistry streamers={list(self)}>"
+
+    def add(self, streamer_id : int, started_at : Optional[float] = None) -> bool:
+        """Adds a streamer. The start time of an existing streamer is not overwritten.
+
+        :return: ``True`` if the streamer is newly added.
+        """
+        if self._started is None:
+            self._started = {}
+        elif streamer_id in self._started:
+            return False
+
+        self._started[streamer_id] = started_at
+        return True
+
+    def discard(self, streamer_id : int) -> bool:
+        """Removes a streamer if present.
+
+        :return: ``True`` if the streamer was removed.
+        """
+        if self._started is None:
+            return False
+        return self._started.pop(streamer_id, False) is not False
+
+    def clear(self) -> None:
+        self._started = None
+
+    def started_at(self, streamer_id : int) -> Optional[float]:
+        return None if self._started is None else self._started.get(streamer_id)
+
+    def items(self) -> Iterable[tuple[int, Optional[float]]]:
+        return () if self._started is None else self._started.items()
+
+    def copy(self) -> StreamerRegistry:
+        registry = StreamerRegistry()
+        if self._started:
+            registry._started = self._started.copy()
+        return registry
+
+    @staticmethod
+    def mention(streamer_id : int) -> str:
+        return f"<@{streamer_id}>"
+
+    @staticmethod
+    def format_started(started_at : Optional[float], style : str = "T") -> str:
+        """Same as :func:`discord.utils.format_dt`, but from a POSIX timestamp."""
+        if started_at is None:
+            return "Unknown"
+        return f"<t:{int(started_at)}:{style}>"
+
+
 @dataclass
 class GoLiveGuildSetup(_BaseStruct):
 
@@ -150,4 +229,29 @@ class BasicChannelInfo(_BaseStruct):
 @dataclass(unsafe_hash=True)
 class ChannelInfo(BasicChannelInfo):
     stream_limit : int = field(compare=False, default=1)
-    streamers : set[StreamerInfo] = field(default_factory=set, compare=False)
\ No newline at end of file
+    streamers : StreamerRegistry = field(default_factory=StreamerRegistry, compare=False)
+    lock : asyncio.Lock = field(default_factory=asyncio.Lock, compare=False, repr=False)
+
+    def reserve(self, streamer_id : int, started_at : Optional[float] = None) -> bool:
+        """Reserves a stream slot of the channel for the streamer.
+
+        This never awaits, so checking the limit and taking the slot happen atomically
+        within the event loop. Events of other channels never contend with it.
+
+        :param streamer_id: The id of the member who started streaming.
+        :param started_at: The POSIX timestamp when the stream started.
+        :return: ``True`` if the streamer holds a slot, ``False`` if the channel is full.
+        """
+        streamers = self.streamers
+        if streamer_id in streamers:
+            return True
+
+        if len(streamers) >= self.stream_limit:
+            return False
+
+        streamers.add(streamer_id, started_at)
+        return True
+
+    def release(self, streamer_id : int) -> None:
+        """Releases the stream slot held by the streamer, if any."""
+        self.streamers.discard(streamer_id)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Coroutine, Optional
+
+from .metrics import metrics
+from .tracing import tracer
+
+import asyncio
+import discord
+import logging
+import time
+
+
+__all__ = (
+    "ActionPriority",
+    "ModerationAction",
+    "ModerationExecutor",
+)
+
+_log = logging.getLogger(__name__)
+
+ActionFactory = Callable[[], Coroutine[Any, Any, Any]]
+
+# Discord shares a rate limit bucket between requests of the same route and major parameter.
+# Member edits are bucketed by guild, message sends are bucketed by channel.
+MEMBER_ROUTE = "PATCH /guilds/{guild_id}/members/{user_id}"
+MESSAGE_ROUTE = "POST /channels/{channel_id}/messages"
+
+
+class ActionPriority(IntEnum):
+    disconnect = 0
+    warn = 1
+
+
+_OUTCOMES = ("submitted", "deduplicated", "shed", "completed", "failed", "forbidden", "rate_limited")
+
+_actions = metrics.counter(
+    "golive_moderation_actions_total",
+    "Disconnects and warnings by outcome.",
+    ("action", "outcome"),
+)
+
+_event_to_disconnect_seconds = metrics.histogram(
+    "golive_event_to_disconnect_seconds",
+    "Seconds from a voice state update or a conflict deadline to the disconnect it caused.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# Bound once, so counting an outcome is a dict lookup and an addition.
+_action_counters = {
+    (priority, outcome) : _actions.labels(priority.name, outcome)
+    for priority in ActionPriority
+    for outcome in _OUTCOMES
+}
+
+
+@dataclass
+class ModerationAction:
+    priority : ActionPriority
+    guild_id : int
+    member_id : int
+    bucket : tuple[str, int]
+    factory : ActionFactory = field(compare=False, repr=False)
+    channel_id : Optional[int] = None
+    queued_at : float = field(default_factory=time.monotonic, compare=False)
+    attempts : int = field(default=0, compare=False)
+    # When the event that caused the action happened, by time.perf_counter().
+    received_at : Optional[float] = field(default=None, compare=False)
+    # The span that queued the action, so its run is traced as a part of the same trace.
+    span : Any = field(default_factory=tracer.current, compare=False, repr=False)
+
+    @property
+    def key(self) -> tuple[ActionPriority, int, int, Optional[int]]:
+        return self.priority, self.guild_id, self.member_id, self.channel_id
+
+    @classmethod
+    def disconnect(cls, member : discord.Member, factory : ActionFactory, *, received_at : Optional[float] = None) -> ModerationAction:
+        guild_id = member.guild.id
+        return cls(
+            priority=ActionPriority.disconnect,
+            guild_id=guild_id,
+            member_id=member.id,
+            bucket=(MEMBER_ROUTE, guild_id),
+            factory=factory,
+            received_at=received_at,
+        )
+
+    @classmethod
+    def warn(cls, member : discord.Member, channel : discord.abc.GuildChannel, factory : ActionFactory) -> ModerationAction:
+        return cls(
+            priority=ActionPriority.warn,
+            guild_id=member.guild.id,
+            member_id=member.id,
+            bucket=(MESSAGE_ROUTE, channel.id),
+            factory=factory,
+            channel_id=channel.id,
+        )
+
+
+class _GuildQueue:
+    __slots__ = ("disconnects", "warnings")
+
+    def __init__(self) -> None:
+        self.disconnects : deque[ModerationAction] = deque()
+        self.warnings : deque[ModerationAction] = deque()
+
+    def __len__(self) -> int:
+        return len(self.disconnects) + len(self.warnings)
+
+    def push(self, action : ModerationAction, *, front : bool = False) -> None:
+        queue = self.disconnects if action.priority is ActionPriority.disconnect else self.warnings
+        if front:
+            queue.appendleft(action)
+        else:
+            queue.append(action)
+
+    def pop(self, blocked_until : dict[tuple[str, int], float], now : float) -> tuple[Optional[ModerationAction], float]:
+        """Pops the highest priority action whose route bucket is not rate limited.
+
+        :return: The action, or ``None`` with the seconds until any bucket becomes free.
+        """
+        delay = float("inf")
+
+        for queue in (self.disconnects, self.warnings):
+            if not queue:
+                continue
+
+            until = blocked_until.get(queue[0].bucket, 0.0)
+            if until <= now:
+                return queue.popleft(), 0.0
+
+            delay = min(delay, until - now)
+
+        return None, delay
+
+
+class ModerationExecutor:
+    """Runs disconnects and warning messages outside the gateway listeners.
+
+    Each guild has its own queue where disconnects always come before warnings.
+    Guilds are served round-robin by a bounded number of workers, and a guild is served
+    by one worker at a time, so a single route bucket never receives concurrent requests.
+    Duplicated actions for the same member are ignored, and warnings are shed when the
+    executor is under backpressure.
+
+    :param max_workers: The number of actions that may run concurrently across guilds.
+    :param shed_threshold: Warnings are shed if this many actions are pending in total.
+    :param max_guild_warnings: Warnings are shed if a guild has this many pending warnings.
+    :param max_attempts: How many times an action is tried when it is rate limited.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers : int = 4,
+        shed_threshold : int = 500,
+        max_guild_warnings : int = 20,
+        max_attempts : int = 3,
+    ) -> None:
+        self.max_workers = max_workers
+        self.shed_threshold = shed_threshold
+        self.max_guild_warnings = max_guild_warnings
+        self.max_attempts = max_attempts
+
+        # Outcomes are also exported as ``golive_moderation_actions_total``.
+        self.stats : Counter[str] = Counter()
+
+        self._queues : dict[int, _GuildQueue] = {}
+        self._pending_keys : set[tuple[ActionPriority, int, int, Optional[int]]] = set()
+        self._blocked_until : dict[tuple[str, int], float] = {}
+        self._ready : asyncio.Queue[int] = asyncio.Queue()
+        self._scheduled : set[int] = set()
+        self._workers : list[asyncio.Task[None]] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_keys)
+
+    def _count(self, action : ModerationAction, outcome : str) -> None:
+        self.stats[outcome] += 1
+        _action_counters[action.priority, outcome].inc()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"golive-moderation-worker: {i}")
+            for i in range(self.max_workers)
+        ]
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        self._pending_keys.clear()
+        self._scheduled.clear()
+
+    def submit(self, action : ModerationAction) -> bool:
+        """Enqueues an action. This never awaits.
+
+        :return: ``True`` if the action is enqueued, ``False`` if it was duplicated or shed.
+        """
+        key = action.key
+        if key in self._pending_keys:
+            self._count(action, "deduplicated")
+            return False
+
+        queue = self._queues.get(action.guild_id)
+
+        if action.priority is ActionPriority.warn:
+            guild_warnings = 0 if queue is None else len(queue.warnings)
+            if self.pending >= self.shed_threshold or guild_warnings >= self.max_guild_warnings:
+                self._count(action, "shed")
+                _log.info("[MODERATION] Shed warning for member [%d] under backpressure.", action.member_id)
+                return False
+
+        if queue is None:
+            queue = self._queues[action.guild_id] = _GuildQueue()
+
+        queue.push(action)
+        self._pending_keys.add(key)
+        self._count(action, "submitted")
+        self._schedule(action.guild_id)
+        return True
+
+    def _schedule(self, guild_id : int) -> None:
+        if guild_id in self._scheduled:
+            return
+
+        self._scheduled.add(guild_id)
+        self._ready.put_nowait(guild_id)
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            guild_id = await self._ready.get()
+            queue = self._queues.get(guild_id)
+
+            if not queue:
+                self._queues.pop(guild_id, None)
+                self._scheduled.discard(guild_id)
+                continue
+
+            action, delay = queue.pop(self._blocked_until, loop.time())
+            if action is None:
+                # Every route bucket of the guild is rate limited. The guild stays scheduled.
+                loop.call_later(delay, self._ready.put_nowait, guild_id)
+                continue
+
+            try:
+                await self._execute(action, queue, loop)
+            finally:
+                if queue:
+                    self._ready.put_nowait(guild_id)
+                else:
+                    self._queues.pop(guild_id, None)
+                    self._scheduled.discard(guild_id)
+
+    async def _execute(self, action : ModerationAction, queue : _GuildQueue, loop : asyncio.AbstractEventLoop) -> None:
+        action.attempts += 1
+        span = tracer.span(
+            f"moderation.{action.priority.name}",
+            parent=action.span,
+            member_id=action.member_id,
+            attempt=action.attempts,
+            queued_ms=(time.monotonic() - action.queued_at) * 1000,
+        )
+
+        try:
+            with span:
+                await action.factory()
+
+        except discord.Forbidden:
+            # Retrying doesn't help. The factory has already told the mods.
+            self._pending_keys.discard(action.key)
+            self._count(action, "forbidden")
+            _log.info("[MODERATION] Missing permissions for %s action for member [%d].", action.priority.name, action.member_id)
+
+        except (discord.RateLimited, discord.HTTPException) as e:
+            retry_after = self._get_retry_after(e)
+            if retry_after is None or action.attempts >= self.max_attempts:
+                self._pending_keys.discard(action.key)
+                self._count(action, "failed")
+                _log.warning("[MODERATION] %s action for member [%d] failed.", action.priority.name, action.member_id, exc_info=e)
+                return
+
+            self._blocked_until[action.bucket] = loop.time() + retry_after
+            queue.push(action, front=True)
+            self._count(action, "rate_limited")
+            _log.info("[MODERATION] Route %s is rate limited for %.2fs.", action.bucket, retry_after)
+
+        except Exception as e:
+            self._pending_keys.discard(action.key)
+            self._count(action, "failed")
+            _log.warning("[MODERATION] %s action for member [%d] failed.", action.priority.name, action.member_id, exc_info=e)
+
+        else:
+            self._pending_keys.discard(action.key)
+            self._blocked_until.pop(action.bucket, None)
+            self._count(action, "completed")
+            if action.priority is ActionPriority.disconnect and action.received_at is not None:
+                _event_to_disconnect_seconds.observe(time.perf_counter() - action.received_at)
+
+    @staticmethod
+    def _get_retry_after(error : Exception) -> Optional[float]:
+        if isinstance(error, discord.RateLimited):
+            return error.retry_after
+
+        if isinstance(error, discord.HTTPException) and error.status == 429:
+            try:
+                return float(error.response.headers.get("Retry-After", 1.0))
+            except (AttributeError, TypeError, ValueError):
+                return 1.0
+
+        return None
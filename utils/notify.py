@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Any, Callable, Coroutine, Optional
+
+from .cache import ExpiringCache
+from .coalesce import EditCoalescer
+from .metrics import metrics
+from .moderation import ModerationAction, ModerationExecutor
+
+import discord
+import logging
+import time
+
+
+__all__ = (
+    "NotificationPipeline",
+)
+
+_log = logging.getLogger(__name__)
+
+# Builds the message kwargs of a notification repeated ``count`` times.
+Render = Callable[[int], dict[str, Any]]
+Send = Callable[[dict[str, Any]], Coroutine[Any, Any, Optional[discord.Message]]]
+
+_notifications = metrics.counter(
+    "golive_notifications_total",
+    "Warnings and mod alerts by what was done with them.",
+    ("kind", "outcome"),
+)
+
+
+class _Notice:
+    __slots__ = ("render", "count", "message")
+
+    def __init__(self, render : Render) -> None:
+        self.render = render
+        self.count : int = 1
+        self.message : Optional[discord.Message] = None
+
+
+class NotificationPipeline:
+    """Sends warnings and mod alerts, without letting a repeated offender multiply messages.
+
+    * The first notification of a kind for a (member, channel) is sent through the
+      moderation executor, and remembered for ``ttl`` seconds.
+    * Repeats within ``ttl`` edit that message with the number of repeats instead of
+      sending another one. The edits are coalesced, so a flapping member costs at most
+      one edit per coalescer window.
+    * At most ``channel_limit`` messages are sent per channel per ``per`` seconds.
+      Notifications beyond it are dropped.
+
+    :param executor: Runs the sends, within route rate limits.
+    :param coalescer: Collapses the edits of repeated notifications.
+    :param ttl: Seconds a notification is remembered after it was sent.
+    :param channel_limit: The number of messages sent per channel per ``per`` seconds.
+    :param per: The window of ``channel_limit``.
+    """
+
+    def __init__(
+        self,
+        executor : ModerationExecutor,
+        coalescer : EditCoalescer,
+        *,
+        ttl : float = 600.0,
+        channel_limit : int = 5,
+        per : float = 60.0,
+    ) -> None:
+        self.executor = executor
+        self.coalescer = coalescer
+        self.channel_limit = channel_limit
+        self.per = per
+
+        # (kind, member id, channel id) -> _Notice
+        self._recent : ExpiringCache = ExpiringCache(ttl)
+        self._recent.set_callback(self._on_expire)
+        # (channel id, window) -> the number of messages sent in the window
+        self._sent : ExpiringCache = ExpiringCache(per)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def notify(
+        self,
+        kind : str,
+        member : discord.Member,
+        channel : discord.abc.Messageable,
+        render : Render,
+        send : Send,
+    ) -> str:
+        """Sends a notification, or updates the one already sent. This never awaits.
+
+        :param kind: The kind of the notification. Repeats are matched per kind.
+        :param member: The member the notification is about.
+        :param channel: The channel the notification is sent to.
+        :param render: Builds the message kwargs of a notification repeated ``count`` times.
+            Repeats are rendered by the first notification's ``render``.
+        :param send: Sends the message kwargs, and returns the message if it was sent.
+        :return: ``sent``, ``collapsed``, ``capped`` or ``shed``.
+        """
+        key = (kind, member.id, channel.id)
+        notice : Optional[_Notice] = self._recent.get(key)
+
+        if notice is not None:
+            notice.count += 1
+            if notice.message is not None:
+                self.coalescer.schedule(notice.message.id, lambda: self._edit(notice))
+            # Otherwise the send still waiting renders the latest count.
+            return self._count(kind, "collapsed")
+
+        window = (channel.id, int(time.time() // self.per))
+        sent = self._sent.get(window, 0)
+        if sent >= self.channel_limit:
+            _log.debug("[NOTIFY] Dropped %s of member [%d]. Channel [%d] reached its limit.", kind, member.id, channel.id)
+            return self._count(kind, "capped")
+
+        notice = _Notice(render)
+
+        async def factory() -> None:
+            notice.message = await send(notice.render(notice.count))
+
+        if not self.executor.submit(ModerationAction.warn(member, channel, factory)):
+            return self._count(kind, "shed")
+
+        self._recent[key] = notice
+        self._sent[window] = sent + 1
+        return self._count(kind, "sent")
+
+    def _on_expire(self, key : tuple[str, int, int], notice : _Notice) -> None:
+        # The coalescer keeps the history of every message, so it's dropped with the notice.
+        if notice.message is not None:
+            self.coalescer.discard(notice.message.id)
+
+    async def _edit(self, notice : _Notice) -> None:
+        message = notice.message
+        if message is None:
+            return
+
+        try:
+            await message.edit(**notice.render(notice.count))
+        except discord.NotFound:
+            # Closed by the member. Repeats are still collapsed until the notice expires.
+            notice.message = None
+
+    @staticmethod
+    def _count(kind : str, outcome : str) -> str:
+        _notifications.labels(kind, outcome).inc()
+        return outcome
@@ -1,9 +1,12 @@
 from __future__ import annotations
 from discord.ext import commands, menus
 from typing import TYPE_CHECKING, Any, Dict, Optional, TypeVar, Iterable
+from .coalesce import EditCoalescer
+from .model import StreamerRegistry
 
 if TYPE_CHECKING:
     from .model import ChannelInfo
+    from .registry import ChannelRegistry
     from cogs.setup import Setup
 
 import asyncio
@@ -12,6 +15,7 @@ import discord
 
 __all__ = (
     "ChannelInfoPages",
+    "LiveChannelInfoPages",
 )
 
 T = TypeVar("T")
@@ -231,7 +235,10 @@ class ChannelInfoPageSource(menus.ListPageSource):
             else:
                 conflict = ''
                 if entry.streamers:
-                    streamer = ''.join(f'\n  * {s.mention} Started at {s.start_formatted}' for s in entry.streamers)
+                    streamer = ''.join(
+                        f'\n  * {StreamerRegistry.mention(streamer_id)} Started at {StreamerRegistry.format_started(started_at)}'
+                        for streamer_id, started_at in entry.streamers.items()
+                    )
                 else:
                     streamer = ""
 
@@ -264,4 +271,120 @@ class ChannelInfoPages(BasicPage):
 
     def __init__(self, entries : Iterable[ChannelInfo], *, cog: Setup , per_page: int = 2):
         super().__init__(ChannelInfoPageSource(entries, per_page=per_page), cog=cog)
-        self.embed = discord.Embed(colour=discord.Colour.blurple(), timestamp=discord.utils.utcnow())
\ No newline at end of file
+        self.embed = discord.Embed(colour=discord.Colour.blurple(), timestamp=discord.utils.utcnow())
+
+
+class LiveChannelInfoPages(ChannelInfoPages):
+    """Channel info pages that are edited as the channels of the guild change.
+
+    It subscribes to the registry, and re-renders the page on display only when a channel
+    of that page changes, or when a channel is added or removed. Edits are coalesced into
+    at most one per ``interval`` seconds. It stops when the message is deleted, or when
+    nothing has changed and nobody has used it for ``idle_timeout`` seconds.
+
+    :param registry: The watched channels.
+    :param guild_id: The guild whose channels are shown.
+    :param interval: The minimum seconds between two edits.
+    :param idle_timeout: Seconds without any change or interaction before it stops.
+    """
+
+    def __init__(
+        self,
+        registry : ChannelRegistry,
+        guild_id : int,
+        *,
+        cog : Setup,
+        per_page : int = 2,
+        interval : float = 10.0,
+        idle_timeout : float = 600.0,
+    ):
+        super().__init__(registry.get_guild_channels(guild_id), cog=cog, per_page=per_page)
+        self.timeout = idle_timeout
+        self.registry = registry
+        self.guild_id = guild_id
+        self.coalescer : EditCoalescer = EditCoalescer(window=interval)
+
+        self._channel_ids : set[int] = {entry.id for entry in self.source.entries}
+        self._stale : bool = False
+
+    def _is_on_page(self, channel_id : int) -> bool:
+        base = self.current_page * self.source.per_page
+        return any(entry.id == channel_id for entry in self.source.entries[base:base + self.source.per_page])
+
+    def _on_change(self, channel_id : int) -> None:
+        if self.is_finished() or self.message is None:
+            return
+
+        if (channel_id in self.registry) != (channel_id in self._channel_ids):
+            # Added or removed. Pages are rebuilt.
+            self._stale = True
+        elif not self._is_on_page(channel_id):
+            return
+
+        # A change keeps it from going idle.
+        self._reset_idle()
+        self.coalescer.schedule(self.message.id, self._refresh)
+
+    def _reset_idle(self) -> None:
+        # discord.py's View.timeout setter restarts the expiry of the running timeout task,
+        # so setting the same value extends it by a whole ``timeout``.
+        self.timeout = self.timeout
+
+    def _rebuild(self) -> None:
+        self.source = ChannelInfoPageSource(self.registry.get_guild_channels(self.guild_id), per_page=self.source.per_page)
+        self._channel_ids = {entry.id for entry in self.source.entries}
+        self._stale = False
+
+        self.current_page = min(self.current_page, max(0, self.source.get_max_pages() - 1))
+        self.clear_items()
+        self.fill_items()
+
+    async def _refresh(self) -> None:
+        if self.is_finished() or self.message is None:
+            return
+
+        if self._stale:
+            self._rebuild()
+
+        if not self.source.entries:
+            await self._close(content="I am not watching any voice channel in your server anymore.", embed=None)
+            return
+
+        self.embed.timestamp = discord.utils.utcnow()
+        page = await self.source.get_page(self.current_page)
+        kwargs = await self._get_kwargs_from_page(page)
+        self._update_labels(self.current_page)
+
+        try:
+            await self.message.edit(**kwargs, view=self)
+        except discord.HTTPException as e:
+            # Deleted, or the interaction token expired.
+            if e.status not in (401, 404):
+                raise
+            self.stop()
+
+    async def start(self, interaction: discord.Interaction, *, content: Optional[str] = None, ephemeral: bool = False) -> None:
+        await super().start(interaction, content=content, ephemeral=ephemeral)
+        if self.message is not None:
+            self.registry.subscribe(self.guild_id, self._on_change)
+
+    async def _close(self, **kwargs : Any) -> None:
+        self.stop()
+        try:
+            await self.message.edit(**kwargs, view=None)
+        except discord.HTTPException:
+            pass
+
+    def stop(self) -> None:
+        self.registry.unsubscribe(self.guild_id, self._on_change)
+        if self.message is not None:
+            self.coalescer.discard(self.message.id)
+        super().stop()
+
+    async def on_timeout(self) -> None:
+        self.stop()
+        try:
+            await super().on_timeout()
+        except discord.HTTPException:
+            # Deleted, or the interaction expired.
+            pass
@@ -0,0 +1,266 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, Optional, TypeVar
+
+import asyncio
+import logging
+import random
+import time
+
+
+__all__ = (
+    "DeadLetter",
+    "ReconcileQueue",
+)
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class DeadLetter(Generic[T]):
+    item : T
+    attempts : int
+    error : BaseException
+    failed_at : float
+
+
+class ReconcileQueue(Generic[T]):
+    """A work queue that processes only the items that changed.
+
+    Items are deduplicated by their key. An item put while it's being processed is
+    processed again afterward, so the latest version is never lost. If the handler raises,
+    the item is retried with jittered exponential backoff, and after ``max_attempts``
+    it's moved to :attr:`dead_letters`.
+
+    :param handler: The coroutine function that processes an item.
+    :param key: Returns the key of an item.
+    :param concurrency: The number of items processed at the same time.
+    :param max_attempts: How many times an item is tried before being dead-lettered.
+    :param base_delay: The delay before the first retry.
+    :param max_delay: The upper bound of a retry delay.
+    :param on_give_up: Called with an item when it's dead-lettered.
+    """
+
+    def __init__(
+        self,
+        handler : Callable[[T], Awaitable[Any]],
+        *,
+        key : Callable[[T], Hashable],
+        concurrency : int = 8,
+        max_attempts : int = 5,
+        base_delay : float = 1.0,
+        max_delay : float = 300.0,
+        name : str = "reconcile",
+        on_give_up : Optional[Callable[[T], Any]] = None,
+    ) -> None:
+        self.handler = handler
+        self.key = key
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.name = name
+        self.on_give_up = on_give_up
+
+        self.dead_letters : deque[DeadLetter[T]] = deque(maxlen=1000)
+        self.processed : int = 0
+        self.failed : int = 0
+        self.last_latency : float = 0.0
+        self.max_latency : float = 0.0
+        self._latency_sum : float = 0.0
+
+        self._queue : asyncio.Queue[Hashable] = asyncio.Queue()
+        self._items : dict[Hashable, T] = {}
+        self._queued_at : dict[Hashable, float] = {}
+        self._attempts : dict[Hashable, int] = {}
+        self._in_flight : set[Hashable] = set()
+        self._dirty : set[Hashable] = set()
+        self._retries : dict[Hashable, asyncio.TimerHandle] = {}
+        self._idle : asyncio.Event = asyncio.Event()
+        self._idle.set()
+        self._workers : list[asyncio.Task[None]] = []
+
+    @property
+    def depth(self) -> int:
+        """The number of items waiting to be processed, excluding the ones waiting for a retry."""
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def retrying(self) -> int:
+        return len(self._retries)
+
+    @property
+    def average_latency(self) -> float:
+        """The average seconds from putting an item to finishing it."""
+        return self._latency_sum / self.processed if self.processed else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "retrying": self.retrying,
+            "dead_letters": len(self.dead_letters),
+            "processed": self.processed,
+            "failed": self.failed,
+            "average_latency": self.average_latency,
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency,
+        }
+
+    def start(self) -> None:
+        if self._workers:
+            return
+
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"golive-{self.name}-worker: {i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def close(self) -> None:
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def put(self, item : T) -> None:
+        """Puts an item. If the item is already waiting, it's replaced with the new one."""
+        key = self.key(item)
+        self._items[key] = item
+        self._attempts.pop(key, None)
+
+        handle = self._retries.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+        if key in self._in_flight:
+            self._dirty.add(key)
+            return
+
+        if key in self._queued_at:
+            return
+
+        self._enqueue(key)
+
+    def put_many(self, items : Iterable[T]) -> None:
+        for item in items:
+            self.put(item)
+
+    def discard(self, item : T) -> None:
+        """Drops an item that is waiting or retrying. An item being processed is not interrupted."""
+        key = self.key(item)
+        self._items.pop(key, None)
+        self._attempts.pop(key, None)
+        self._dirty.discard(key)
+
+        handle = self._retries.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+    async def join(self) -> None:
+        """Waits until nothing is waiting or being processed. Items waiting for a retry are not waited."""
+        await self._idle.wait()
+
+    def _enqueue(self, key : Hashable) -> None:
+        self._queued_at.setdefault(key, time.monotonic())
+        self._idle.clear()
+        self._queue.put_nowait(key)
+
+    def _retry(self, key : Hashable) -> None:
+        self._retries.pop(key, None)
+        if key in self._items:
+            self._enqueue(key)
+
+    def _check_idle(self) -> None:
+        if self._queue.empty() and not self._in_flight:
+            self._idle.set()
+
+    def _get_delay(self, attempts : int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            key = await self._queue.get()
+            queued_at = self._queued_at.pop(key, None)
+            item = self._items.get(key)
+
+            if item is None:
+                # Discarded while waiting
+                self._check_idle()
+                continue
+
+            self._in_flight.add(key)
+            attempts = self._attempts.get(key, 0) + 1
+
+            try:
+                await self.handler(item)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                self.failed += 1
+
+                if key in self._dirty:
+                    # A newer version is processed right after this.
+                    pass
+
+                elif key not in self._items:
+                    # Discarded while being processed. Nothing is retried nor kept.
+                    self._attempts.pop(key, None)
+
+                elif attempts >= self.max_attempts:
+                    _log.warning("[%s] Giving up %s after %d attempt(s).", self.name.upper(), key, attempts, exc_info=e)
+                    self.dead_letters.append(DeadLetter(item=item, attempts=attempts, error=e, failed_at=time.time()))
+                    self._forget(key)
+                    if self.on_give_up is not None:
+                        self.on_give_up(item)
+
+                else:
+                    delay = self._get_delay(attempts)
+                    _log.info("[%s] Failed %s. Retrying in %.1fs.", self.name.upper(), key, delay, exc_info=e)
+                    self._attempts[key] = attempts
+                    self._retries[key] = loop.call_later(delay, self._retry, key)
+
+            else:
+                if queued_at is not None:
+                    latency = time.monotonic() - queued_at
+                    self.processed += 1
+                    self.last_latency = latency
+                    self.max_latency = max(self.max_latency, latency)
+                    self._latency_sum += latency
+
+                if key not in self._dirty:
+                    self._forget(key)
+
+            finally:
+                self._in_flight.discard(key)
+
+                # Put again while being processed
+                if key in self._dirty:
+                    self._dirty.discard(key)
+                    if key in self._items:
+                        self._enqueue(key)
+
+                self._check_idle()
+
+    def _forget(self, key : Hashable) -> None:
+        self._items.pop(key, None)
+        self._attempts.pop(key, None)
+
+    def get_item(self, key : Hashable) -> Optional[T]:
+        return self._items.get(key)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator, Optional
+
+from .model import ChannelInfo
+
+import logging
+
+
+__all__ = (
+    "ChannelRegistry",
+)
+
+_log = logging.getLogger(__name__)
+
+# Called with the id of a channel that was added, removed or whose status changed.
+Subscriber = Callable[[int], None]
+
+
+class ChannelRegistry:
+    """Watched channels, indexed by channel id and by guild id.
+
+    A channel is either handled, which means its events are processed, or unhandled,
+    which means it's waiting for its conflicts to be checked. It is never both.
+    Reading and iterating the registry like a mapping only sees handled channels.
+
+    Every method never awaits, so bulk operations are atomic within the event loop.
+
+    Subscribers of a guild are called whenever a channel of the guild is added or removed,
+    and when :meth:`touch` reports that the status of a channel changed.
+    """
+
+    def __init__(self) -> None:
+        self._handled : dict[int, ChannelInfo] = {}
+        self._unhandled : dict[int, ChannelInfo] = {}
+
+        # guild_id -> channel ids of the guild, both handled and unhandled.
+        self._by_guild : dict[int, dict[int, None]] = {}
+
+        # guild_id -> callbacks, in the order they subscribed.
+        self._subscribers : dict[int, list[Subscriber]] = {}
+
+    def __getitem__(self, channel_id : int) -> ChannelInfo:
+        return self._handled[channel_id]
+
+    def __contains__(self, channel_id : int) -> bool:
+        return channel_id in self._handled
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._handled)
+
+    def __len__(self) -> int:
+        return len(self._handled)
+
+    def get(self, channel_id : int, default : Optional[ChannelInfo] = None) -> Optional[ChannelInfo]:
+        return self._handled.get(channel_id, default)
+
+    def values(self) -> Iterable[ChannelInfo]:
+        return self._handled.values()
+
+    def items(self) -> Iterable[tuple[int, ChannelInfo]]:
+        return self._handled.items()
+
+    @property
+    def unhandled(self) -> tuple[ChannelInfo, ...]:
+        return tuple(self._unhandled.values())
+
+    @property
+    def unhandled_count(self) -> int:
+        return len(self._unhandled)
+
+    def has_guild(self, guild_id : int) -> bool:
+        return guild_id in self._by_guild
+
+    def is_watched(self, channel_id : int) -> bool:
+        return channel_id in self._handled or channel_id in self._unhandled
+
+    def get_any(self, channel_id : int) -> Optional[ChannelInfo]:
+        """Gets a channel whether it's handled or not."""
+        return self._handled.get(channel_id) or self._unhandled.get(channel_id)
+
+    def get_guild_channels(self, guild_id : int, *, unhandled : bool = False) -> list[ChannelInfo]:
+        """Gets channels of the guild in O(channels in guild).
+
+        :param guild_id: The id of the guild.
+        :param unhandled: Whether unhandled channels are included.
+        """
+        channel_ids = self._by_guild.get(guild_id)
+        if not channel_ids:
+            return []
+
+        result = []
+        for channel_id in channel_ids:
+            info = self._handled.get(channel_id)
+            if info is None and unhandled:
+                info = self._unhandled.get(channel_id)
+            if info is not None:
+                result.append(info)
+        return result
+
+    def subscribe(self, guild_id : int, callback : Subscriber) -> None:
+        """Calls ``callback`` with the channel id whenever a channel of the guild changes.
+        It must not await.
+        """
+        self._subscribers.setdefault(guild_id, []).append(callback)
+
+    def unsubscribe(self, guild_id : int, callback : Subscriber) -> None:
+        callbacks = self._subscribers.get(guild_id)
+        if callbacks is None or callback not in callbacks:
+            return
+
+        callbacks.remove(callback)
+        if not callbacks:
+            del self._subscribers[guild_id]
+
+    def touch(self, channel_id : int) -> None:
+        """Reports that the streamers or the conflict of a channel changed."""
+        info = self.get_any(channel_id)
+        if info is not None:
+            self._notify(info.guild_id, channel_id)
+
+    def _notify(self, guild_id : int, channel_id : int) -> None:
+        callbacks = self._subscribers.get(guild_id)
+        if not callbacks:
+            return
+
+        for callback in tuple(callbacks):
+            try:
+                callback(channel_id)
+            except Exception as e:
+                _log.error("[REGISTRY] Subscriber of guild [%d] failed", guild_id, exc_info=e)
+
+    def add(self, info : ChannelInfo) -> None:
+        """Adds a channel as handled. If the channel was unhandled, it's moved."""
+        channel_id = info.id
+        self._unhandled.pop(channel_id, None)
+        self._handled[channel_id] = info
+        self._by_guild.setdefault(info.guild_id, {})[channel_id] = None
+        self._notify(info.guild_id, channel_id)
+
+    def add_unhandled(self, info : ChannelInfo) -> None:
+        """Adds a channel as unhandled. If the channel was handled, it's moved."""
+        channel_id = info.id
+        self._handled.pop(channel_id, None)
+        self._unhandled[channel_id] = info
+        self._by_guild.setdefault(info.guild_id, {})[channel_id] = None
+        self._notify(info.guild_id, channel_id)
+
+    def bulk_add(self, guild_id : int, infos : Iterable[ChannelInfo], *, handled : bool = False) -> None:
+        """Adds channels of a guild at once. Nothing is added if any channel belongs to other guild."""
+        infos = list(infos)
+        if any(info.guild_id != guild_id for info in infos):
+            raise ValueError(f"All channels must belong to guild [{guild_id}]")
+
+        func = self.add if handled else self.add_unhandled
+        for info in infos:
+            func(info)
+
+    def remove(self, channel_id : int) -> Optional[ChannelInfo]:
+        """Removes a channel whether it's handled or not."""
+        info = self._handled.pop(channel_id, None) or self._unhandled.pop(channel_id, None)
+        if info is None:
+            return None
+
+        channel_ids = self._by_guild.get(info.guild_id)
+        if channel_ids is not None:
+            channel_ids.pop(channel_id, None)
+            if not channel_ids:
+                del self._by_guild[info.guild_id]
+
+        self._notify(info.guild_id, channel_id)
+        return info
+
+    def bulk_remove(self, channel_ids : Iterable[int]) -> list[ChannelInfo]:
+        return [info for channel_id in channel_ids if (info := self.remove(channel_id)) is not None]
+
+    def remove_guild(self, guild_id : int) -> list[ChannelInfo]:
+        """Removes every channel of the guild in O(channels in guild)."""
+        channel_ids = self._by_guild.pop(guild_id, None)
+        if not channel_ids:
+            return []
+
+        removed = []
+        for channel_id in channel_ids:
+            info = self._handled.pop(channel_id, None) or self._unhandled.pop(channel_id, None)
+            if info is not None:
+                removed.append(info)
+                self._notify(guild_id, channel_id)
+        return removed
@@ -0,0 +1,159 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional
+
+import logging
+import math
+import os
+import struct
+import time
+
+
+__all__ = (
+    "ChannelSnapshot",
+    "SessionSnapshot",
+)
+
+_log = logging.getLogger(__name__)
+
+# The file is a header followed by fixed size records, so it can be read with mmap as well.
+#   header   : magic, version, written_at, channel count
+#   channel  : channel id, guild id, conflict deadline, conflict message id, streamer count
+#   streamer : member id, started_at
+# Unknown times are stored as NaN and a missing message id as 0.
+_MAGIC = b"GGSS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHdI")
+_CHANNEL = struct.Struct("<QQdQH")
+_STREAMER = struct.Struct("<Qd")
+
+
+def _pack_time(value : Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def _unpack_time(value : float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+@dataclass
+class ChannelSnapshot:
+    id : int
+    guild_id : int
+    streamers : list[tuple[int, Optional[float]]] = field(default_factory=list)
+    conflict_deadline : Optional[float] = None
+    conflict_message_id : Optional[int] = None
+
+    def started_at(self, streamer_id : int) -> Optional[float]:
+        for member_id, started_at in self.streamers:
+            if member_id == streamer_id:
+                return started_at
+        return None
+
+
+@dataclass
+class SessionSnapshot:
+    """Streamers and conflict deadlines of channels, persisted across restarts.
+
+    Times are POSIX timestamps, since they must stay valid in another process.
+    """
+
+    channels : dict[int, ChannelSnapshot] = field(default_factory=dict)
+    written_at : float = field(default_factory=time.time)
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def get(self, channel_id : int) -> Optional[ChannelSnapshot]:
+        return self.channels.get(channel_id)
+
+    def pop(self, channel_id : int) -> Optional[ChannelSnapshot]:
+        return self.channels.pop(channel_id, None)
+
+    def add(self, channel : ChannelSnapshot) -> None:
+        self.channels[channel.id] = channel
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.written_at
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_MAGIC, _VERSION, self.written_at, len(self.channels))]
+
+        for channel in self.channels.values():
+            parts.append(_CHANNEL.pack(
+                channel.id,
+                channel.guild_id,
+                _pack_time(channel.conflict_deadline),
+                channel.conflict_message_id or 0,
+                len(channel.streamers),
+            ))
+            parts.extend(_STREAMER.pack(member_id, _pack_time(started_at)) for member_id, started_at in channel.streamers)
+
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data : bytes) -> SessionSnapshot:
+        """Raises :exc:`ValueError` if ``data`` is not a valid snapshot."""
+        try:
+            magic, version, written_at, count = _HEADER.unpack_from(data, 0)
+        except struct.error as e:
+            raise ValueError("Snapshot is truncated") from e
+
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Unsupported snapshot (magic={magic!r}, version={version})")
+
+        snapshot = cls(written_at=written_at)
+        offset = _HEADER.size
+
+        try:
+            for _ in range(count):
+                channel_id, guild_id, deadline, message_id, streamer_count = _CHANNEL.unpack_from(data, offset)
+                offset += _CHANNEL.size
+
+                streamers = []
+                for _ in range(streamer_count):
+                    member_id, started_at = _STREAMER.unpack_from(data, offset)
+                    offset += _STREAMER.size
+                    streamers.append((member_id, _unpack_time(started_at)))
+
+                snapshot.add(ChannelSnapshot(
+                    id=channel_id,
+                    guild_id=guild_id,
+                    streamers=streamers,
+                    conflict_deadline=_unpack_time(deadline),
+                    conflict_message_id=message_id or None,
+                ))
+
+        except struct.error as e:
+            raise ValueError("Snapshot is truncated") from e
+
+        return snapshot
+
+    def dump(self, path : str) -> None:
+        """Writes the snapshot atomically. This blocks, so run it in a thread."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.to_bytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path : str) -> Optional[SessionSnapshot]:
+        """Reads a snapshot. This blocks, so run it in a thread.
+
+        :return: ``None`` if there is no snapshot or it is corrupted.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            return cls.from_bytes(data)
+        except ValueError as e:
+            _log.warning("[SNAPSHOT] Ignoring corrupted snapshot [%s]", path, exc_info=e)
+            return None
@@ -0,0 +1,5 @@
+from .base import *
+from .memory import *
+from .sqlite import *
+
+# .mongo needs motor, so it's imported by create_backend only when it's chosen.
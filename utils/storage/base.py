@@ -0,0 +1,120 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, ClassVar, Iterable, Optional
+
+from ..writebehind import GuildWrite, _set_path, _unset_path
+
+import copy
+import importlib
+
+
+__all__ = (
+    "StorageBackend",
+    "apply_write",
+    "create_backend",
+    "get_shard_id",
+)
+
+# Backends by name -> (module, class). A module is imported only when its backend is created,
+# so the drivers of the other backends don't have to be installed.
+_BACKENDS : dict[str, tuple[str, str]] = {
+    "memory" : ("memory", "MemoryBackend"),
+    "mongo" : ("mongo", "MongoBackend"),
+    "sqlite" : ("sqlite", "SQLiteBackend"),
+}
+
+# A guild id is a snowflake. The bits above this many are its timestamp, which decides its shard.
+SHARD_ID_SHIFT = 22
+
+
+def get_shard_id(guild_id : int, shard_count : int) -> int:
+    """The shard which a guild belongs to. See https://discord.com/developers/docs/topics/gateway#sharding"""
+    return (guild_id >> SHARD_ID_SHIFT) % shard_count
+
+
+def apply_write(document : Optional[dict[str, Any]], write : GuildWrite) -> Optional[dict[str, Any]]:
+    """Applies a write to a document the way MongoDB does, for backends that store documents as is.
+
+    :param document: The current document, or ``None`` if it doesn't exist. It's not modified.
+    :return: The new document, or ``None`` if it doesn't exist afterward.
+    """
+    if write.delete:
+        return None
+
+    if write.replace:
+        return {**copy.deepcopy(write.set_fields), "id" : write.guild_id}
+
+    if document is None:
+        if not write.upsert:
+            return None
+        document = {"id" : write.guild_id}
+    else:
+        document = copy.deepcopy(document)
+
+    for path in write.unset_fields:
+        _unset_path(document, path)
+
+    for path, value in write.set_fields.items():
+        _set_path(document, path, copy.deepcopy(value))
+
+    return document
+
+
+class StorageBackend(ABC):
+    """Where guild setups are stored.
+
+    A setup is stored as a document shaped like :meth:`GoLiveGuildSetup.transform_to_mongo`,
+    and every method returns a document that the caller may modify.
+    """
+
+    name : ClassVar[str]
+
+    async def connect(self) -> None:
+        """Checks the storage is reachable. Raises :exc:`RuntimeError` if it's not."""
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def find_all(
+        self,
+        shard_ids : Optional[Iterable[int]] = None,
+        shard_count : Optional[int] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Setups of every guild, or only of the guilds of ``shard_ids`` if it's given.
+
+        :param shard_ids: The shards whose guilds are returned.
+        :param shard_count: The total number of shards. Required if ``shard_ids`` is given.
+        """
+
+    @abstractmethod
+    async def find_one(self, guild_id : int) -> Optional[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def delete_many(self, guild_ids : Iterable[int]) -> int:
+        """Deletes setups of guilds.
+
+        :return: The number of deleted setups.
+        """
+
+    @abstractmethod
+    async def bulk_write(self, writes : dict[int, GuildWrite]) -> dict[int, BaseException]:
+        """Writes a write of each guild once, in any order.
+
+        :return: Errors of the guilds whose write failed.
+        """
+
+
+def create_backend(kind : str, **options : Any) -> StorageBackend:
+    """Creates a backend by its name, which is one of ``mongo``, ``memory`` and ``sqlite``.
+
+    :param options: Passed to the constructor of the backend.
+    """
+    if kind not in _BACKENDS:
+        names = ", ".join(_BACKENDS)
+        raise ValueError(f"Unknown storage backend {kind!r}. Choose one of {names}.")
+
+    module, name = _BACKENDS[kind]
+    cls = getattr(importlib.import_module(f"{__package__}.{module}"), name)
+    return cls(**options)
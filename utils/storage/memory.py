@@ -0,0 +1,63 @@
+from __future__ import annotations
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from ..writebehind import GuildWrite
+from .base import StorageBackend, apply_write, get_shard_id
+
+import asyncio
+import copy
+
+
+__all__ = (
+    "MemoryBackend",
+)
+
+
+class MemoryBackend(StorageBackend):
+    """Keeps setups in memory, for benchmarks and load tests. Nothing is persisted.
+
+    :param documents: Setups stored from the start.
+    :param latency: Seconds added to every operation, to imitate a round trip.
+    """
+
+    name = "memory"
+
+    def __init__(self, documents : Iterable[dict[str, Any]] = (), *, latency : float = 0.0) -> None:
+        self.latency = latency
+        self.documents : dict[int, dict[str, Any]] = {doc["id"] : copy.deepcopy(doc) for doc in documents}
+
+    async def _round_trip(self) -> None:
+        await asyncio.sleep(self.latency)
+
+    async def find_all(
+        self,
+        shard_ids : Optional[Iterable[int]] = None,
+        shard_count : Optional[int] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        await self._round_trip()
+        shards = None if shard_ids is None else frozenset(shard_ids)
+
+        for guild_id, document in list(self.documents.items()):
+            if shards is None or get_shard_id(guild_id, shard_count) in shards:
+                yield copy.deepcopy(document)
+
+    async def find_one(self, guild_id : int) -> Optional[dict[str, Any]]:
+        await self._round_trip()
+        document = self.documents.get(guild_id)
+        return None if document is None else copy.deepcopy(document)
+
+    async def delete_many(self, guild_ids : Iterable[int]) -> int:
+        await self._round_trip()
+        return sum(self.documents.pop(guild_id, None) is not None for guild_id in guild_ids)
+
+    async def bulk_write(self, writes : dict[int, GuildWrite]) -> dict[int, BaseException]:
+        await self._round_trip()
+
+        for guild_id, write in writes.items():
+            document = apply_write(self.documents.get(guild_id), write)
+            if document is None:
+                self.documents.pop(guild_id, None)
+            else:
+                self.documents[guild_id] = document
+
+        return {}
@@ -0,0 +1,269 @@
+from __future__ import annotations
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+from pymongo.operations import DeleteOne, IndexModel, ReplaceOne, UpdateOne
+from typing import Any, AsyncIterator, Iterable, Optional, Union
+
+from ..writebehind import GuildWrite
+from .base import SHARD_ID_SHIFT, StorageBackend
+
+import logging
+
+
+__all__ = (
+    "MongoBackend",
+    "shard_filter",
+    "to_mongo_operation",
+)
+
+_log = logging.getLogger(__name__)
+
+MongoOperations = Union[DeleteOne, ReplaceOne, UpdateOne, ]
+
+# Indexes of the setup collection, created at startup if they're missing. An existing index
+# that differs is only reported, never dropped. A lookup by another field adds its index here.
+INDEXES : tuple[IndexModel, ...] = (
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+)
+
+# Filters of the queries run on every command or write. Their plans are checked at startup.
+HOT_QUERIES : dict[str, dict[str, Any]] = {
+    "find_one": {"id" : 0},
+    "update_one": {"id" : 0},
+    "delete_many": {"id" : {"$in" : [0, 1]}},
+}
+
+_DUPLICATE_KEY = 11000
+# At most this many duplicated guild ids are logged.
+_MAX_LOGGED_DUPLICATES = 50
+
+
+def to_mongo_operation(write : GuildWrite) -> MongoOperations:
+    query = {"id" : write.guild_id}
+
+    if write.delete:
+        return DeleteOne(query)
+
+    if write.replace:
+        return ReplaceOne(query, {**write.set_fields, "id" : write.guild_id}, upsert=True)
+
+    update = {}
+    if write.set_fields:
+        update["$set"] = write.set_fields
+    if write.unset_fields:
+        update["$unset"] = dict.fromkeys(write.unset_fields, "")
+    return UpdateOne(query, update, upsert=write.upsert)
+
+
+def shard_filter(shard_ids : Iterable[int], shard_count : int) -> dict[str, Any]:
+    """A filter matching setups of the guilds of ``shard_ids``.
+
+    There is no bit shift in a query, so ``id >> 22`` is computed as a division of ``id``
+    without its low bits. That quotient is below 2 ** 53, so it's exact even as a double.
+    """
+    divisor = 1 << SHARD_ID_SHIFT
+    high = {"$subtract" : ["$id", {"$mod" : ["$id", divisor]}]}
+    shard = {"$mod" : [{"$divide" : [high, divisor]}, shard_count]}
+    return {"$expr" : {"$in" : [shard, list(shard_ids)]}}
+
+
+def _get_stages(plan : dict[str, Any]) -> Iterable[str]:
+    # A plan is a tree of stages. Newer servers wrap it in ``queryPlan``.
+    if "queryPlan" in plan:
+        plan = plan["queryPlan"]
+
+    stage = plan.get("stage")
+    if stage is not None:
+        yield stage
+
+    if "inputStage" in plan:
+        yield from _get_stages(plan["inputStage"])
+
+    for child in plan.get("inputStages", ()):
+        yield from _get_stages(child)
+
+
+class MongoBackend(StorageBackend):
+    """Keeps setups in the ``setup.guild`` collection of MongoDB.
+
+    Missing indexes are created on connect, and the plans of the hot queries are checked.
+
+    :param uri: The connection string of MongoDB.
+    :param remove_duplicates: Whether duplicated setups are removed on connect, keeping the
+        latest one of each guild, if they prevent the unique index from being built.
+    """
+
+    name = "mongo"
+
+    def __init__(
+        self,
+        uri : str,
+        *,
+        database : str = "setup",
+        collection : str = "guild",
+        remove_duplicates : bool = False,
+    ) -> None:
+        self.remove_duplicates = remove_duplicates
+        self.__client = AsyncIOMotorClient(uri)
+        self._guild_setup = self.__client[database][collection]
+
+    async def connect(self) -> None:
+        _log.info("Mongo Client Test Started")
+
+        attempt = 1
+        while attempt <= 3:
+            response = await self.__client.admin.command("ping")
+
+            if response.get("ok") == 1:
+                _log.info("Mongo Client Test Passed.")
+                try:
+                    await self.ensure_indexes()
+                except PyMongoError as e:
+                    # The bot still works without them, only slower.
+                    _log.error("[DB INDEX] Failed to reconcile indexes", exc_info=e)
+                await self.verify_query_plans()
+                return
+
+            attempt += 1
+
+        raise RuntimeError("Failed to connect to MongoDB")
+
+    async def ensure_indexes(self) -> None:
+        """Creates the indexes of :data:`INDEXES` that are missing.
+
+        Indexes that differ from their definition or were created by hand are left in place,
+        and setups are only removed if ``remove_duplicates`` is set.
+        """
+        existing = {index["name"] : index async for index in self._guild_setup.list_indexes()}
+
+        for model in INDEXES:
+            spec = model.document
+            name = spec["name"]
+            keys = list(spec["key"].items())
+
+            current = existing.get(name)
+            if current is not None:
+                options = {k : v for k, v in spec.items() if k not in ("key", "name")}
+                same_keys = list(current["key"].items()) == keys
+                same_options = all(current.get(k) == v for k, v in options.items())
+                if not (same_keys and same_options):
+                    _log.warning("[DB INDEX] Index [%s] differs from its definition %s. Drop it to rebuild it.", name, spec)
+                continue
+
+            # Mongo refuses two indexes on the same keys.
+            others = [index["name"] for index in existing.values() if list(index["key"].items()) == keys]
+            if others:
+                _log.warning("[DB INDEX] Index [%s] is not created, since [%s] has the same keys.", name, ", ".join(others))
+                continue
+
+            try:
+                await self._guild_setup.create_indexes([model])
+            except OperationFailure as e:
+                if e.code != _DUPLICATE_KEY:
+                    raise
+
+                # Concurrent upserts without the unique index could have duplicated setups.
+                duplicates = await self.find_duplicates()
+                if not self.remove_duplicates:
+                    _log.warning(
+                        "[DB INDEX] Index [%s] is not created, since [%d] guild(s) have duplicated setups : %s. "
+                        "Set MONGO_REMOVE_DUPLICATES=1 to keep only the latest setup of each.",
+                        name, len(duplicates), ", ".join(map(str, duplicates[:_MAX_LOGGED_DUPLICATES])),
+                    )
+                    continue
+
+                removed = await self.delete_duplicates()
+                _log.warning("[DB INDEX] Removed [%d] duplicated setup(s) of [%d] guild(s) to build index [%s]", removed, len(duplicates), name)
+                await self._guild_setup.create_indexes([model])
+
+            _log.info("[DB INDEX] Created index [%s]", name)
+
+        unknown = existing.keys() - {model.document["name"] for model in INDEXES} - {"_id_"}
+        if unknown:
+            _log.info("[DB INDEX] Found index(es) not managed by the bot : %s", ", ".join(sorted(unknown)))
+
+    def _duplicates_pipeline(self) -> list[dict[str, Any]]:
+        return [
+            {"$sort" : {"_id" : DESCENDING}},
+            {"$group" : {"_id" : "$id", "ids" : {"$push" : "$_id"}, "count" : {"$sum" : 1}}},
+            {"$match" : {"count" : {"$gt" : 1}}},
+        ]
+
+    async def find_duplicates(self) -> list[int]:
+        """Guilds with more than one setup."""
+        return [group["_id"] async for group in self._guild_setup.aggregate(self._duplicates_pipeline())]
+
+    async def delete_duplicates(self) -> int:
+        """Keeps only the latest setup of each guild.
+
+        :return: The number of removed setups.
+        """
+        to_remove = []
+        async for group in self._guild_setup.aggregate(self._duplicates_pipeline()):
+            to_remove.extend(group["ids"][1:])
+
+        if not to_remove:
+            return 0
+
+        result = await self._guild_setup.delete_many({"_id" : {"$in" : to_remove}})
+        return result.deleted_count
+
+    async def verify_query_plans(self) -> None:
+        """Warns about hot queries that would scan the whole collection."""
+        for name, query in HOT_QUERIES.items():
+            try:
+                plan = await self._guild_setup.find(query).explain()
+            except PyMongoError as e:
+                _log.warning("[DB PLAN] Failed to explain query [%s]", name, exc_info=e)
+                continue
+
+            stages = set(_get_stages(plan.get("queryPlanner", {}).get("winningPlan", {})))
+            if "COLLSCAN" in stages:
+                _log.warning("[DB PLAN] Query [%s] %s falls back to a collection scan.", name, query)
+            else:
+                _log.debug("[DB PLAN] Query [%s] uses stages %s", name, sorted(stages))
+
+    async def close(self) -> None:
+        if self.__client is not None:
+            self.__client.close()
+
+    async def find_all(
+        self,
+        shard_ids : Optional[Iterable[int]] = None,
+        shard_count : Optional[int] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        query = {} if shard_ids is None else shard_filter(shard_ids, shard_count)
+        async for data in self._guild_setup.find(query, {"_id" : 0}):
+            yield data
+
+    async def find_one(self, guild_id : int) -> Optional[dict[str, Any]]:
+        return await self._guild_setup.find_one({"id" : guild_id}, {"_id" : 0})
+
+    async def delete_many(self, guild_ids : Iterable[int]) -> int:
+        result = await self._guild_setup.delete_many({"id": {"$in": list(guild_ids)}})
+        return result.deleted_count if result.acknowledged else 0
+
+    async def bulk_write(self, writes : dict[int, GuildWrite]) -> dict[int, BaseException]:
+        if not writes:
+            return {}
+
+        guild_ids = list(writes.keys())
+        errors : dict[int, BaseException] = {}
+
+        try:
+            await self._guild_setup.bulk_write([to_mongo_operation(w) for w in writes.values()], ordered=False)
+
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                # Nothing is known to be durable.
+                errors = dict.fromkeys(guild_ids, e)
+            else:
+                # The index of an error points to the failed operation.
+                for error in e.details["writeErrors"]:
+                    errors[guild_ids[error["index"]]] = e
+
+        except PyMongoError as e:
+            errors = dict.fromkeys(guild_ids, e)
+
+        return errors
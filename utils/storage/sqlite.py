@@ -0,0 +1,134 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, TypeVar
+
+from ..writebehind import GuildWrite
+from .base import SHARD_ID_SHIFT, StorageBackend, apply_write
+
+import asyncio
+import json
+import logging
+import sqlite3
+
+
+__all__ = (
+    "SQLiteBackend",
+)
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_setup (
+    id INTEGER PRIMARY KEY,
+    document TEXT NOT NULL
+)
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """Keeps setups in a SQLite file, for small deployments.
+
+    Every query runs in a single dedicated thread, since a connection must not be
+    shared between threads and the event loop must not be blocked.
+
+    :param path: The path of the database file.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path : str = "guardian.db") -> None:
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="golive-sqlite")
+        self._connection : Optional[sqlite3.Connection] = None
+
+    async def _run(self, func : Callable[..., T], *args : Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> None:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(_SCHEMA)
+        connection.commit()
+        self._connection = connection
+
+    async def connect(self) -> None:
+        try:
+            await self._run(self._connect)
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to open SQLite database {self.path!r}") from e
+
+        _log.info("Opened SQLite database [%s]", self.path)
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def close(self) -> None:
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _find_all(self, shard_ids : Optional[list[int]], shard_count : Optional[int]) -> list[dict[str, Any]]:
+        if shard_ids is None:
+            rows = self._connection.execute("SELECT document FROM guild_setup").fetchall()
+        else:
+            placeholders = ", ".join("?" * len(shard_ids))
+            rows = self._connection.execute(
+                f"SELECT document FROM guild_setup WHERE ((id >> {SHARD_ID_SHIFT}) % ?) IN ({placeholders})",
+                (shard_count, *shard_ids),
+            ).fetchall()
+        return [json.loads(document) for document, in rows]
+
+    async def find_all(
+        self,
+        shard_ids : Optional[Iterable[int]] = None,
+        shard_count : Optional[int] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        shard_ids = None if shard_ids is None else list(shard_ids)
+        for document in await self._run(self._find_all, shard_ids, shard_count):
+            yield document
+
+    def _find_one(self, guild_id : int) -> Optional[dict[str, Any]]:
+        row = self._connection.execute("SELECT document FROM guild_setup WHERE id = ?", (guild_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    async def find_one(self, guild_id : int) -> Optional[dict[str, Any]]:
+        return await self._run(self._find_one, guild_id)
+
+    def _delete_many(self, guild_ids : list[int]) -> int:
+        with self._connection:
+            cursor = self._connection.executemany("DELETE FROM guild_setup WHERE id = ?", [(i,) for i in guild_ids])
+            return cursor.rowcount
+
+    async def delete_many(self, guild_ids : Iterable[int]) -> int:
+        return await self._run(self._delete_many, list(guild_ids))
+
+    def _bulk_write(self, writes : dict[int, GuildWrite]) -> dict[int, BaseException]:
+        connection = self._connection
+
+        try:
+            # A batch is a single transaction, so it's written entirely or not at all.
+            with connection:
+                for guild_id, write in writes.items():
+                    row = connection.execute("SELECT document FROM guild_setup WHERE id = ?", (guild_id,)).fetchone()
+                    document = apply_write(None if row is None else json.loads(row[0]), write)
+
+                    if document is None:
+                        connection.execute("DELETE FROM guild_setup WHERE id = ?", (guild_id,))
+                    else:
+                        connection.execute(
+                            "INSERT INTO guild_setup (id, document) VALUES (?, ?) "
+                            "ON CONFLICT(id) DO UPDATE SET document = excluded.document",
+                            (guild_id, json.dumps(document)),
+                        )
+
+        except sqlite3.Error as e:
+            return dict.fromkeys(writes, e)
+
+        return {}
+
+    async def bulk_write(self, writes : dict[int, GuildWrite]) -> dict[int, BaseException]:
+        return await self._run(self._bulk_write, writes)
@@ -1,4 +1,6 @@
 from __future__ import annotations
+from typing import Optional
+from utils.model import StreamerRegistry
 
 import discord
 import re
@@ -6,6 +8,7 @@ import re
 
 __all__ = (
     "ViewCloseDynamicButton",
+    "StreamDetailsDynamicButton",
 )
 
 
@@ -44,4 +47,66 @@ class ViewCloseDynamicButton(
         
         view = self.view
         if view is not None:
-            view.stop()
\ No newline at end of file
+            view.stop()
+
+
+class StreamDetailsDynamicButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    # Warnings sent before the channel was encoded have no channel id.
+    template=r'streamer_info:details:(?P<id>[0-9]+)(?::(?P<channel>[0-9]+))?'
+):
+    """Shows the streamers of the channel a member was disconnected from.
+
+    Streamers are looked up when pressed, so nothing is kept per warning.
+    """
+
+    def __init__(self, owner_id : int = 0, channel_id : int = 0):
+        super().__init__(
+            discord.ui.Button(
+                label="View Stream Info",
+                style=discord.ButtonStyle.gray,
+                custom_id=f"streamer_info:details:{owner_id}:{channel_id}"
+            )
+        )
+
+        self.owner_id = owner_id
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str], /):
+        return cls(int(match['id']), int(match['channel'] or 0))
+
+    @staticmethod
+    def get_embed(stream_details: Optional[StreamerRegistry] = None) -> discord.Embed:
+        embed = discord.Embed(title="Stream Details", color=discord.Color.blurple())
+        embed.set_footer(text="If I failed to manage streamer's start time, then it shows 'Unknown'. However, I'm sure these streamers' are earlier than yours.")
+
+        if not stream_details:
+            embed.description = "## Failed to get stream details"
+            return embed
+
+        for streamer_id, started_at in stream_details.items():
+            started = StreamerRegistry.format_started(started_at)
+            embed.add_field(name=f"Started : {started}", value=StreamerRegistry.mention(streamer_id), inline=True)
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if not self.owner_id or interaction.user.id == self.owner_id:
+            return True
+
+        await interaction.response.send_message("This message is not granted for you", ephemeral=True)
+        return False
+
+    async def callback(self, interaction : discord.Interaction):
+        voice_cog = getattr(interaction.client, "voice_cog", None)
+        info = None if voice_cog is None else voice_cog.channel_info.get(self.channel_id)
+        embed = self.get_embed(None if info is None else info.streamers)
+
+        self.item.disabled = True
+        view = discord.ui.View(timeout=None)
+        view.add_item(self)
+        view.add_item(ViewCloseDynamicButton(self.owner_id))
+        # A stopped view is not stored by the client. Dynamic items still receive interactions.
+        view.stop()
+
+        await interaction.response.edit_message(content=None, view=view, embed=embed)
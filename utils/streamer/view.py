@@ -2,75 +2,66 @@ from __future__ import annotations
 from discord import ui, Interaction
 from discord.ui import Item
 from discord.utils import format_dt, utcnow
+from functools import partial
 from typing import Any, Collection, Optional, Tuple
-from utils.model import StreamerInfo
+from utils.coalesce import EditCoalescer
+from utils.deadline import DeadlineScheduler
+from utils.moderation import ModerationAction, ModerationExecutor
 from utils.util import get_mentioned_streamers
 from utils.exception import SpawnViewFailed
-from .button import ViewCloseDynamicButton
+from utils.tracing import tracer, traced
+from .button import StreamDetailsDynamicButton, ViewCloseDynamicButton
 
 import asyncio
 import datetime
 import discord
 import logging
+import random
+import time
 
 
 __all__ = (
     "StreamConflictResolveView",
-    "StreamerView"
+    "StreamerWarning",
 )
 
 
 _log = logging.getLogger(__name__)
 
 
-class StreamerView(ui.View):
-    def __init__(
-        self,
-        member: Optional[discord.Member] = None,
-        stream_details: Optional[Collection[StreamerInfo]] = None,
-        channel: Optional[discord.VoiceChannel] = None,
-    ):
-        super().__init__(timeout=None)
-        self.clear_items()
-        self.message : Optional[discord.Message] = None
-        self.stream_embed: discord.Embed = self._get_embed(stream_details)
+class StreamerWarning:
+    """A warning sent to a member who was disconnected for exceeding the stream limit.
+
+    Its buttons are dynamic items which carry the member and the channel in their custom ids,
+    so nothing is kept once it's sent, and they keep working after a restart.
+
+    :param member: The member who was disconnected.
+    :param channel: The channel the member was disconnected from. The warning is sent there.
+    """
 
+    def __init__(self, member: discord.Member, channel: discord.VoiceChannel):
         self.channel = channel
-        self.member = member
-        self.owner_id: int = member.id if member else 0
-        self.view_stream_info.custom_id = f"streamer_info:details:{self.owner_id}"
-
-        self.close = ViewCloseDynamicButton(self.owner_id)
-        self.add_item(self.view_stream_info)
-        self.add_item(self.close)
-
-    @staticmethod
-    def _get_embed(stream_details: Collection[StreamerInfo] = None) -> discord.Embed:
-        embed = discord.Embed(title="Stream Details", color=discord.Color.blurple())
-        embed.set_footer(text="If I failed to manage streamer's start time, then it shows 'Unknown'. However, I'm sure these streamers' are earlier than yours.")
-        
-        if not stream_details:
-            embed.description = "## Failed to get stream details"
-            return embed
-
-        for detail in stream_details:
-            embed.add_field(name=f"Started : {detail.start_formatted}", value=detail.mention, inline=True)
-        return embed
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if self.owner_id is None or interaction.user.id == self.owner_id:
-            return True
-
-        await interaction.response.send_message("This message is not granted for you", ephemeral=True)
-        return False
-
-    async def send(self, **kwargs):
+        self.owner_id: int = member.id
+        self.message: Optional[discord.Message] = None
+
+    def to_view(self) -> ui.View:
+        view = ui.View(timeout=None)
+        view.add_item(StreamDetailsDynamicButton(self.owner_id, self.channel.id))
+        view.add_item(ViewCloseDynamicButton(self.owner_id))
+        # A stopped view is not stored by the client. Dynamic items still receive interactions.
+        view.stop()
+        return view
+
+    async def send(self, **kwargs) -> Optional[discord.Message]:
         count = kwargs.pop("count", 1)
         if count > 3:
-            return
+            return None
+
+        kwargs.setdefault("view", self.to_view())
 
         try:
-            self.message = await self.channel.send(**kwargs)
+            with tracer.span("streamer_warning.send", attempt=count):
+                self.message = await self.channel.send(**kwargs)
 
         except (discord.Forbidden, discord.NotFound):
             _log.warning("[ERROR DETECTED] Failed to notify to member [%d]", self.owner_id)
@@ -79,21 +70,11 @@ class StreamerView(ui.View):
             _log.warning("[ERROR DETECTED] Failed to notify to member [%d]. Retrying.", self.owner_id)
             sleep = min(10,  count * 2 + random.uniform(0, 5) * 2)
             kwargs["count"] = count + 1
-            await asyncio.sleep(sleep)
+            with tracer.span("streamer_warning.retry_sleep", seconds=sleep):
+                await asyncio.sleep(sleep)
             await self.send(**kwargs)
 
-    @ui.button(label="View Stream Info", style=discord.ButtonStyle.gray, custom_id="streamer_info:details:{user_id}")
-    async def view_stream_info(self, interaction: discord.Interaction, _):
-        self.view_stream_info.disabled = True
-        
-        if self.stream_embed is discord.utils.MISSING:
-            self.stream_embed = self._get_embed()
-            
-        await interaction.response.edit_message(content=None, view=self, embed=self.stream_embed)
-
-    async def on_timeout(self):
-        if self.message:
-            await self.message.delete()
+        return self.message
 
 
 class StreamConflictResolveView(ui.View):
@@ -103,13 +84,22 @@ class StreamConflictResolveView(ui.View):
         *,
         channel: discord.VoiceChannel,
         max_streamer: int,
+        executor: ModerationExecutor,
+        coalescer: EditCoalescer,
+        deadlines: DeadlineScheduler[StreamConflictResolveView],
+        timeout: float = 180,
     ):
-        timeout = 180
-        super().__init__(timeout=timeout)
+        # The deadline is owned by the scheduler, not by a timeout task of this view.
+        super().__init__(timeout=None)
         self.timeout_at = format_dt(utcnow() + datetime.timedelta(seconds=timeout), "R")
+        # POSIX timestamp, so it can be persisted and restored after a restart.
+        self.deadline: float = time.time() + timeout
         self.channel: discord.VoiceChannel = channel
 
         self.max_streamer: int = max_streamer
+        self.executor: ModerationExecutor = executor
+        self.coalescer: EditCoalescer = coalescer
+        self.deadlines: DeadlineScheduler[StreamConflictResolveView] = deadlines
         self.initial_streamer: Tuple[discord.Member] = tuple(existing_streamer)  # type: ignore
         self.current_streamer: Tuple[discord.Member] = tuple(existing_streamer)  # type: ignore
         self.agreed_streamer: Tuple[discord.Member] = tuple()
@@ -138,29 +128,49 @@ class StreamConflictResolveView(ui.View):
             "delete_after": self.delete_after,
         }
 
+    def _is_resolved(self) -> bool:
+        return len(self.agreed_streamer) >= len(self.current_streamer) - self.max_streamer
+
+    @traced("conflict_view.edit")
+    async def _edit_status(self) -> None:
+        if self.is_finished() or self.message is None:
+            return
+
+        # Renders the latest state, since the edit may run later than it was requested.
+        self.__renew_streamer_status()
+        await self.message.edit(**self._get_status())
+
+        if self.__close:
+            self.coalescer.discard(self.message.id)
+            self.stop()
+
+    @traced("conflict_view.update")
     async def update(self) -> None:
         self.__renew_streamer_status()
 
-        kwargs = self._get_status()
-        
         if self.message is not None:
-            await self.message.edit(**kwargs)
+            # Edits are coalesced per message, but resolving the conflict is shown immediately.
+            if self._is_resolved():
+                await self.coalescer.flush(self.message.id, self._edit_status)
+            else:
+                self.coalescer.schedule(self.message.id, self._edit_status)
+            return
 
-        else:
-            conflict_streamer = get_mentioned_streamers(self.current_streamer)
-            try:
-                self.message = await self.channel.send(
-                    f"Hey, {conflict_streamer}! You should resolve your stream conflicts.",
-                    **kwargs,
-                )
-            except (discord.Forbidden, discord.NotFound) as e:
-                raise e
+        kwargs = self._get_status()
+        conflict_streamer = get_mentioned_streamers(self.current_streamer)
+        try:
+            self.message = await self.channel.send(
+                f"Hey, {conflict_streamer}! You should resolve your stream conflicts.",
+                **kwargs,
+            )
+        except (discord.Forbidden, discord.NotFound) as e:
+            raise e
 
-            except discord.HTTPException:
-                raise SpawnViewFailed(f"Failed to start handling conflict in channel [{self.channel.id}]")
+        except discord.HTTPException:
+            raise SpawnViewFailed(f"Failed to start handling conflict in channel [{self.channel.id}]")
 
-            except Exception:
-                raise Exception(f"Unexpected Error detected while handling conflict in channel [{self.channel.id}]")
+        except Exception:
+            raise Exception(f"Unexpected Error detected while handling conflict in channel [{self.channel.id}]")
 
         if self.__close:
             self.stop()
@@ -184,7 +194,12 @@ class StreamConflictResolveView(ui.View):
 
         return kwargs
 
-    async def start(self):
+    async def start(self, *, message_id: Optional[int] = None):
+        """Sends the conflict message.
+
+        :param message_id: The conflict message sent before a restart. It's edited instead of
+            sending a new one, unless it's been deleted.
+        """
         content = (
             "Your stream may be forcibly closed by Discord Mods or me.\n"
             f"If you don't resolve it, all of streamers will be disconnected from this channel in {self.timeout_at}."
@@ -197,22 +212,56 @@ class StreamConflictResolveView(ui.View):
         embed.set_footer(text="This message may be sent when I failed to handle stream(s) after starting up.")
         self.initial_embed = embed
 
+        # Cancelled when the view stops, including when sending fails.
+        self.deadlines.schedule(self, self.deadline)
+
+        if message_id is not None:
+            try:
+                await self._resume(message_id)
+                return
+            except discord.NotFound:
+                self.message = None
+
         try:
             await self.update()
         except Exception:
             raise
 
+    async def _resume(self, message_id: int) -> None:
+        self.__renew_streamer_status()
+        conflict_streamer = get_mentioned_streamers(self.current_streamer)
+
+        kwargs = self._get_status()
+        kwargs.setdefault("content", f"Hey, {conflict_streamer}! You should resolve your stream conflicts.")
+
+        self.message = self.channel.get_partial_message(message_id)
+        await self.message.edit(**kwargs)
+
+        if self.__close:
+            self.stop()
+
     async def _kick_streamers(self, *, reason: Optional[str] = None) -> None:
-        async with asyncio.TaskGroup() as tg:
-            for mem in self.current_streamer:
-                if mem.voice is None:
-                    continue
+        # The latency of these disconnects is measured from the deadline, including how late it fired.
+        received_at = time.perf_counter() - max(0.0, time.time() - self.deadline)
+
+        for mem in self.current_streamer:
+            if mem.voice is None:
+                continue
+
+            factory = partial(mem.edit, voice_channel=None, reason=reason)
+            self.executor.submit(ModerationAction.disconnect(mem, factory, received_at=received_at))
+
+    def stop(self) -> None:
+        self.deadlines.cancel(self)
+        super().stop()
+
+    async def expire(self) -> None:
+        """Called by the scheduler once the deadline is reached."""
+        if self.is_finished():
+            return
 
-                tg.create_task(
-                    mem.edit(voice_channel=None, reason=reason),
-                    name=f"golive-force-kick: <guild:{mem.guild.id}, channel:{self.channel.id}, member:{mem.id}>"
-                )
-                await asyncio.sleep(0.1)
+        self.stop()
+        await self.on_timeout()
 
     async def on_timeout(self) -> None:
         if self.message:
@@ -225,5 +274,6 @@ class StreamConflictResolveView(ui.View):
                 "embed" : None,
             }
 
+            self.coalescer.discard(self.message.id)
             await self.message.edit(**kwargs)
             await self._kick_streamers(reason=f"Stream conflict not resolved in {self.channel} (ID : {self.channel.id})")
\ No newline at end of file
@@ -0,0 +1,337 @@
+from __future__ import annotations
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+import asyncio
+import json
+import logging
+import random
+import time
+
+
+__all__ = (
+    "Span",
+    "Tracer",
+    "tracer",
+    "traced",
+)
+
+_log = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# The active span, or a marker that the trace in progress isn't recorded.
+_UNRECORDED : Any = object()
+_current_span : ContextVar[Any] = ContextVar("golive_current_span", default=None)
+
+
+class _Trace:
+    """Spans of one root span. They're exported once every open span has ended."""
+
+    __slots__ = ("id", "sampled", "spans", "open")
+
+    def __init__(self, sampled : bool) -> None:
+        self.id : str = f"{random.getrandbits(64):016x}"
+        self.sampled : bool = sampled
+        # Spans not exported yet, in the order they started.
+        self.spans : list[Span] = []
+        self.open : int = 0
+
+
+class Span:
+    """A timed operation. Spans started while it's active become its children.
+
+    Used as a context manager, in both sync and async code.
+    """
+
+    __slots__ = (
+        "tracer", "trace", "name", "id", "parent", "attributes",
+        "started_at", "duration", "error", "_start", "_token",
+    )
+
+    def __init__(
+        self,
+        tracer : Tracer,
+        trace : _Trace,
+        name : str,
+        parent : Optional[Span],
+        attributes : dict[str, Any],
+    ) -> None:
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.id : str = f"{random.getrandbits(64):016x}"
+        self.parent = parent
+        self.attributes = attributes
+        self.started_at : float = 0.0
+        self.duration : Optional[float] = None
+        self.error : Optional[str] = None
+        self._start : float = 0.0
+        self._token = None
+
+    def set(self, key : str, value : Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> Span:
+        self.trace.open += 1
+        self.trace.spans.append(self)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type : Any, exc : Any, tb : Any) -> None:
+        self.duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Ended in another context than the one it started in.
+            _current_span.set(self.parent)
+
+        self.trace.open -= 1
+        if self.trace.open == 0:
+            self.tracer._finish(self.trace)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace.id,
+            "span_id": self.id,
+            "parent_id": None if self.parent is None else self.parent.id,
+            "name": self.name,
+            "start": self.started_at,
+            "duration_ms": None if self.duration is None else self.duration * 1000,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+    def __repr__(self) -> str:
+        return f"<Span name={self.name!r} trace={self.trace.id} duration={self.duration}>"
+
+
+class _NoSpan:
+    """Stands in for a span that isn't recorded."""
+
+    __slots__ = ()
+
+    def set(self, key : str, value : Any) -> None:
+        pass
+
+    def __enter__(self) -> _NoSpan:
+        return self
+
+    def __exit__(self, exc_type : Any, exc : Any, tb : Any) -> None:
+        pass
+
+
+class _UnsampledSpan(_NoSpan):
+    """The root of a trace that isn't sampled. Spans started inside aren't recorded either."""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self) -> _UnsampledSpan:
+        self._token = _current_span.set(_UNRECORDED)
+        return self
+
+    def __exit__(self, exc_type : Any, exc : Any, tb : Any) -> None:
+        _current_span.reset(self._token)
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Records span trees and exports them to a JSON lines file.
+
+    Whether a trace is exported is decided when its root span starts. If ``slow_threshold``
+    is set, every trace is recorded, and a trace whose root is slower than the threshold is
+    logged as a tree and exported even if it isn't sampled. Otherwise unsampled traces
+    aren't recorded at all. Tracing is off until it's configured.
+
+    A trace is exported once its last open span ends. Spans of queued work, started with
+    ``parent`` after the trace was exported, are exported later with the same trace id.
+
+    :param sample_rate: The fraction of traces exported, between 0 and 1.
+    :param slow_threshold: Seconds. Slower root spans are logged with their whole tree.
+    :param path: The JSON lines file where spans are appended.
+    :param flush_interval: Seconds between two writes of exported spans.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate : float = 0.0,
+        slow_threshold : Optional[float] = None,
+        path : str = "traces.jsonl",
+        flush_interval : float = 5.0,
+    ) -> None:
+        self.sample_rate : float = 0.0
+        self.slow_threshold : Optional[float] = None
+        self.path : str = path
+        self.flush_interval : float = flush_interval
+        self.exported : int = 0
+        self.slow : int = 0
+
+        self._buffer : list[str] = []
+        self._flush_handle : Optional[asyncio.TimerHandle] = None
+        self.configure(sample_rate=sample_rate, slow_threshold=slow_threshold, path=path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.slow_threshold is not None
+
+    def configure(
+        self,
+        *,
+        sample_rate : Optional[float] = None,
+        slow_threshold : Optional[float] = None,
+        path : Optional[str] = None,
+    ) -> None:
+        if sample_rate is not None:
+            if not 0 <= sample_rate <= 1:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+
+        if slow_threshold is not None:
+            self.slow_threshold = slow_threshold if slow_threshold > 0 else None
+
+        if path is not None:
+            self.path = path
+
+    @staticmethod
+    def current() -> Any:
+        """The active span of this context, to start spans of queued work with ``parent``.
+        It's ``None`` outside any trace, and a marker inside a trace that isn't recorded.
+        """
+        return _current_span.get()
+
+    def span(self, name : str, *, parent : Any = None, **attributes : Any) -> Span | _NoSpan:
+        """Starts a span when entered.
+
+        :param name: The name of the operation.
+        :param parent: The parent span, from :meth:`current`. Defaults to the active span
+            of this context. A span without a parent starts a new trace.
+        """
+        if parent is None:
+            parent = _current_span.get()
+
+        if parent is _UNRECORDED:
+            return _NO_SPAN
+
+        if parent is not None:
+            return Span(self, parent.trace, name, parent, attributes)
+
+        if not self.enabled:
+            return _NO_SPAN
+
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        if not sampled and self.slow_threshold is None:
+            return _UnsampledSpan()
+
+        return Span(self, _Trace(sampled), name, None, attributes)
+
+    def _finish(self, trace : _Trace) -> None:
+        spans, trace.spans = trace.spans, []
+        top = spans[0]
+        slow = self.slow_threshold is not None and top.duration >= self.slow_threshold
+
+        if slow:
+            self.slow += 1
+            _log.warning("[TRACE] Slow %s took %.1fms\n%s", top.name, top.duration * 1000, self.format_tree(spans))
+
+        if trace.sampled or slow:
+            self._export(spans, slow)
+
+    @staticmethod
+    def format_tree(spans : list[Span]) -> str:
+        """Renders spans as an indented tree, with offsets from the first span."""
+        root = spans[0]
+        ids = {span.id for span in spans}
+        children : dict[Optional[str], list[Span]] = {}
+        for span in spans[1:]:
+            parent_id = span.parent.id if span.parent is not None and span.parent.id in ids else root.id
+            children.setdefault(parent_id, []).append(span)
+
+        lines = []
+
+        def walk(span : Span, depth : int) -> None:
+            offset = (span._start - root._start) * 1000
+            duration = "?" if span.duration is None else f"{span.duration * 1000:.1f}ms"
+            error = f" !{span.error}" if span.error else ""
+            attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            lines.append(f"{'  ' * depth}{span.name} +{offset:.1f}ms {duration}{error} {attributes}".rstrip())
+
+            for child in children.get(span.id, ()):
+                walk(child, depth + 1)
+
+        walk(root, 0)
+        return "\n".join(lines)
+
+    def _export(self, spans : list[Span], slow : bool) -> None:
+        for span in spans:
+            data = span.to_dict()
+            data["slow"] = slow
+            self._buffer.append(json.dumps(data, default=str))
+
+        self.exported += 1
+
+        if self._flush_handle is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+                return
+
+            self._flush_handle = loop.call_later(self.flush_interval, self._flush_later, loop)
+
+    def _flush_later(self, loop : asyncio.AbstractEventLoop) -> None:
+        self._flush_handle = None
+        lines, self._buffer = self._buffer, []
+        loop.run_in_executor(None, self._write, lines)
+
+    def _write(self, lines : list[str]) -> None:
+        if not lines:
+            return
+
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            _log.warning("[TRACE] Failed to write [%d] span(s) to %s", len(lines), self.path, exc_info=e)
+
+    def flush(self) -> None:
+        """Writes exported spans now."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        lines, self._buffer = self._buffer, []
+        self._write(lines)
+
+
+# The tracer of the process. It's off until configured.
+tracer : Tracer = Tracer()
+
+
+def traced(
+    name : Optional[str] = None,
+) -> Callable[[Callable[..., Coroutine[Any, Any, R]]], Callable[..., Coroutine[Any, Any, R]]]:
+    """Runs every call of a coroutine function in a span of :data:`tracer`.
+
+    :param name: The name of the span. Defaults to the qualified name of the function.
+    """
+
+    def decorator(func : Callable[..., Coroutine[Any, Any, R]]) -> Callable[..., Coroutine[Any, Any, R]]:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        async def wrapper(*args : Any, **kwargs : Any) -> R:
+            with tracer.span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -42,9 +42,9 @@ def get_stream_status(
     before: discord.VoiceState,
     after: discord.VoiceState
 ) -> Tuple[bool, Optional[discord.VoiceChannel]]:
-    # Join VC first time
+    # Join VC first time. A member may look joining while streaming if their former voice state was not cached.
     if before.channel is None and after.channel is not None:
-        return False, after.channel
+        return after.self_stream, after.channel
 
     # Leave VC
     if before.channel is not None and after.channel is None:
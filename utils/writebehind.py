@@ -0,0 +1,344 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import asyncio
+import copy
+import logging
+import random
+
+
+__all__ = (
+    "GuildWrite",
+    "WriteBehindBuffer",
+)
+
+_log = logging.getLogger(__name__)
+
+
+def _set_path(document : dict[str, Any], path : str, value : Any) -> None:
+    # Sets a dotted path the way MongoDB does, creating the missing parents.
+    *parents, key = path.split(".")
+    for parent in parents:
+        child = document.get(parent)
+        if not isinstance(child, dict):
+            child = document[parent] = {}
+        document = child
+    document[key] = value
+
+
+def _unset_path(document : dict[str, Any], path : str) -> None:
+    *parents, key = path.split(".")
+    for parent in parents:
+        document = document.get(parent)
+        if not isinstance(document, dict):
+            return
+    document.pop(key, None)
+
+
+@dataclass
+class GuildWrite:
+    """A mutation of one guild setup document.
+
+    Fields are dotted paths like ``channels.1234``. Writes of the same guild are merged
+    into a single write, where the later one wins.
+
+    :param set_fields: Fields to set.
+    :param unset_fields: Fields to remove.
+    :param upsert: Whether the document is created if it doesn't exist.
+    :param delete: Whether the document is deleted.
+    :param replace: Whether the document is replaced with ``set_fields``. Used when a guild is
+        deleted and set up again before being written.
+    """
+
+    guild_id : int
+    set_fields : dict[str, Any] = field(default_factory=dict)
+    unset_fields : set[str] = field(default_factory=set)
+    upsert : bool = False
+    delete : bool = False
+    replace : bool = False
+
+    @classmethod
+    def deletion(cls, guild_id : int) -> GuildWrite:
+        return cls(guild_id, delete=True)
+
+    def is_empty(self) -> bool:
+        return not (self.delete or self.replace or self.set_fields or self.unset_fields)
+
+    def merge(self, newer : GuildWrite) -> GuildWrite:
+        """Returns a write that has the same effect as writing ``self`` and then ``newer``."""
+        if newer.delete:
+            return GuildWrite.deletion(self.guild_id)
+
+        if self.delete and not newer.upsert:
+            # Updating a deleted document does nothing.
+            return GuildWrite.deletion(self.guild_id)
+
+        if self.delete or self.replace:
+            # The whole document is written, so dotted paths are applied to it here.
+            document = {} if self.delete else copy.deepcopy(self.set_fields)
+            for path in newer.unset_fields:
+                _unset_path(document, path)
+            for path, value in newer.set_fields.items():
+                _set_path(document, path, copy.deepcopy(value))
+            return GuildWrite(self.guild_id, set_fields=document, upsert=True, replace=True)
+
+        merged = GuildWrite(
+            self.guild_id,
+            set_fields=dict(self.set_fields),
+            unset_fields=set(self.unset_fields),
+            upsert=self.upsert or newer.upsert,
+        )
+
+        for path, value in newer.set_fields.items():
+            # A field and its sub field can't be written at once, so the sub fields are dropped.
+            merged.unset_fields = {p for p in merged.unset_fields if p != path and not p.startswith(f"{path}.")}
+            for p in [p for p in merged.set_fields if p.startswith(f"{path}.")]:
+                del merged.set_fields[p]
+
+            if not merged._apply_to_parent(path, value):
+                merged.set_fields[path] = value
+
+        for path in newer.unset_fields:
+            merged.set_fields = {p : v for p, v in merged.set_fields.items() if p != path and not p.startswith(f"{path}.")}
+
+            if not merged._apply_to_parent(path, None, remove=True):
+                merged.unset_fields.add(path)
+
+        return merged
+
+    def _apply_to_parent(self, path : str, value : Any, *, remove : bool = False) -> bool:
+        # If the parent of ``path`` is written as a whole, the change is applied to it instead.
+        parent, _, key = path.rpartition(".")
+        if not parent:
+            return False
+
+        if parent in self.unset_fields:
+            if remove:
+                # Already removed with its parent.
+                return True
+            self.unset_fields.discard(parent)
+            self.set_fields[parent] = {key : value}
+            return True
+
+        container = self.set_fields.get(parent)
+        if not isinstance(container, dict):
+            return False
+
+        container = dict(container)
+        if remove:
+            container.pop(key, None)
+        else:
+            container[key] = value
+        self.set_fields[parent] = container
+        return True
+
+
+GuildWriter = Callable[[dict[int, GuildWrite]], Awaitable[dict[int, BaseException]]]
+
+
+class _Entry:
+    __slots__ = ("write", "waiters", "attempts")
+
+    def __init__(self, write : GuildWrite) -> None:
+        self.write = write
+        self.waiters : list[asyncio.Future[bool]] = []
+        self.attempts : int = 0
+
+    def merge(self, other : _Entry) -> None:
+        """Merges a newer entry into this one."""
+        self.write = self.write.merge(other.write)
+        self.waiters.extend(other.waiters)
+
+    def resolve(self, result : bool) -> None:
+        for future in self.waiters:
+            if not future.done():
+                future.set_result(result)
+
+
+class WriteBehindBuffer:
+    """Collects guild writes and writes them in batches.
+
+    Writes of the same guild submitted within ``window`` seconds are merged into one,
+    and every guild is written in a single batch. A failed write is retried with
+    jittered exponential backoff, merged with anything submitted meanwhile.
+    Batches are written one at a time, so writes of a guild are never reordered.
+
+    :param writer: Writes a batch and returns the errors of the guilds that failed.
+    :param window: Seconds to wait for more writes before writing a batch.
+    :param max_batch: The maximum number of guilds written in a batch.
+    :param max_attempts: How many times a write is tried before giving up.
+    :param base_delay: The delay before the first retry.
+    :param max_delay: The upper bound of a retry delay.
+    """
+
+    def __init__(
+        self,
+        writer : GuildWriter,
+        *,
+        window : float = 0.5,
+        max_batch : int = 500,
+        max_attempts : int = 5,
+        base_delay : float = 0.5,
+        max_delay : float = 30.0,
+    ) -> None:
+        self.writer = writer
+        self.window = window
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.batches : int = 0
+        self.written : int = 0
+        self.retried : int = 0
+        self.failed : int = 0
+
+        self._pending : dict[int, _Entry] = {}
+        self._retrying : dict[int, _Entry] = {}
+        self._retries : dict[int, asyncio.TimerHandle] = {}
+        self._flush_handle : Optional[asyncio.TimerHandle] = None
+        # A flush started while another one holds the lock waits for it, so there can be several.
+        self._flush_tasks : set[asyncio.Task[None]] = set()
+        self._lock : asyncio.Lock = asyncio.Lock()
+        self._closing : bool = False
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._retrying)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "retrying": len(self._retrying),
+            "batches": self.batches,
+            "written": self.written,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    def submit(self, write : GuildWrite) -> asyncio.Future[bool]:
+        """Queues a write.
+
+        :return: A future that is ``True`` once the write is durable,
+            or ``False`` if it's given up.
+        """
+        loop = asyncio.get_running_loop()
+        guild_id = write.guild_id
+
+        entry = _Entry(write)
+        future = loop.create_future()
+        entry.waiters.append(future)
+
+        retrying = self._retrying.get(guild_id)
+        if retrying is not None:
+            # Written by the retry.
+            retrying.merge(entry)
+            return future
+
+        pending = self._pending.get(guild_id)
+        if pending is None:
+            self._pending[guild_id] = entry
+        else:
+            pending.merge(entry)
+
+        self._schedule_flush(self.window)
+        return future
+
+    async def flush(self) -> None:
+        """Writes every pending write now. Writes waiting for a retry are not written."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        async with self._lock:
+            while self._pending:
+                batch = {}
+                for guild_id in list(self._pending)[:self.max_batch]:
+                    batch[guild_id] = self._pending.pop(guild_id)
+
+                try:
+                    await self._write(batch)
+                except asyncio.CancelledError:
+                    # Not known whether the batch is written, so it's written again by close().
+                    for guild_id, entry in batch.items():
+                        newer = self._pending.get(guild_id)
+                        if newer is not None:
+                            entry.merge(newer)
+                        self._pending[guild_id] = entry
+                    raise
+
+    async def close(self) -> None:
+        """Writes everything once, including writes waiting for a retry.
+        Writes that still fail are given up.
+        """
+        self._closing = True
+
+        for guild_id, handle in list(self._retries.items()):
+            handle.cancel()
+            self._requeue(guild_id)
+
+        await self.flush()
+
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    def _schedule_flush(self, delay : float) -> None:
+        if self._flush_handle is None and not self._closing:
+            self._flush_handle = asyncio.get_running_loop().call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush(), name="golive-write-behind-flush")
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    def _get_delay(self, attempts : int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _write(self, batch : dict[int, _Entry]) -> None:
+        to_write = {guild_id : entry.write for guild_id, entry in batch.items() if not entry.write.is_empty()}
+        self.batches += 1
+
+        try:
+            errors = await self.writer(to_write) if to_write else {}
+        except Exception as e:
+            errors = dict.fromkeys(to_write, e)
+
+        loop = asyncio.get_running_loop()
+
+        for guild_id, entry in batch.items():
+            error = errors.get(guild_id)
+            if error is None:
+                self.written += 1
+                entry.resolve(True)
+                continue
+
+            entry.attempts += 1
+            if self._closing or entry.attempts >= self.max_attempts:
+                self.failed += 1
+                _log.warning("[WRITE BEHIND] Giving up writing guild [%d] after %d attempt(s).", guild_id, entry.attempts, exc_info=error)
+                entry.resolve(False)
+                continue
+
+            # Anything submitted meanwhile is written with the retry, after this write.
+            newer = self._pending.pop(guild_id, None)
+            if newer is not None:
+                entry.merge(newer)
+
+            self.retried += 1
+            self._retrying[guild_id] = entry
+
+            delay = self._get_delay(entry.attempts)
+            _log.info("[WRITE BEHIND] Failed to write guild [%d]. Retrying in %.1fs.", guild_id, delay, exc_info=error)
+            self._retries[guild_id] = loop.call_later(delay, self._requeue, guild_id)
+
+    def _requeue(self, guild_id : int) -> None:
+        self._retries.pop(guild_id, None)
+        entry = self._retrying.pop(guild_id, None)
+        if entry is None:
+            return
+
+        # Nothing of the guild can be pending, since new writes are merged into the retry.
+        self._pending[guild_id] = entry
+        self._schedule_flush(0)